@@ -1,11 +1,17 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import (
     Category,
     IssueType,
     Ticket,
     TicketComment,
+    TicketEvent,
     TicketImage,
     TicketAttachment,
+    BackgroundJob,
+    Notification,
+    OutboxMessage,
+    UploadSession,
 )
 
 # ======================
@@ -61,11 +67,35 @@ class TicketAdmin(admin.ModelAdmin):
         "assignee",
         "created_at",
         "due_at",
+        "sla_level",
     )
-    list_filter = ("status", "category", "assignee")
+    list_filter = ("status", "sla_level", "category", "assignee")
     search_fields = ("title", "description")
     autocomplete_fields = ("category", "requester", "assignee", "issue_type")
     ordering = ("-created_at",)
+    readonly_fields = (
+        "first_response_at", "first_response_time", "claimed_at", "claim_time",
+        "closed_at", "resolution_time", "sla_level",
+    )
+
+    def save_model(self, request, obj, form, change):
+        obj.save(actor=request.user)
+
+
+# ======================
+# ประวัติใบงาน (เพิ่มอย่างเดียว — ดูได้แต่แก้ไม่ได้)
+# ======================
+@admin.register(TicketEvent)
+class TicketEventAdmin(admin.ModelAdmin):
+    list_display = ("ticket", "kind", "from_status", "to_status", "to_assignee", "actor", "duration", "created_at")
+    list_filter = ("kind", "to_status")
+    ordering = ("-created_at",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 # ======================
@@ -92,3 +122,53 @@ class TicketImageAdmin(admin.ModelAdmin):
 class TicketAttachmentAdmin(admin.ModelAdmin):
     list_display = ("ticket", "file", "uploaded_at")
     ordering = ("-uploaded_at",)
+
+
+# ======================
+# การแจ้งเตือน (SLA ฯลฯ)
+# ======================
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("recipient", "kind", "ticket", "message", "created_at", "read_at")
+    list_filter = ("kind",)
+    readonly_fields = ("dedupe_key",)
+    ordering = ("-created_at",)
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "channel", "address", "kind", "ticket", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status", "channel", "kind")
+    search_fields = ("address", "subject")
+    readonly_fields = ("claimed_by", "claimed_at", "last_error", "sent_at")
+    ordering = ("-created_at",)
+    actions = ["retry_now"]
+
+    @admin.action(description="ส่งใหม่ทันที (เริ่มนับจำนวนครั้งใหม่)")
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status="sending").update(
+            status="pending", attempts=0, next_attempt_at=timezone.now(), last_error=""
+        )
+        self.message_user(request, f"เข้าคิวส่งใหม่ {updated} ข้อความ")
+
+
+# ======================
+# Background jobs (คิว export ฯลฯ)
+# ======================
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "progress", "requested_by", "created_at", "finished_at")
+    list_filter = ("kind", "status")
+    readonly_fields = ("dedupe_key", "attempts", "started_at", "finished_at", "error")
+    ordering = ("-created_at",)
+
+
+# ======================
+# Upload sessions (ไฟล์แนบแบบแบ่ง chunk)
+# ======================
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("filename", "ticket", "user", "status", "size", "received", "updated_at")
+    list_filter = ("status",)
+    readonly_fields = ("sha256", "received", "attachment", "error")
+    ordering = ("-created_at",)
@@ -0,0 +1 @@
+# helpdesk/api — JSON API (ใบงาน / คอมเมนต์ / catalog / ยอดบน dashboard) สำหรับเครื่องมือภายใน
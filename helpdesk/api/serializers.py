@@ -0,0 +1,93 @@
+# helpdesk/api/serializers.py — แปลง model เป็น dict (ไม่ใช้ DRF)
+#
+# ฟิลด์แต่ละตัวเป็นฟังก์ชันของ object → ?fields=id,title,status เลือกเฉพาะที่ต้องการได้
+# (ไม่ขอฟิลด์ไหน ก็ไม่ต้องดึง/คำนวณฟิลด์นั้น)
+
+from django.utils import timezone
+
+from ..models import Ticket
+
+_STATUS_LABELS = dict(Ticket.STATUS_CHOICES)
+
+
+def _datetime(value):
+    return timezone.localtime(value).isoformat() if value else None
+
+
+def _person(user):
+    if user is None:
+        return None
+    full = f"{user.first_name or ''} {user.last_name or ''}".strip()
+    return {"id": user.pk, "username": user.username, "name": full or user.username}
+
+
+TICKET_FIELDS = {
+    "id": lambda t: t.pk,
+    "title": lambda t: t.title,
+    "status": lambda t: t.status,
+    "status_label": lambda t: _STATUS_LABELS.get(t.status, t.status),
+    "issue_type": lambda t: t.issue_type_id,
+    "category": lambda t: t.category_id,
+    "category_name": lambda t: t.category.name if t.category_id else None,
+    "requester": lambda t: _person(t.requester),
+    "assignee": lambda t: _person(t.assignee) if t.assignee_id else None,
+    "contact": lambda t: t.contact,
+    "description": lambda t: t.description,
+    "due_at": lambda t: _datetime(t.due_at),
+    "created_at": lambda t: _datetime(t.created_at),
+    "updated_at": lambda t: _datetime(t.updated_at),
+}
+
+# ฟิลด์ของรายการเมื่อไม่ระบุ ?fields= (คอลัมน์เดียวกับหน้า ticket_list — ไม่มี description)
+TICKET_LIST_DEFAULT = (
+    "id", "title", "status", "status_label", "category_name",
+    "requester", "assignee", "created_at", "updated_at",
+)
+
+# คอลัมน์ของ Ticket ที่แต่ละฟิลด์ต้องใช้ (ส่งให้ .only() ร่วมกับ ticket_listing_queryset)
+TICKET_COLUMNS = {
+    "issue_type": ("issue_type",),
+    "contact": ("contact",),
+    "description": ("description",),
+    "due_at": ("due_at",),
+}
+
+COMMENT_FIELDS = {
+    "id": lambda c: c.pk,
+    "ticket": lambda c: c.ticket_id,
+    "author": lambda c: _person(c.author),
+    "body": lambda c: c.body,
+    "internal": lambda c: c.internal,
+    "created_at": lambda c: _datetime(c.created_at),
+}
+
+
+class FieldsError(ValueError):
+    """?fields= มีชื่อฟิลด์ที่ไม่รู้จัก"""
+
+
+def parse_fields(raw, available, default=None):
+    """
+    ?fields=a,b,c → tuple ของชื่อฟิลด์ (ตามลำดับที่ขอ ไม่ซ้ำ)
+
+    ไม่ระบุ → default (หรือทุกฟิลด์), มีชื่อที่ไม่รู้จัก → FieldsError
+    """
+    names = [n.strip() for n in (raw or "").split(",") if n.strip()]
+    if not names:
+        return tuple(default or available)
+    unknown = [n for n in names if n not in available]
+    if unknown:
+        raise FieldsError(", ".join(unknown))
+    return tuple(dict.fromkeys(names))
+
+
+def extra_columns(fields):
+    """คอลัมน์เพิ่มเติมนอกเหนือจาก TICKET_LISTING_FIELDS ที่ฟิลด์ที่ขอต้องใช้"""
+    columns = []
+    for name in fields:
+        columns.extend(TICKET_COLUMNS.get(name, ()))
+    return columns
+
+
+def serialize(obj, fields, registry):
+    return {name: registry[name](obj) for name in fields}
@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import views
+
+app_name = "api"
+
+urlpatterns = [
+    path("tickets/", views.tickets, name="tickets"),
+    path("tickets/<int:pk>/", views.ticket, name="ticket"),
+    path("tickets/<int:pk>/comments/", views.ticket_comments, name="ticket_comments"),
+    path("catalog/", views.catalog_view, name="catalog"),
+    path("dashboard/", views.dashboard, name="dashboard"),
+]
@@ -0,0 +1,391 @@
+# helpdesk/api/views.py — JSON API (session login เดียวกับหน้าเว็บ)
+#
+#   GET   /helpdesk/api/tickets/                 รายการ (ตัวกรอง q/status/date_from/date_to เหมือน ticket_list)
+#   POST  /helpdesk/api/tickets/                 แจ้งงานใหม่ {"issue_type", "contact", "description"}
+#   GET   /helpdesk/api/tickets/<pk>/            รายละเอียด
+#   PATCH /helpdesk/api/tickets/<pk>/            แก้ไข (IT ผู้รับผิดชอบ/superuser — เหมือน ticket_update)
+#   GET   /helpdesk/api/tickets/<pk>/comments/   คอมเมนต์
+#   POST  /helpdesk/api/tickets/<pk>/comments/   เพิ่มคอมเมนต์ {"body"}
+#   GET   /helpdesk/api/catalog/                 หมวด/งานที่แจ้งได้
+#   GET   /helpdesk/api/dashboard/               ยอดบน dashboard
+#
+# - ?fields=id,title,status เลือกเฉพาะฟิลด์ที่ต้องการ (ดู serializers.py)
+# - รายการแบ่งหน้าแบบ cursor: ?cursor=<next จากหน้าก่อน>&limit=1..200 (cursor เสีย → 400)
+# - ทุก GET มี ETag: ส่ง If-None-Match กลับมา → 304 โดยไม่ต้องดึง/แปลงข้อมูลใบงาน
+#   (ETag ของรายการ/ใบงานคิดจาก updated_at — query aggregate เดียว)
+# - PATCH ส่ง If-Match ได้ → 412 ถ้ามีคนแก้ใบงานไปก่อนแล้ว
+
+import hashlib
+import json
+from functools import wraps
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.http import HttpResponseNotModified, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from .. import catalog, counters, events, exports, notify, search
+from ..filters import TicketFilter
+from ..forms import TicketCommentForm, TicketForm, TicketUpdateForm
+from ..media import etag_matches
+from ..models import Ticket, TicketComment, UserProfile
+from ..pagination import InvalidCursor, KeysetPaginator, PartitionedKeysetPaginator
+from ..queries import (
+    CLOSED_CODES,
+    OPEN_FIRST_ORDERING,
+    OPEN_FIRST_PARTITIONS,
+    can_view_ticket,
+    list_scope,
+    order_open_first,
+    ticket_list_queryset,
+    ticket_listing_queryset,
+)
+from ..roles import is_it_staff
+from .serializers import (
+    COMMENT_FIELDS,
+    TICKET_FIELDS,
+    TICKET_LIST_DEFAULT,
+    FieldsError,
+    extra_columns,
+    parse_fields,
+    serialize,
+)
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+CACHE_CONTROL = "private, no-cache"
+
+
+class ApiError(Exception):
+    """คำขอไม่ถูกต้อง (status = HTTP status ที่ตอบ, errors = รายละเอียดรายฟิลด์)"""
+
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors
+
+
+def _error(message, status, errors=None):
+    data = {"error": message}
+    if errors:
+        data["errors"] = errors
+    return JsonResponse(data, status=status)
+
+
+def api_view(*methods):
+    """
+    ต้อง login (ตอบ 401 แทนการ redirect ไปหน้า login), จำกัด method,
+    และแปลง ApiError เป็น JSON
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return _error("ต้องเข้าสู่ระบบ", 401)
+            if request.method not in methods:
+                response = _error("method นี้ใช้ไม่ได้", 405)
+                response["Allow"] = ", ".join(methods)
+                return response
+            try:
+                return view(request, *args, **kwargs)
+            except ApiError as exc:
+                return _error(str(exc), exc.status, exc.errors)
+
+        return wrapper
+
+    return decorator
+
+
+# ---------- helper ----------
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        raise ApiError("JSON ไม่ถูกต้อง")
+    if not isinstance(data, dict):
+        raise ApiError("ต้องส่งเป็น JSON object")
+    return data
+
+
+def _fields(request, registry, default=None):
+    try:
+        return parse_fields(request.GET.get("fields"), registry, default)
+    except FieldsError as exc:
+        raise ApiError(f"ไม่รู้จักฟิลด์: {exc}")
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get("limit") or DEFAULT_LIMIT)
+    except ValueError:
+        raise ApiError("limit ไม่ถูกต้อง")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _etag(*parts):
+    return '"{}"'.format(hashlib.sha1(repr(parts).encode("utf-8")).hexdigest())
+
+
+def _conditional(request, etag, build):
+    """304 ถ้า If-None-Match ตรง ไม่เช่นนั้นเรียก build() แล้วตอบเป็น JSON พร้อม ETag"""
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(build())
+    response["ETag"] = etag
+    response["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def _form_errors(form):
+    return {name: [str(e) for e in errors] for name, errors in form.errors.items()}
+
+
+def _ticket_url(pk):
+    return reverse("helpdesk:api:ticket", args=[pk])
+
+
+def _ticket_version(pk):
+    """(requester_id, assignee_id, updated_at) ของใบงาน — ไม่มี = 404"""
+    row = (
+        Ticket.objects.filter(pk=pk)
+        .values_list("requester_id", "assignee_id", "updated_at")
+        .first()
+    )
+    if row is None:
+        raise ApiError("ไม่พบใบงาน", 404)
+    return row
+
+
+def _check_visible(user, requester_id, assignee_id):
+    # ใช้กฎเดียวกับ ticket_detail (สร้าง Ticket เปล่าแค่ให้ can_view_ticket อ่าน id)
+    if not can_view_ticket(user, Ticket(requester_id=requester_id, assignee_id=assignee_id)):
+        raise ApiError("คุณไม่มีสิทธิ์เข้าถึงใบงานนี้", 403)
+
+
+def _ticket_etag(pk, updated_at, fields):
+    # title มาจาก catalog (เปลี่ยนชื่อ IssueType ไม่แตะ updated_at) → รวมเวอร์ชัน catalog ด้วย
+    return _etag("ticket", pk, updated_at.isoformat(), fields, catalog.version())
+
+
+def _load_ticket(pk):
+    return get_object_or_404(
+        Ticket.objects.select_related("requester", "assignee", "category"), pk=pk
+    )
+
+
+# ===== Tickets =====
+@api_view("GET", "POST")
+def tickets(request):
+    if request.method == "POST":
+        return _create_ticket(request)
+
+    user = request.user
+    fields = _fields(request, TICKET_FIELDS, TICKET_LIST_DEFAULT)
+    limit = _limit(request)
+    ticket_filter = TicketFilter(request.GET)
+    if ticket_filter.errors:
+        raise ApiError("ตัวกรองไม่ถูกต้อง", errors=ticket_filter.errors)
+    cursor = request.GET.get("cursor") or ""
+
+    # ลายนิ้วมือของชุดข้อมูล (จำนวน/id ล่าสุด/updated_at ล่าสุด) — query aggregate เดียว
+    etag = _etag(
+        "tickets", list_scope(user), ticket_filter.normalized(), fields, limit, cursor,
+        exports.ticket_list_version(user, request.GET),
+    )
+
+    def build():
+        qs = ticket_filter.apply(ticket_list_queryset(user))
+        if ticket_filter.q:
+            paginator = KeysetPaginator(search.SEARCH_ORDERING, page_size=limit)
+            qs = search.rank_tickets(qs, ticket_filter.q)
+        else:
+            paginator = PartitionedKeysetPaginator(OPEN_FIRST_ORDERING, OPEN_FIRST_PARTITIONS, page_size=limit)
+            qs = order_open_first(qs)
+        try:
+            page = paginator.page(ticket_listing_queryset(qs, extra_columns(fields)), cursor, strict=True)
+        except InvalidCursor:
+            raise ApiError("cursor ไม่ถูกต้อง")
+        return {
+            "results": [serialize(t, fields, TICKET_FIELDS) for t in page],
+            "next": page.next_cursor,
+            "previous": page.prev_cursor,
+        }
+
+    return _conditional(request, etag, build)
+
+
+def _create_ticket(request):
+    data = _json_body(request)
+    form = TicketForm(data)
+    # หน้าเว็บบังคับเลือกที่ <select required> — API ต้องตรวจเอง
+    form.fields["issue_type"].required = True
+    if not form.is_valid():
+        raise ApiError("ข้อมูลไม่ถูกต้อง", errors=_form_errors(form))
+
+    ticket = form.save(commit=False)
+    ticket.requester = request.user
+    # contact ว่าง → ใช้จากโปรไฟล์ (เหมือน ticket_create แต่ไม่สร้างโปรไฟล์ใหม่)
+    if not (ticket.contact or "").strip():
+        ticket.contact = (
+            UserProfile.objects.filter(user=request.user).values_list("contact", flat=True).first()
+            or ""
+        ).strip()
+    ticket.save(actor=request.user)
+    events.publish_ticket("created", ticket, actor=request.user)
+
+    ticket = _load_ticket(ticket.pk)
+    response = JsonResponse(serialize(ticket, tuple(TICKET_FIELDS), TICKET_FIELDS), status=201)
+    response["Location"] = _ticket_url(ticket.pk)
+    response["ETag"] = _ticket_etag(ticket.pk, ticket.updated_at, tuple(TICKET_FIELDS))
+    return response
+
+
+@api_view("GET", "PATCH")
+def ticket(request, pk):
+    if request.method == "PATCH":
+        return _update_ticket(request, pk)
+
+    fields = _fields(request, TICKET_FIELDS)
+    requester_id, assignee_id, updated_at = _ticket_version(pk)
+    _check_visible(request.user, requester_id, assignee_id)
+    etag = _ticket_etag(pk, updated_at, fields)
+    return _conditional(request, etag, lambda: serialize(_load_ticket(pk), fields, TICKET_FIELDS))
+
+
+def _update_ticket(request, pk):
+    user = request.user
+    ticket = _load_ticket(pk)
+
+    # เงื่อนไขเดียวกับ ticket_update: IT ที่เป็นผู้รับผิดชอบ หรือ superuser, งานยังไม่ปิด
+    if not is_it_staff(user) or (user != ticket.assignee and not user.is_superuser):
+        raise ApiError("คุณไม่มีสิทธิ์แก้ไขงานนี้", 403)
+    if ticket.status in CLOSED_CODES:
+        raise ApiError("ใบงานปิดแล้ว ไม่สามารถแก้ไขได้", 409)
+
+    fields = tuple(TICKET_FIELDS)
+    if_match = request.headers.get("If-Match")
+    if if_match and not etag_matches(if_match, _ticket_etag(pk, ticket.updated_at, fields)):
+        raise ApiError("ใบงานถูกแก้ไขไปแล้ว กรุณาโหลดใหม่", 412)
+
+    # PATCH: ฟิลด์ที่ไม่ส่งมาใช้ค่าเดิม
+    data = {
+        "issue_type": ticket.issue_type_id,
+        "contact": ticket.contact,
+        "description": ticket.description,
+        "status": ticket.status,
+        "assignee": ticket.assignee_id,
+    }
+    data.update(_json_body(request))
+    form = TicketUpdateForm(data, instance=ticket)
+    if not form.is_valid():
+        raise ApiError("ข้อมูลไม่ถูกต้อง", errors=_form_errors(form))
+    comment_text = (form.cleaned_data.get("comment") or "").strip()
+    with transaction.atomic():
+        form.save(commit=False).save(actor=user)
+        if comment_text:
+            TicketComment.objects.create(ticket=ticket, author=user, body=comment_text)
+            notify.enqueue("commented", [ticket], actor=user, text=comment_text)
+    events.publish_ticket("updated", ticket, actor=user)
+
+    ticket = _load_ticket(pk)
+    response = JsonResponse(serialize(ticket, fields, TICKET_FIELDS))
+    response["ETag"] = _ticket_etag(pk, ticket.updated_at, fields)
+    return response
+
+
+# ===== Comments =====
+@api_view("GET", "POST")
+def ticket_comments(request, pk):
+    user = request.user
+    requester_id, assignee_id, _ = _ticket_version(pk)
+    _check_visible(user, requester_id, assignee_id)
+
+    if request.method == "POST":
+        form = TicketCommentForm(_json_body(request))
+        if not form.is_valid():
+            raise ApiError("ข้อมูลไม่ถูกต้อง", errors=_form_errors(form))
+        comment = form.save(commit=False)
+        comment.ticket_id = pk
+        comment.author = user
+        comment.internal = False
+        with transaction.atomic():
+            comment.save()
+            notify.enqueue(
+                "commented", Ticket.objects.filter(pk=pk).select_related("requester"),
+                actor=user, text=comment.body,
+            )
+        events.publish([events.ticket_event(
+            "commented", pk, None, requester_id, assignee_id, actor_id=user.pk
+        )])
+        return JsonResponse(
+            serialize(comment, tuple(COMMENT_FIELDS), COMMENT_FIELDS), status=201
+        )
+
+    fields = _fields(request, COMMENT_FIELDS)
+    # internal ซ่อนจาก non-staff (เหมือน ticket_detail)
+    comments = TicketComment.objects.filter(ticket_id=pk)
+    if not user.is_staff:
+        comments = comments.filter(internal=False)
+
+    agg = comments.order_by().aggregate(n=Count("id"), last=Max("id"))
+    etag = _etag("comments", pk, user.is_staff, fields, agg["n"], agg["last"])
+
+    def build():
+        rows = comments.select_related("author").order_by("created_at", "id")
+        return {"results": [serialize(c, fields, COMMENT_FIELDS) for c in rows]}
+
+    return _conditional(request, etag, build)
+
+
+# ===== Catalog =====
+@api_view("GET")
+def catalog_view(request):
+    etag = _etag("catalog", catalog.version())
+
+    def build():
+        return {
+            "categories": [{"id": c.id, "name": c.name} for c in catalog.categories()],
+            "issue_types": [
+                {"id": e.id, "name": e.name, "category": e.category_id}
+                for _, entries in catalog.issue_groups()
+                for e in entries
+            ],
+        }
+
+    return _conditional(request, etag, build)
+
+
+# ===== Dashboard =====
+@api_view("GET")
+def dashboard(request):
+    """ยอดเดียวกับ KPI / By Status บนหน้า dashboard (By Status ตามตัวกรองใน GET)"""
+    user = request.user
+    if is_it_staff(user):
+        visible = Ticket.objects.all()
+    else:
+        visible = Ticket.objects.filter(Q(requester=user) | Q(assignee=user))
+
+    ticket_filter = TicketFilter(request.GET)
+    if ticket_filter.errors:
+        raise ApiError("ตัวกรองไม่ถูกต้อง", errors=ticket_filter.errors)
+
+    # ยอดที่ไม่กรองอ่านจาก TicketCounter (helpdesk/counters.py) ไม่ต้องนับทั้งตาราง
+    counts = counters.dashboard_counts(user, is_it_staff(user))
+    if ticket_filter.is_filtered:
+        by_status = dict(
+            ticket_filter.apply(visible).order_by().values_list("status").annotate(c=Count("id"))
+        )
+    else:
+        by_status = counts["by_status"]
+    data = {
+        "my_open": counts["my_open"],
+        "assigned_to_me": counts["assigned_to_me"],
+        "by_status": {code: by_status.get(code, 0) for code, _ in Ticket.STATUS_CHOICES},
+    }
+    # ยอดนับคำนวณเสร็จแล้ว → ETag จากผลลัพธ์ (ประหยัดแค่ bandwidth)
+    etag = _etag("dashboard", sorted(data.items(), key=str))
+    return _conditional(request, etag, lambda: data)
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class HelpdeskConfig(AppConfig):
     default_auto_field = "django.db.models.AutoField"
     name = "helpdesk"
-    verbose_name = "IT Helpdesk"
\ No newline at end of file
+    verbose_name = "IT Helpdesk"
+
+    def ready(self):
+        # ผูก signal สำหรับล้างแคช (รายงานรายปี ฯลฯ)
+        from . import signals  # noqa: F401
@@ -0,0 +1,198 @@
+# helpdesk/bulk.py — รับงาน/ปิดงาน/เปลี่ยนสถานะ/มอบหมาย หลายใบงานในคำขอเดียว
+#
+#   1) อ่านใบงานที่เลือกทั้งหมดใน query เดียว แล้วตรวจสิทธิ์/สถานะทีละใบในหน่วยความจำ
+#   2) ใบที่ผ่าน → UPDATE ... WHERE id IN (...) AND สถานะ/ผู้รับผิดชอบยังเป็นค่าที่อ่านไว้
+#      (หนึ่ง UPDATE ต่อคู่ค่าเดิม) แล้วอ่านกลับว่าใบไหนเปลี่ยนจริง (updated_at = now)
+#      ประวัติ/ยอดนับ/คอมเมนต์/แจ้งเตือน/events ทำเฉพาะใบที่เปลี่ยนจริง — ทั้งหมดใน transaction เดียว
+#   3) คืนผลรายใบ [BulkResult] ให้ view แสดง/ตอบเป็น JSON
+#
+# กติกาต่อใบเหมือน ticket_claim / ticket_close / ticket_update (ดู _check)
+# .update() / bulk_create ไม่ส่ง signal → ล้างแคชรายงาน + reindex ค้นหา + ยอดนับ dashboard
+# + ประวัติ/เวลา SLA + ส่ง events เอง; รับงาน/ปิดงานแจ้งผู้แจ้งผ่าน outbox (notify.enqueue)
+
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters, events, notify, reports, roles, search, sla
+from .models import Ticket, TicketComment, TicketEvent
+from .queries import CLOSED_CODES
+
+ACTIONS = {
+    "claim": "รับงาน",
+    "close": "ปิดงาน",
+    "status": "เปลี่ยนสถานะ",
+    "assign": "มอบหมายงาน",
+}
+
+# สถานะที่ตั้งผ่าน "status" ได้ (ปิดงานต้องใช้ "close")
+SETTABLE_STATUSES = [code for code, _ in Ticket.STATUS_CHOICES if code not in CLOSED_CODES]
+
+BulkResult = namedtuple("BulkResult", "id ok error")
+
+CHANGED_MEANWHILE = "ใบงานถูกแก้ไขระหว่างดำเนินการ กรุณาลองใหม่"
+
+
+class BulkError(Exception):
+    """คำขอทั้งชุดไม่ถูกต้อง (action/สถานะ/ผู้รับผิดชอบ/จำนวนใบงาน)"""
+
+
+def max_tickets():
+    return getattr(settings, "HELPDESK_BULK_MAX_TICKETS", 500)
+
+
+def _parse_ids(ids):
+    parsed = []
+    for value in ids:
+        try:
+            parsed.append(int(value))
+        except (TypeError, ValueError):
+            raise BulkError(f"เลขใบงานไม่ถูกต้อง: {value}")
+    parsed = list(dict.fromkeys(parsed))
+    if not parsed:
+        raise BulkError("ยังไม่ได้เลือกใบงาน")
+    if len(parsed) > max_tickets():
+        raise BulkError(f"เลือกได้ไม่เกิน {max_tickets()} ใบงานต่อครั้ง")
+    return parsed
+
+
+def _check(action, user, status, assignee_id):
+    """ข้อความเหตุผลถ้าทำกับใบงานนี้ไม่ได้ (None = ทำได้)"""
+    if status in CLOSED_CODES:
+        return "ใบงานปิดแล้ว"
+    mine = assignee_id == user.pk or user.is_superuser
+    if action == "claim":
+        if assignee_id and not mine:
+            return "มีผู้รับผิดชอบแล้ว"
+    elif not mine:
+        # ปิดงาน/เปลี่ยนสถานะ/มอบหมายต่อ: เฉพาะผู้รับผิดชอบ (หรือ superuser)
+        return "เฉพาะผู้รับผิดชอบงานเท่านั้น"
+    return None
+
+
+def apply(user, action, ids, status=None, assignee=None, comment=""):
+    """
+    ทำ action กับใบงาน ids คืน [BulkResult] ตามลำดับ ids
+
+    - claim: มอบหมายให้ตัวเอง + กำลังดำเนินการ
+    - close: ปิดงาน (comment ถ้ามี บันทึกเป็นคอมเมนต์ของทุกใบ)
+    - status: ตั้งสถานะ status (ยกเว้นปิดงาน)
+    - assign: มอบหมายให้ assignee (ต้องเป็น IT)
+    """
+    if not roles.is_it_staff(user):
+        raise BulkError("เฉพาะเจ้าหน้าที่ IT เท่านั้น")
+    if action not in ACTIONS:
+        raise BulkError(f"ไม่รู้จักคำสั่ง: {action}")
+    ids = _parse_ids(ids)
+
+    now = timezone.now()
+    changes = {"updated_at": now}
+    if action == "claim":
+        changes.update(assignee=user, status="in_progress")
+    elif action == "close":
+        changes["status"] = "closed"
+    elif action == "status":
+        if status not in SETTABLE_STATUSES:
+            raise BulkError("สถานะไม่ถูกต้อง")
+        changes["status"] = status
+    elif action == "assign":
+        if assignee is None or not roles.is_it_staff(assignee):
+            raise BulkError("ผู้รับผิดชอบต้องเป็นพนักงาน IT เท่านั้น")
+        changes["assignee"] = assignee
+    comment = (comment or "").strip()
+
+    with transaction.atomic():
+        # query เดียว: สถานะ/ผู้รับผิดชอบ/เวลา SLA ของทุกใบที่เลือก (ล็อกไว้จนจบ transaction)
+        rows = {
+            pk: (status_, assignee_id, created_at, requester_id, dict(zip(sla.SLA_FIELDS, times)))
+            for pk, status_, assignee_id, created_at, requester_id, *times in (
+                Ticket.objects.select_for_update()
+                .filter(id__in=ids)
+                .values_list("id", "status", "assignee_id", "created_at", "requester_id", *sla.SLA_FIELDS)
+            )
+        }
+
+        errors = {}
+        allowed = []
+        for pk in ids:
+            if pk not in rows:
+                errors[pk] = "ไม่พบใบงาน"
+                continue
+            errors[pk] = _check(action, user, rows[pk][0], rows[pk][1])
+            if errors[pk] is None:
+                allowed.append(pk)
+
+        # SQLite ไม่มี FOR UPDATE: ใบที่ถูกปิด/เปลี่ยนผู้รับผิดชอบหลังอ่าน rows ต้องไม่ถูกเขียนทับ
+        # → WHERE ซ้ำด้วยค่าที่ตรวจไว้ แล้วนับเฉพาะใบที่ UPDATE เปลี่ยนจริง
+        groups = defaultdict(list)
+        for pk in allowed:
+            groups[rows[pk][0], rows[pk][1]].append(pk)
+        for (status_, assignee_id), group in groups.items():
+            Ticket.objects.filter(id__in=group, status=status_, assignee_id=assignee_id).update(**changes)
+        if allowed:
+            changed = set(
+                Ticket.objects.filter(id__in=allowed, updated_at=now).values_list("id", flat=True)
+            )
+            for pk in allowed:
+                if pk not in changed:
+                    errors[pk] = CHANGED_MEANWHILE
+            allowed = [pk for pk in allowed if pk in changed]
+        results = [BulkResult(pk, errors[pk] is None, errors[pk]) for pk in ids]
+
+        if allowed:
+            # สถานะ/ผู้รับผิดชอบเดิมจาก rows (WHERE ยืนยันแล้วว่ายังเป็นค่านี้) → ค่าใหม่
+            new_status = changes.get("status")
+            new_assignee = changes["assignee"].pk if "assignee" in changes else None
+            transitions = [
+                (
+                    pk,
+                    (rows[pk][0], rows[pk][3], rows[pk][1]),
+                    (new_status or rows[pk][0], rows[pk][3], new_assignee or rows[pk][1]),
+                )
+                for pk in allowed
+            ]
+            counters.apply_deltas(counters.deltas((old, new) for _, old, new in transitions))
+
+            # ประวัติ + เวลา SLA: คำนวณต่อใบในหน่วยความจำ แล้ว bulk_create / bulk_update ทีเดียว
+            history = []
+            timed = []
+            sla_fields = set()
+            for pk, old, new in transitions:
+                ticket = Ticket(pk=pk, created_at=rows[pk][2], **rows[pk][4])
+                fields, events_ = sla.track(ticket, old, new, actor_id=user.pk, at=now)
+                history += events_
+                if fields:
+                    timed.append(ticket)
+                    sla_fields |= fields
+            TicketEvent.objects.bulk_create(history)
+            if timed:
+                Ticket.objects.bulk_update(timed, sorted(sla_fields))
+            if action == "close" and comment:
+                TicketComment.objects.bulk_create(
+                    [TicketComment(ticket_id=pk, author=user, body=comment) for pk in allowed]
+                )
+                search.index_tickets(allowed)
+
+            kind = {"claim": "claimed", "close": "closed"}.get(action, "updated")
+            if kind in notify.MESSAGES:
+                notify.enqueue(
+                    kind,
+                    Ticket.objects.filter(id__in=allowed).select_related("requester__profile").order_by("id"),
+                    actor=user, text=comment if action == "close" else "",
+                )
+            events.publish(
+                events.ticket_event(
+                    kind, pk, new_status or rows[pk][0], rows[pk][3],
+                    new_assignee or rows[pk][1], actor_id=user.pk,
+                )
+                for pk in allowed
+            )
+
+    if allowed:
+        years = {timezone.localdate().year}
+        years |= {timezone.localtime(rows[pk][2]).year for pk in allowed}
+        for year in years:
+            reports.invalidate_year(year)
+    return results
@@ -0,0 +1,163 @@
+# helpdesk/catalog.py — แคชรายการ Category/IssueType ในหน่วยความจำของ process
+#
+# ใช้โดย Ticket.save() (title/category จาก issue_type_id), TicketForm/TicketUpdateForm
+# (ตัวเลือก "งานที่แจ้ง" แบบ optgroup + HTML ที่ render ไว้แล้ว) และหัวแถวของรายงานรายปี
+# ทุก process ถือสำเนาของตัวเอง แล้วเทียบเวอร์ชันใน Django cache
+# → แก้ IssueType/Category (signal หลัง commit / admin) process ที่ใช้ cache ร่วมกันโหลดใหม่ในการเรียกครั้งถัดไป
+# เวอร์ชันหมดอายุใน HELPDESK_CATALOG_CACHE_TIMEOUT วินาที (ค่าเริ่มต้น 60) แล้วสุ่มใหม่
+# → cache แยกต่อ process (LocMemCache) ก็เห็นการแก้ไขของ process อื่นภายในเวลานี้
+
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+IssueEntry = namedtuple("IssueEntry", "id name category_id is_active")
+CategoryEntry = namedtuple("CategoryEntry", "id name")
+
+_VERSION_KEY = "helpdesk:catalog:version"
+
+_ISSUE_FIELDS = ("id", "name", "category_id", "is_active")
+
+
+class _Snapshot:
+    """ข้อมูล catalog ของเวอร์ชันหนึ่ง (สร้างครั้งเดียว แล้วอ่านอย่างเดียว)"""
+
+    def __init__(self, version):
+        from .models import Category, IssueType
+
+        self.version = version
+        self.categories = [
+            CategoryEntry(*row)
+            for row in Category.objects.order_by("name").values_list("id", "name")
+        ]
+        self.issues = {
+            row[0]: IssueEntry(*row)
+            for row in IssueType.objects.order_by().values_list(*_ISSUE_FIELDS)
+        }
+
+        # [(ชื่อหมวด, [IssueEntry ที่ active เรียงตามชื่อ])] เรียงตามชื่อหมวด
+        by_category = {}
+        for entry in sorted(self.issues.values(), key=lambda e: e.name):
+            if entry.is_active:
+                by_category.setdefault(entry.category_id, []).append(entry)
+        self.groups = [
+            (cat.name, by_category[cat.id]) for cat in self.categories if cat.id in by_category
+        ]
+
+        self.options_html = mark_safe("".join(
+            format_html(
+                '<optgroup label="{}">{}</optgroup>',
+                name,
+                format_html_join(
+                    "", '<option value="{}" data-category="{}">{}</option>',
+                    ((e.id, name, e.name) for e in entries),
+                ),
+            )
+            for name, entries in self.groups
+        ))
+
+
+# สำเนาใน process (สลับทั้งก้อนเมื่อเวอร์ชันเปลี่ยน → thread อื่นที่อ่านอยู่ยังเห็นชุดเดิมครบ)
+_local = {"snapshot": None}
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _timeout():
+    return getattr(settings, "HELPDESK_CATALOG_CACHE_TIMEOUT", 60)
+
+
+def version():
+    """เวอร์ชันของ catalog (เปลี่ยนทุกครั้งที่ IssueType/Category เปลี่ยน หรือครบเวลาแคช)"""
+    return cache.get_or_set(_VERSION_KEY, _new_version, timeout=_timeout())
+
+
+def invalidate():
+    """เรียกหลัง commit (transaction.on_commit) — ก่อนนั้นคนอื่นอาจโหลดแถวเก่ามาเก็บใต้เวอร์ชันใหม่"""
+    cache.set(_VERSION_KEY, _new_version(), timeout=_timeout())
+
+
+def _snapshot():
+    current = version()
+    snapshot = _local["snapshot"]
+    if snapshot is None or snapshot.version != current:
+        snapshot = _local["snapshot"] = _Snapshot(current)
+    return snapshot
+
+
+def issues():
+    """{id: IssueEntry} ของ IssueType ทั้งหมด (รวมที่ปิดใช้งาน)"""
+    return _snapshot().issues
+
+
+def categories():
+    """[CategoryEntry] ทุกหมวด เรียงตามชื่อ"""
+    return _snapshot().categories
+
+
+def issue_groups():
+    """[(ชื่อหมวด, [IssueEntry])] เฉพาะ IssueType ที่ active — ใช้ทำ optgroup"""
+    return _snapshot().groups
+
+
+def issue_choices():
+    """choices แบบ optgroup สำหรับ forms.Select"""
+    return [(name, [(e.id, e.name) for e in entries]) for name, entries in issue_groups()]
+
+
+def issue_options_html(selected=None):
+    """<optgroup>/<option> ของ IssueType ที่ active (render ไว้แล้ว แค่ใส่ selected ให้ตัวที่เลือก)"""
+    html = _snapshot().options_html
+    if selected not in (None, ""):
+        marker = format_html('<option value="{}"', selected)
+        html = mark_safe(html.replace(marker, marker + " selected", 1))
+    return html
+
+
+def issue_type(pk):
+    """IssueEntry ของ pk (None ถ้าไม่มีในฐานข้อมูล)"""
+    entry = issues().get(pk)
+    if entry is None:
+        # เพิ่งสร้างใน process อื่นแต่ยังไม่เห็นเวอร์ชันใหม่ → ถามฐานข้อมูลตรง ๆ
+        from .models import IssueType
+
+        row = IssueType.objects.filter(pk=pk).values_list(*_ISSUE_FIELDS).first()
+        entry = IssueEntry(*row) if row else None
+    return entry
+
+
+def issue_type_instance(entry):
+    """สร้าง IssueType จาก IssueEntry (เหมือนโหลดจากฐานข้อมูล แต่ไม่ query)"""
+    from .models import IssueType
+
+    return IssueType.from_db(DEFAULT_DB_ALIAS, list(_ISSUE_FIELDS), list(entry))
+
+
+def propagate_issue_type(issue_type_obj, category_changed=False):
+    """
+    ส่งชื่อ/หมวดใหม่ของ IssueType ไปยังใบงานทั้งหมดที่อ้างถึงด้วย UPDATE เดียว
+
+    .update() ไม่ส่ง signal → reindex ค้นหา และล้างแคชรายงานเอง (ถ้าหมวดเปลี่ยน)
+    updated_at ของใบงานไม่เปลี่ยน (ไม่ใช่การแก้ไขใบงาน)
+    """
+    from . import reports, search
+    from .models import Ticket
+
+    tickets = Ticket.objects.filter(issue_type_id=issue_type_obj.pk)
+    ids = list(tickets.values_list("id", flat=True))
+    if not ids:
+        return 0
+    tickets.update(title=issue_type_obj.name, category_id=issue_type_obj.category_id)
+
+    for i in range(0, len(ids), 1000):
+        search.index_tickets(ids[i:i + 1000])
+    if category_changed:
+        reports.invalidate_categories()
+    return len(ids)
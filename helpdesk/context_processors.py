@@ -1,21 +1,8 @@
-from django.contrib.auth import get_user_model
-from django.db.models import Q
-from .models import UserProfile
+from django.utils.functional import SimpleLazyObject
 
-User = get_user_model()
+from .roles import it_contact as _it_contact
 
-def it_contact(request):
-    # หา IT 1 คน (กรณีองค์กรมีคนเดียว)
-    it_user = (
-        User.objects.filter(is_active=True)
-        .filter(Q(is_superuser=True) | Q(groups__name__icontains="IT") | Q(user_permissions__codename="change_ticket"))
-        .distinct()
-        .first()
-    )
-
-    contact = ""
-    if it_user:
-        profile, _ = UserProfile.objects.get_or_create(user=it_user)
-        contact = profile.contact or ""
 
-    return {"IT_CONTACT": contact}
+def it_contact(request):
+    # อ่านค่าจริงเฉพาะเมื่อ template ใช้ {{ IT_CONTACT }} (หน้า login/PDF ไม่ต้องค้นเลย)
+    return {"IT_CONTACT": SimpleLazyObject(_it_contact)}
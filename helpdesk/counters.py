@@ -0,0 +1,176 @@
+# helpdesk/counters.py — ยอดนับใบงานสำหรับ dashboard (TicketCounter) อัปเดตทีละใบตอนบันทึก
+#
+# เก็บจำนวนใบงานแยกตาม (scope, user_id, status):
+#   all        user_id=0         ทุกใบงาน (By Status ของ IT)
+#   requester  user_id=ผู้แจ้ง     KPI "งานของฉัน" + By Status ของผู้ใช้ทั่วไป
+#   assignee   user_id=ผู้รับผิดชอบ KPI "มอบหมายให้ฉัน"
+#   self       user_id=ผู้แจ้ง     ใบที่ผู้แจ้งเป็นผู้รับผิดชอบเอง (กันนับซ้ำใน requester + assignee)
+#
+# Ticket.save / post_delete / bulk.apply / import_tickets เรียก record()/apply_deltas()
+# ใน transaction เดียวกับการเขียนใบงาน → dashboard ที่ไม่กรองอ่านแค่ไม่กี่แถว ไม่ว่าจะมีใบงานกี่ใบ
+# ยอดคลาดได้ถ้ามีการเขียนที่ไม่ผ่านทางนี้ (SQL ตรง, .update() ที่อื่น ฯลฯ)
+# → manage.py reconcile_counters (ตั้ง cron เป็นระยะ) นับใหม่จาก Ticket แล้วซ่อม
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Ticket, TicketCounter
+from .queries import CLOSED_CODES
+
+SCOPE_ALL = "all"
+SCOPE_REQUESTER = "requester"
+SCOPE_ASSIGNEE = "assignee"
+SCOPE_SELF = "self"
+
+# ฟิลด์ของ Ticket ที่กระทบยอดนับ (ชื่อตาม update_fields)
+COUNTED_FIELDS = {"status", "requester", "assignee"}
+
+
+def state(ticket):
+    """(status, requester_id, assignee_id) ของใบงาน — None = ยังไม่มี/ถูกลบ"""
+    return (ticket.status, ticket.requester_id, ticket.assignee_id)
+
+
+def _keys(ticket_state):
+    status, requester_id, assignee_id = ticket_state
+    yield (SCOPE_ALL, 0, status)
+    yield (SCOPE_REQUESTER, requester_id, status)
+    if assignee_id:
+        yield (SCOPE_ASSIGNEE, assignee_id, status)
+        if assignee_id == requester_id:
+            yield (SCOPE_SELF, requester_id, status)
+
+
+def deltas(changes):
+    """[(old, new), ...] → Counter {(scope, user_id, status): +/-n} (ตัดที่หักล้างกันหมดทิ้ง)"""
+    result = Counter()
+    for old, new in changes:
+        if old == new:
+            continue
+        if old is not None:
+            for key in _keys(old):
+                result[key] -= 1
+        if new is not None:
+            for key in _keys(new):
+                result[key] += 1
+    return {key: n for key, n in result.items() if n}
+
+
+def apply_deltas(changes):
+    """บวก/ลบยอดตาม deltas() (ต้องอยู่ใน transaction เดียวกับการเขียนใบงาน)"""
+    # เรียง key เสมอ → transaction ที่แก้หลายแถวพร้อมกันล็อกตามลำดับเดียวกัน ไม่ deadlock
+    for (scope, user_id, status), n in sorted(changes.items()):
+        rows = TicketCounter.objects.filter(scope=scope, user_id=user_id, status=status)
+        if rows.update(count=F("count") + n):
+            continue
+        if n < 0:
+            # ไม่มีแถวให้ลบ = ยอดคลาดอยู่แล้ว → ปล่อยให้ reconcile_counters ซ่อม
+            continue
+        try:
+            with transaction.atomic():
+                TicketCounter.objects.create(scope=scope, user_id=user_id, status=status, count=n)
+        except IntegrityError:
+            # อีก transaction สร้างแถวเดียวกันไปก่อน
+            rows.update(count=F("count") + n)
+
+
+def record(old, new):
+    apply_deltas(deltas([(old, new)]))
+
+
+def forget_user(user_id):
+    """
+    ลบแถวยอดนับของผู้ใช้ที่ถูกลบ
+
+    ใบที่เขาแจ้งถูกลบแบบ cascade (นับลดผ่าน post_delete แล้ว) แต่ใบที่เขารับผิดชอบถูก SET NULL
+    ด้วย UPDATE ตรง ไม่ผ่าน Ticket.save → ยอด assignee/self ของเขาค้าง — หลังลบไม่มีใบไหนอ้างถึงเขาแล้ว ลบได้ทุกแถว
+    """
+    TicketCounter.objects.filter(user_id=user_id).delete()
+
+
+# ---------- อ่าน (dashboard) ----------
+def dashboard_counts(user, is_it_staff):
+    """
+    KPI + By Status ของ dashboard แบบไม่กรอง จาก TicketCounter (query เดียว)
+
+    คืน {"my_open": n, "assigned_to_me": n, "by_status": {status: n}}
+    ผู้ใช้ทั่วไปเห็นใบที่ตัวเองแจ้ง หรือถูกมอบหมาย: requester + assignee - self
+    """
+    # user_id=0 มีแต่ scope all, user_id ของผู้ใช้มีแต่ requester/assignee/self → ค้นด้วย index (user_id, ...)
+    rows = TicketCounter.objects.filter(user_id__in=[0, user.pk]).values_list("scope", "status", "count")
+
+    mine = {scope: Counter() for scope in (SCOPE_ALL, SCOPE_REQUESTER, SCOPE_ASSIGNEE, SCOPE_SELF)}
+    for scope, status, count in rows:
+        mine[scope][status] += count
+
+    if is_it_staff:
+        by_status = mine[SCOPE_ALL]
+    else:
+        by_status = mine[SCOPE_REQUESTER] + mine[SCOPE_ASSIGNEE]
+        by_status.subtract(mine[SCOPE_SELF])
+
+    def open_total(counter):
+        return sum(n for status, n in counter.items() if status not in CLOSED_CODES)
+
+    return {
+        "my_open": open_total(mine[SCOPE_REQUESTER]),
+        "assigned_to_me": open_total(mine[SCOPE_ASSIGNEE]),
+        "by_status": {status: n for status, n in by_status.items() if n > 0},
+    }
+
+
+# ---------- ซ่อมยอด ----------
+def expected_counts(tickets=None):
+    """นับใหม่จาก Ticket ด้วย GROUP BY — {(scope, user_id, status): n}"""
+    tickets = (tickets if tickets is not None else Ticket.objects.all()).order_by()
+    counts = {}
+    for status, n in tickets.values_list("status").annotate(n=Count("id")):
+        counts[(SCOPE_ALL, 0, status)] = n
+    for user_id, status, n in tickets.values_list("requester_id", "status").annotate(n=Count("id")):
+        counts[(SCOPE_REQUESTER, user_id, status)] = n
+    assigned = tickets.filter(assignee__isnull=False)
+    for user_id, status, n in assigned.values_list("assignee_id", "status").annotate(n=Count("id")):
+        counts[(SCOPE_ASSIGNEE, user_id, status)] = n
+    own = assigned.filter(assignee_id=F("requester_id"))
+    for user_id, status, n in own.values_list("requester_id", "status").annotate(n=Count("id")):
+        counts[(SCOPE_SELF, user_id, status)] = n
+    return counts
+
+
+def reconcile(dry_run=False):
+    """
+    เทียบ TicketCounter กับยอดจริง แล้วแก้เฉพาะแถวที่ต่าง
+
+    คืน (จำนวนแถวที่ตรวจ, [(key, ยอดเดิม, ยอดจริง), ...])
+    ล็อกแถวยอดนับก่อนนับใหม่ → การบันทึกใบงานที่เกิดระหว่างนั้นรอจน reconcile เสร็จ
+    """
+    with transaction.atomic():
+        stored = {
+            (scope, user_id, status): (pk, count)
+            for pk, scope, user_id, status, count in TicketCounter.objects.select_for_update()
+            .values_list("id", "scope", "user_id", "status", "count")
+        }
+        expected = expected_counts()
+
+        drift = []
+        for key in stored.keys() | expected.keys():
+            have = stored[key][1] if key in stored else 0
+            want = expected.get(key, 0)
+            if have != want:
+                drift.append((key, have, want))
+        drift.sort()
+
+        if not dry_run and drift:
+            stale = [stored[key][0] for key, _, want in drift if key in stored and not want]
+            TicketCounter.objects.filter(id__in=stale).delete()
+            for key, have, want in drift:
+                if not want:
+                    continue
+                if key in stored:
+                    TicketCounter.objects.filter(id=stored[key][0]).update(count=want)
+                else:
+                    scope, user_id, status = key
+                    TicketCounter.objects.create(scope=scope, user_id=user_id, status=status, count=want)
+    return len(stored.keys() | expected.keys()), drift
@@ -0,0 +1,281 @@
+# helpdesk/events.py — เหตุการณ์ของใบงานแบบ real-time (Server-Sent Events)
+#
+# view เรียก publish_ticket() หลังบันทึก → ส่งจริงเมื่อ transaction commit
+# dashboard / ticket_detail เปิด EventSource ไปที่ event_stream แล้วอัปเดตเฉพาะส่วนที่เปลี่ยน
+#
+# ปิดไว้เป็นค่าเริ่มต้น — เปิดด้วย HELPDESK_EVENTS_ENABLED = True เฉพาะเมื่อรันแบบ ASGI (uvicorn/daphne ฯลฯ)
+#   ASGI: การเชื่อมต่อที่รออยู่เป็นแค่ coroutine + queue เล็ก ๆ ไม่กิน thread → process เดียวถือได้หลายพันการเชื่อมต่อ
+#   WSGI (gunicorn, api/index.py บน Vercel): StreamingHttpResponse รวบ async generator ทั้งก้อนก่อนส่ง
+#     → สตรีมไม่จบ ไม่ได้อะไรเลย และจอง worker ไว้ตลอด — ห้ามเปิด
+# ปิดอยู่: หน้าเว็บไม่เปิด EventSource, event_stream ตอบ 204 (EventSource หยุดต่อใหม่), publish ไม่ทำอะไร
+#
+# broker เลือกได้ใน settings (ค่าเริ่มต้น: ในหน่วยความจำของ process เดียว):
+#
+#   HELPDESK_EVENTS_BROKER = {
+#       "BACKEND": "helpdesk.events.RedisBroker",
+#       "OPTIONS": {"url": "redis://localhost:6379/0"},
+#   }
+#
+# รันหลาย process / หลายเครื่อง (เช่น uvicorn --workers N) ต้องใช้ RedisBroker:
+# InMemoryBroker เห็นเฉพาะเหตุการณ์ที่ publish ใน process เดียวกัน ที่เหลือหายหมด
+
+import asyncio
+import itertools
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+# Redis broker is optional - needs redis>=4.2 (redis.asyncio)
+try:
+    import redis
+    import redis.asyncio as redis_asyncio
+except ImportError:
+    redis = None
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = {
+    "created": "แจ้งงานใหม่",
+    "claimed": "รับงาน",
+    "updated": "แก้ไขใบงาน",
+    "commented": "คอมเมนต์ใหม่",
+    "closed": "ปิดงาน",
+}
+
+# ส่งให้ subscriber ที่อ่านไม่ทัน (queue เต็ม) → client โหลดข้อมูลใหม่ทั้งชุด
+RESYNC = object()
+
+_ids = itertools.count(1)
+
+
+def _setting(name, default):
+    return getattr(settings, f"HELPDESK_EVENTS_{name}", default)
+
+
+def enabled():
+    """เปิด real-time หรือไม่ (HELPDESK_EVENTS_ENABLED — เปิดเฉพาะเมื่อรันแบบ ASGI)"""
+    return bool(_setting("ENABLED", False))
+
+
+# ---------- subscriber ----------
+class Subscription:
+    """queue ของการเชื่อมต่อหนึ่ง ผูกกับ event loop ที่สร้าง (ส่งข้าม thread ได้)"""
+
+    def __init__(self, queue_size):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._lagged = False
+
+    def deliver(self, event):
+        """เรียกได้จากทุก thread (view แบบ sync อยู่ใน thread pool ของ ASGI)"""
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # loop ปิดไปแล้ว (การเชื่อมต่อจบระหว่างส่ง)
+            pass
+
+    def _put(self, event):
+        if self._lagged:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # client ช้า: ทิ้งเหตุการณ์ที่ค้าง แล้วบอกให้โหลดใหม่แทน
+            self._lagged = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESYNC)
+
+    async def get(self):
+        event = await self._queue.get()
+        if event is RESYNC:
+            self._lagged = False
+        return event
+
+
+# ---------- broker ----------
+class InMemoryBroker:
+    """กระจายเหตุการณ์ภายใน process เดียว (ค่าเริ่มต้น / ตัวแทนในการทดสอบ)"""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        self._fan_out(event)
+
+    def _fan_out(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    @asynccontextmanager
+    async def subscribe(self):
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+class RedisBroker(InMemoryBroker):
+    """
+    publish ผ่าน Redis pub/sub (หรือบริการที่รองรับโปรโตคอลเดียวกัน) ให้ทุก process เห็น
+
+    แต่ละ process/event loop ฟัง channel ด้วยการเชื่อมต่อ Redis เดียว แล้วกระจายต่อในหน่วยความจำ
+    → จำนวนการเชื่อมต่อ Redis ไม่ขึ้นกับจำนวน client
+    """
+
+    def __init__(self, url="redis://localhost:6379/0", channel="helpdesk:events", queue_size=100):
+        if redis is None:
+            from django.core.exceptions import ImproperlyConfigured
+
+            raise ImproperlyConfigured("RedisBroker ต้องติดตั้ง redis>=4.2")
+        super().__init__(queue_size=queue_size)
+        self.url = url
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._listeners = {}
+
+    def publish(self, event):
+        self._client.publish(self.channel, json.dumps(event))
+
+    async def _listen(self):
+        client = redis_asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    self._fan_out(json.loads(message["data"]))
+                except ValueError:
+                    logger.warning("ignored malformed event on %s", self.channel)
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+    @asynccontextmanager
+    async def subscribe(self):
+        loop = asyncio.get_running_loop()
+        task = self._listeners.get(loop)
+        if task is None or task.done():
+            self._listeners[loop] = loop.create_task(self._listen())
+        async with super().subscribe() as subscription:
+            yield subscription
+
+
+_broker = {"instance": None}
+
+
+def get_broker():
+    broker = _broker["instance"]
+    if broker is None:
+        config = _setting("BROKER", None) or {}
+        backend = import_string(config.get("BACKEND", "helpdesk.events.InMemoryBroker"))
+        broker = _broker["instance"] = backend(**config.get("OPTIONS", {}))
+    return broker
+
+
+def set_broker(broker):
+    """ใช้ broker อื่น (เช่น ตัวจำลองในการทดสอบ) — None = สร้างใหม่ตาม settings"""
+    _broker["instance"] = broker
+
+
+# ---------- publish ----------
+def ticket_event(kind, ticket_id, status, requester_id, assignee_id, actor_id=None, title=""):
+    from .models import Ticket
+
+    return {
+        "id": next(_ids),
+        "type": kind,
+        "label": EVENT_TYPES[kind],
+        "ticket": ticket_id,
+        "title": title,
+        "status": status,
+        "status_label": dict(Ticket.STATUS_CHOICES).get(status, status),
+        "requester": requester_id,
+        "assignee": assignee_id,
+        "actor": actor_id,
+        "at": timezone.now().isoformat(),
+    }
+
+
+def publish(events):
+    """ส่งเมื่อ transaction ปัจจุบัน commit แล้ว (rollback = ไม่ส่ง)"""
+    if not enabled():
+        return
+    events = list(events)
+    if not events:
+        return
+
+    def send():
+        broker = get_broker()
+        for event in events:
+            try:
+                broker.publish(event)
+            except Exception:
+                # ระบบแจ้งเตือนล่มต้องไม่ทำให้การบันทึกใบงานล้ม
+                logger.exception("cannot publish ticket event %s", event["type"])
+
+    transaction.on_commit(send)
+
+
+def publish_ticket(kind, ticket, actor=None):
+    publish([ticket_event(
+        kind, ticket.pk, ticket.status, ticket.requester_id, ticket.assignee_id,
+        actor_id=getattr(actor, "pk", None), title=ticket.title,
+    )])
+
+
+# ---------- stream ----------
+def visible(event, user_id, is_it_staff):
+    """กฎเดียวกับ can_view_ticket: IT หรือ requester หรือ assignee"""
+    return is_it_staff or user_id in (event.get("requester"), event.get("assignee"))
+
+
+def _format(event):
+    if event is RESYNC:
+        return "event: resync\ndata: {}\n\n"
+    return f"id: {event['id']}\nevent: ticket\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+async def stream(user_id, is_it_staff, ticket_id=None):
+    """
+    async generator ของข้อความ SSE สำหรับผู้ใช้คนหนึ่ง
+
+    ticket_id: เฉพาะเหตุการณ์ของใบงานนั้น (หน้า ticket_detail)
+    ไม่มีเหตุการณ์นาน HELPDESK_EVENTS_HEARTBEAT วินาที → ส่ง comment กัน proxy ตัดการเชื่อมต่อ
+    """
+    heartbeat = _setting("HEARTBEAT", 20)
+    yield f"retry: {_setting('RETRY_MS', 5000)}\n\n"
+    async with get_broker().subscribe() as subscription:
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if event is not RESYNC:
+                if ticket_id is not None and event.get("ticket") != ticket_id:
+                    continue
+                if not visible(event, user_id, is_it_staff):
+                    continue
+            yield _format(event)
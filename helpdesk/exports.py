@@ -0,0 +1,262 @@
+# helpdesk/exports.py — ส่งออกข้อมูลใบงาน (PDF / CSV / XLSX)
+#
+# PDF: เรียกตรงใน view (render_*) หรือเข้าคิวให้ worker ทำ (enqueue_*)
+#      ไฟล์จากคิวถูกใช้ซ้ำเมื่อ (ชนิด, ตัวกรอง, ขอบเขตผู้ใช้, เวอร์ชันข้อมูล) ตรงกัน
+# CSV/XLSX: อ่านทีละ chunk ด้วย .iterator() → ใช้หน่วยความจำคงที่ไม่ว่าจะกี่แถว
+
+import csv
+import os
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.template.loader import get_template
+from django.utils import timezone
+
+# PDF dependencies are optional - only needed for PDF export features
+try:
+    from xhtml2pdf import pisa
+    from xhtml2pdf.default import DEFAULT_FONT
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+    pisa = None
+    DEFAULT_FONT = None
+    pdfmetrics = None
+    TTFont = None
+
+# XLSX export is optional - needs openpyxl
+try:
+    from openpyxl import Workbook
+    XLSX_AVAILABLE = True
+except ImportError:
+    XLSX_AVAILABLE = False
+    Workbook = None
+
+from . import catalog, jobs, reports, roles
+from .filters import TicketFilter
+from .models import Ticket
+from .queries import list_scope, ticket_list_queryset, ticket_listing_queryset
+
+KIND_TICKET_LIST = "pdf.ticket_list"
+KIND_YEAR_SUMMARY = "pdf.year_summary"
+
+
+# ---------- render ----------
+def _font_path():
+    return os.path.join(settings.BASE_DIR, "static", "fonts", "THSarabunNew.ttf")
+
+
+def _register_thai_font():
+    # ===== REGISTER THAI FONT (ใช้ THSarabunNew) =====
+    font_path = _font_path()
+    if os.path.exists(font_path):
+        pdfmetrics.registerFont(TTFont("THSarabun", font_path))
+        DEFAULT_FONT["helvetica"] = "THSarabun"
+
+
+def render_pdf(template_name, context):
+    """render template เป็น PDF คืน bytes (JobError ถ้าสร้างไม่ได้)"""
+    if not PDF_AVAILABLE:
+        raise jobs.JobError("PDF export is not available. Missing required libraries (xhtml2pdf).")
+    _register_thai_font()
+    html = get_template(template_name).render(context)
+    dest = BytesIO()
+    pisa_status = pisa.CreatePDF(html, dest=dest)
+    if pisa_status.err:
+        raise jobs.JobError("เกิดข้อผิดพลาดในการสร้างไฟล์ PDF")
+    return dest.getvalue()
+
+
+def ticket_list_context(user, data):
+    """ข้อมูลของ PDF รายการใบงาน (ขอบเขตและตัวกรองเดียวกับหน้า ticket_list)"""
+    ticket_filter = TicketFilter(data)
+    qs = ticket_filter.apply(ticket_list_queryset(user))
+
+    # ✅ เรียงเก่าก่อน → ใหม่ (งานแรก → งานสุดท้าย)
+    qs = qs.order_by("created_at", "id")
+
+    tickets = list(ticket_listing_queryset(qs))
+    return {
+        "tickets": tickets,
+        "total": len(tickets),
+        **ticket_filter.as_context(),
+    }
+
+
+def render_ticket_list_pdf(user, data):
+    return render_pdf("helpdesk/ticket_list_pdf.html", ticket_list_context(user, data))
+
+
+def year_summary_context(user, year):
+    scope = reports.summary_scope(user, roles.is_it_staff(user))
+    return {
+        "year": year,
+        "th_sarabun_path": _font_path(),
+        **reports.build_year_summary(year, scope),
+    }
+
+
+def render_year_summary_pdf(user, year):
+    return render_pdf("helpdesk/ticket_report_pdf.html", year_summary_context(user, year))
+
+
+# ---------- ตาราง (CSV / XLSX) ----------
+TABLE_HEADERS = [
+    "เลขที่", "เรื่อง", "สถานะ", "หมวด", "ผู้แจ้ง", "ผู้รับผิดชอบ",
+    "เบอร์โทรหรือ Line ID", "สร้างเมื่อ", "อัปเดตล่าสุด",
+]
+
+_TABLE_COLUMNS = (
+    "id", "title", "status", "category__name",
+    "requester__first_name", "requester__last_name", "requester__username",
+    "assignee__first_name", "assignee__last_name", "assignee__username",
+    "contact", "created_at", "updated_at",
+)
+
+# จำนวนแถวที่ดึงจากฐานข้อมูลต่อครั้ง
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _person(first, last, username):
+    # เหมือน filter display_name: ชื่อ-นามสกุล ถ้าไม่มีใช้ username
+    return f"{first or ''} {last or ''}".strip() or (username or "")
+
+
+def _local(value):
+    return timezone.localtime(value).strftime("%d-%m-%Y %H:%M") if value else ""
+
+
+def ticket_rows(user, data):
+    """
+    แถวข้อมูลใบงานตามขอบเขต/ตัวกรองเดียวกับ ticket_list (generator)
+
+    ใช้ values_list (ไม่สร้าง model object) + .iterator(chunk_size) → หน่วยความจำคงที่
+    """
+    qs = TicketFilter(data).apply(ticket_list_queryset(user)).order_by("created_at", "id")
+    status_labels = dict(Ticket.STATUS_CHOICES)
+    for (
+        pk, title, status, category,
+        r_first, r_last, r_username,
+        a_first, a_last, a_username,
+        contact, created_at, updated_at,
+    ) in qs.values_list(*_TABLE_COLUMNS).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            pk,
+            title,
+            status_labels.get(status, status),
+            category or "",
+            _person(r_first, r_last, r_username),
+            _person(a_first, a_last, a_username) if a_username else "",
+            contact,
+            _local(created_at),
+            _local(updated_at),
+        ]
+
+
+# ข้อความที่ขึ้นต้นด้วยอักขระเหล่านี้ Excel/LibreOffice ตีความเป็นสูตร (CSV/formula injection)
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _safe_cell(value):
+    """ข้อความจากผู้ใช้ที่ดูเหมือนสูตร → นำหน้าด้วย ' ให้แสดงเป็นข้อความ"""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """file-like ที่คืนค่าที่เขียนกลับมาเลย (ให้ csv.writer ใช้กับ StreamingHttpResponse)"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(user, data):
+    """CSV ทีละบรรทัด (ขึ้นต้นด้วย BOM ให้ Excel อ่านภาษาไทยถูก)"""
+    writer = csv.writer(_Echo())
+    yield "\ufeff" + writer.writerow(TABLE_HEADERS)
+    for row in ticket_rows(user, data):
+        yield writer.writerow([_safe_cell(value) for value in row])
+
+
+def write_xlsx(user, data):
+    """
+    เขียน XLSX ด้วย openpyxl แบบ write-only ลงไฟล์ชั่วคราว แล้วคืน file object (seek 0 แล้ว)
+
+    write-only mode ไม่เก็บทั้งชีตไว้ในหน่วยความจำ แต่ไฟล์ zip ต้องเขียนให้ครบก่อนส่ง
+    ไฟล์ชั่วคราวถูกลบเองเมื่อปิด (FileResponse ปิดให้หลังส่งเสร็จ)
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Tickets")
+    ws.append(TABLE_HEADERS)
+    for row in ticket_rows(user, data):
+        ws.append([_safe_cell(value) for value in row])
+
+    fh = tempfile.TemporaryFile()
+    wb.save(fh)
+    fh.seek(0)
+    return fh
+
+
+# ---------- เวอร์ชันข้อมูล (ใช้เป็นส่วนหนึ่งของกุญแจไฟล์) ----------
+def ticket_list_version(user, data):
+    """
+    ลายนิ้วมือของชุดข้อมูลที่ตัวกรองนี้เห็น: เพิ่ม/ลบ/แก้ใบงานใด ๆ → ค่าเปลี่ยน
+
+    รวมเวอร์ชัน catalog ด้วย (เปลี่ยนชื่อ IssueType แก้ title ของใบงานโดยไม่แตะ updated_at)
+    """
+    qs = TicketFilter(data).apply(ticket_list_queryset(user))
+    agg = qs.order_by().aggregate(n=Count("id"), last_id=Max("id"), last_update=Max("updated_at"))
+    last_update = agg["last_update"].isoformat() if agg["last_update"] else ""
+    return f"{agg['n']}:{agg['last_id']}:{last_update}:{catalog.version()}"
+
+
+# ---------- คิว ----------
+def enqueue_ticket_list_pdf(user, data):
+    ticket_filter = TicketFilter(data)
+    scope = list_scope(user)
+    params = {"scope": scope, "filter": dict(ticket_filter.normalized())}
+    key = jobs.make_dedupe_key(
+        KIND_TICKET_LIST, scope, ticket_filter.normalized(), ticket_list_version(user, data)
+    )
+    return jobs.enqueue(KIND_TICKET_LIST, params, user=user, dedupe_key=key)
+
+
+def enqueue_year_summary_pdf(user, year):
+    scope = reports.summary_scope(user, roles.is_it_staff(user))
+    params = {"scope": scope, "year": year}
+    key = jobs.make_dedupe_key(KIND_YEAR_SUMMARY, scope, year, reports.data_version(year))
+    return jobs.enqueue(KIND_YEAR_SUMMARY, params, user=user, dedupe_key=key)
+
+
+def job_scope(user, job):
+    """ขอบเขตข้อมูลของผู้ใช้ ตามชนิดงาน (เทียบกับ params["scope"] ตอนเข้าคิว)"""
+    if job.kind == KIND_YEAR_SUMMARY:
+        return reports.summary_scope(user, roles.is_it_staff(user))
+    return list_scope(user)
+
+
+def can_access(user, job):
+    """ผู้ขอเอง หรือผู้ที่เห็นข้อมูลขอบเขตเดียวกัน (ไฟล์ถูกใช้ร่วมกันได้)"""
+    if job.requested_by_id == user.pk or user.is_superuser:
+        return True
+    return job.params.get("scope") == job_scope(user, job)
+
+
+@jobs.register(KIND_TICKET_LIST)
+def _ticket_list_pdf_job(job):
+    user = job.requested_by
+    context = ticket_list_context(user, job.params.get("filter", {}))
+    jobs.set_progress(job, 40)
+    return "tickets_filtered.pdf", render_pdf("helpdesk/ticket_list_pdf.html", context)
+
+
+@jobs.register(KIND_YEAR_SUMMARY)
+def _year_summary_pdf_job(job):
+    year = int(job.params["year"])
+    content = render_year_summary_pdf(job.requested_by, year)
+    return f"ticket_year_summary_{year}.pdf", content
@@ -0,0 +1,105 @@
+# helpdesk/filters.py — ตัวกรองรายการใบงาน (ใช้ร่วม dashboard / ticket_list / export)
+
+import datetime as dt
+import hashlib
+
+from django.utils.timezone import make_aware
+
+from . import search
+from .models import Ticket
+
+
+def _parse_date(s):
+    try:
+        return dt.datetime.strptime(s, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+class TicketFilter:
+    """
+    แปลงพารามิเตอร์ GET (q, status, date_from, date_to) ครั้งเดียว แล้วใช้ซ้ำได้ทุกที่
+
+    - ค่าที่ไม่ถูกต้อง (สถานะที่ไม่มีจริง, วันที่ผิดรูปแบบ/นอกช่วง) จะถูกตัดทิ้งและบันทึกไว้ใน errors
+    - apply() สร้างเงื่อนไขที่ใช้ index ได้ (เทียบช่วงเวลาตรง ๆ ไม่ครอบฟังก์ชันบนคอลัมน์)
+    - normalized() / cache_key() ใช้เป็นกุญแจแคช (ยอดนับ, ไฟล์ export)
+    """
+
+    PARAMS = ("q", "status", "date_from", "date_to")
+
+    # ฟิลด์เวลาที่ใช้กรองช่วงวันที่
+    date_field = "updated_at"
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.errors = {}
+
+        self.q = (data.get("q") or "").strip()
+
+        status = (data.get("status") or "").strip()
+        valid_statuses = {code for code, _ in Ticket.STATUS_CHOICES}
+        if status and status not in valid_statuses:
+            self.errors["status"] = status
+            status = ""
+        self.status = status
+
+        self.date_from = self._clean_date(data, "date_from")
+        self.date_to = self._clean_date(data, "date_to")
+
+    def _clean_date(self, data, name):
+        raw = (data.get(name) or "").strip()
+        if not raw:
+            return None
+        value = _parse_date(raw)
+        # วันแรก/วันสุดท้ายที่ date รองรับ: ขอบช่วงเวลา (วันถัดไป / แปลงเป็น UTC) เกินช่วงของ datetime
+        if value is None or value in (dt.date.min, dt.date.max):
+            self.errors[name] = raw
+            return None
+        return value
+
+    # ---------- ผลลัพธ์ ----------
+    @property
+    def is_filtered(self):
+        return bool(self.q or self.status or self.date_from or self.date_to)
+
+    def apply(self, qs):
+        """คืน queryset ที่กรองแล้ว (ไม่แตะ ordering)"""
+        if self.q:
+            # full-text index (ชื่อเรื่อง/รายละเอียด/คอมเมนต์) — ดู helpdesk/search.py
+            qs = search.filter_tickets(qs, self.q)
+
+        if self.status:
+            qs = qs.filter(status=self.status)
+
+        # ช่วงวันที่ (รวมปลายทางทั้งวัน): [date_from 00:00, date_to+1 00:00)
+        if self.date_from:
+            start = make_aware(dt.datetime.combine(self.date_from, dt.time.min))
+            qs = qs.filter(**{f"{self.date_field}__gte": start})
+        if self.date_to:
+            end = make_aware(
+                dt.datetime.combine(self.date_to + dt.timedelta(days=1), dt.time.min)
+            )
+            qs = qs.filter(**{f"{self.date_field}__lt": end})
+        return qs
+
+    def normalized(self):
+        """รูปแบบมาตรฐานของตัวกรอง (ค่าเดียวกัน → tuple เดียวกัน)"""
+        return (
+            ("q", self.q),
+            ("status", self.status),
+            ("date_from", self.date_from.isoformat() if self.date_from else ""),
+            ("date_to", self.date_to.isoformat() if self.date_to else ""),
+        )
+
+    def cache_key(self, prefix, scope):
+        """กุญแจแคชตาม (ชนิดข้อมูล, ขอบเขตผู้ใช้, ตัวกรอง)"""
+        raw = repr((scope, self.normalized())).encode("utf-8")
+        return f"helpdesk:{prefix}:{hashlib.sha1(raw).hexdigest()}"
+
+    def as_context(self):
+        """ค่าที่ template ใช้เติมฟอร์มตัวกรอง"""
+        normalized = dict(self.normalized())
+        return {
+            **normalized,
+            "status_choices": Ticket.STATUS_CHOICES,
+        }
@@ -1,8 +1,9 @@
 # helpdesk/forms.py
 from django import forms
 from django.contrib.auth import get_user_model
-from django.db.models import Q
-from .models import Ticket, TicketComment, IssueType, UserProfile
+from django.utils.choices import CallableChoiceIterator
+from .models import Ticket, TicketComment, UserProfile
+from . import catalog, roles
 
 HIDE_STATUS = {"closed"}
 User = get_user_model()
@@ -13,10 +14,50 @@ def _display_name(user):
     return full or getattr(user, "username", "") or str(user)
 
 
-class TicketForm(forms.ModelForm):
+class IssueTypeChoiceField(forms.ModelChoiceField):
+    """
+    เลือก IssueType ที่ active จาก catalog ในหน่วยความจำ (helpdesk/catalog.py)
+
+    ทั้งตอน render และตอนตรวจค่า ไม่ต้อง query IssueType/Category
+    """
+
+    def _catalog_choices(self):
+        return [("", self.empty_label)] + catalog.issue_choices()
+
+    def _get_choices(self):
+        # ประเมินตอน render (ไม่ใช่ตอนสร้างคลาสฟอร์ม/ฟอร์ม)
+        return CallableChoiceIterator(self._catalog_choices)
+
+    choices = property(_get_choices, forms.ChoiceField.choices.fset)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            entry = catalog.issue_type(int(value))
+        except (TypeError, ValueError):
+            entry = None
+        if entry is None or not entry.is_active:
+            raise forms.ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+        return catalog.issue_type_instance(entry)
+
+
+class IssueTypeOptionsMixin:
+    """ให้ template ใช้ {{ form.issue_type_options }} แทนการวน queryset + regroup"""
+
+    def issue_type_options(self):
+        return catalog.issue_options_html(self["issue_type"].value())
+
+
+class TicketForm(IssueTypeOptionsMixin, forms.ModelForm):
     class Meta:
         model = Ticket
         fields = ["issue_type", "contact", "description"]   # ✅ ไม่ใช้ title/category แล้ว
+        field_classes = {"issue_type": IssueTypeChoiceField}
         widgets = {
             "issue_type": forms.Select(attrs={"class": "form-select"}),
             "contact": forms.TextInput(attrs={"class": "form-control", "placeholder": "เบอร์โทรหรือ Line ID"}),
@@ -30,10 +71,9 @@ class TicketForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields["issue_type"].queryset = IssueType.objects.filter(is_active=True).select_related("category")
         self.fields["issue_type"].empty_label = "— เลือกงานที่ต้องการแจ้ง —"
 
-class TicketUpdateForm(forms.ModelForm):
+class TicketUpdateForm(IssueTypeOptionsMixin, forms.ModelForm):
     """ฟอร์มแก้ไข Ticket (ใช้โดย IT) + เพิ่มคอมเมนต์ในฟอร์มเดียว"""
 
     # ✅ ฟิลด์เพิ่มคอมเมนต์ (ไม่ได้อยู่ใน Model Ticket)
@@ -58,6 +98,7 @@ class TicketUpdateForm(forms.ModelForm):
             "status",
             "assignee",
         ]
+        field_classes = {"issue_type": IssueTypeChoiceField}
         widgets = {
             "issue_type": forms.Select(attrs={"class": "form-select"}),
             "contact": forms.TextInput(
@@ -79,11 +120,8 @@ class TicketUpdateForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self.fields["description"].required = False
 
-        # ✅ ให้รายการ issue เลือกได้เฉพาะ active
+        # ✅ ให้รายการ issue เลือกได้เฉพาะ active (IssueTypeChoiceField อ่านจาก catalog)
         if "issue_type" in self.fields:
-            self.fields["issue_type"].queryset = (
-                IssueType.objects.filter(is_active=True).select_related("category")
-            )
             self.fields["issue_type"].empty_label = "— เลือกงานที่แจ้ง —"
 
         # 1) ซ่อนสถานะที่ปิดงานแล้วออกจากดรอปดาวน์
@@ -95,23 +133,7 @@ class TicketUpdateForm(forms.ModelForm):
 
         # 2) ดรอปดาวน์ Assignee เฉพาะ IT
         if "assignee" in self.fields:
-            allowed_q = (
-                Q(is_superuser=True)
-                | Q(
-                    user_permissions__codename="change_ticket",
-                    user_permissions__content_type__app_label="helpdesk",
-                )
-                | Q(
-                    groups__permissions__codename="change_ticket",
-                    groups__permissions__content_type__app_label="helpdesk",
-                )
-            )
-            qs = (
-                User.objects.filter(is_active=True)
-                .filter(allowed_q)
-                .distinct()
-                .order_by("first_name", "last_name", "username")
-            )
+            qs = roles.it_staff_queryset()
             field = self.fields["assignee"]
             field.queryset = qs
             field.empty_label = "— เลือกผู้รับผิดชอบ —"
@@ -119,9 +141,7 @@ class TicketUpdateForm(forms.ModelForm):
 
     def clean_assignee(self):
         assignee = self.cleaned_data.get("assignee")
-        if assignee and not (
-            assignee.is_superuser or assignee.has_perm("helpdesk.change_ticket")
-        ):
+        if assignee and not roles.is_it_staff(assignee):
             raise forms.ValidationError("ผู้รับผิดชอบต้องเป็นพนักงาน IT เท่านั้น")
         return assignee
 
@@ -0,0 +1,185 @@
+# helpdesk/images.py — ประมวลผลรูปแนบของใบงาน (TicketImage)
+#
+#   - ย่อด้านยาวไม่เกิน HELPDESK_IMAGE_MAX_SIDE, หมุนตาม EXIF แล้วลบ EXIF ทิ้ง (GPS ฯลฯ)
+#   - บีบอัดเป็น WebP (หรือ JPEG ตาม HELPDESK_IMAGE_FORMAT) + สร้างรูปย่อสำหรับหน้ารายละเอียด
+#   - ไฟล์ที่ได้เก็บแบบ content-addressed (helpdesk/storage.py) และจำ sha256 ของต้นฉบับไว้
+#     → อัปโหลดรูปเดิมซ้ำ ไม่ต้องประมวลผลใหม่ และเก็บไฟล์ครั้งเดียว
+#   - อัปโหลดทีละน้อย ประมวลผลใน request เลย, ชุดใหญ่เก็บต้นฉบับไว้ก่อนแล้วให้ worker ทำ
+
+import hashlib
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import jobs
+from .models import TicketImage
+from .storage import media_storage
+
+logger = logging.getLogger(__name__)
+
+KIND_PROCESS_IMAGES = "images.process"
+
+# นามสกุล / content type ตามรูปแบบที่บันทึก
+_FORMATS = {
+    "WEBP": ("webp", {"quality": 80, "method": 4}),
+    "JPEG": ("jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def _setting(name, default):
+    return getattr(settings, f"HELPDESK_IMAGE_{name}", default)
+
+
+class ImageProcessingError(Exception):
+    """ไฟล์ไม่ใช่รูป หรือเปิดไม่ได้ (เก็บไฟล์ต้นฉบับไว้ตามเดิม)"""
+
+
+# ---------- แปลงรูป ----------
+def _encode(img, fmt):
+    ext, options = _FORMATS[fmt]
+    if fmt == "JPEG" and img.mode != "RGB":
+        img = img.convert("RGB")
+    elif img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+    out = BytesIO()
+    # ไม่ส่ง exif=... → ไม่มี metadata ติดไปกับไฟล์ใหม่
+    img.save(out, fmt, **options)
+    return ext, out.getvalue()
+
+
+def process_bytes(data):
+    """
+    คืน (นามสกุล, bytes รูปหลัก, bytes รูปย่อ)
+
+    ImageProcessingError ถ้าไม่ใช่รูปที่ Pillow อ่านได้ (รวมถึงรูปใหญ่ผิดปกติ/decompression bomb)
+    """
+    fmt = _setting("FORMAT", "WEBP").upper()
+    max_side = _setting("MAX_SIDE", 1920)
+    thumb_side = _setting("THUMB_SIDE", 320)
+    try:
+        with Image.open(BytesIO(data)) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            ext, main = _encode(img, fmt)
+
+            img.thumbnail((thumb_side, thumb_side), Image.Resampling.LANCZOS)
+            _, thumb = _encode(img, fmt)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as exc:
+        raise ImageProcessingError(str(exc)) from exc
+    return ext, main, thumb
+
+
+def _sha256(chunks):
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _apply(image, data):
+    """ประมวลผล data แล้วชี้ TicketImage ไปที่ไฟล์ใหม่ (ยังไม่ save)"""
+    ext, main, thumb = process_bytes(data)
+    storage = media_storage()
+    image.image.name, _, _ = storage.save_content(main, "ticket_images", f".{ext}")
+    image.thumbnail.name, _, _ = storage.save_content(thumb, "ticket_images/thumbs", f".{ext}")
+    image.is_processed = True
+
+
+def _processed_twin(sha256):
+    """TicketImage ที่ประมวลผลแล้วจากไฟล์ต้นฉบับเดียวกัน (ถ้ามี)"""
+    return (
+        TicketImage.objects.filter(sha256=sha256, is_processed=True)
+        .only("image", "thumbnail")
+        .first()
+    )
+
+
+def _reuse(image, twin):
+    image.image.name = twin.image.name
+    image.thumbnail.name = twin.thumbnail.name
+    image.is_processed = True
+
+
+# ---------- ฝั่ง view ----------
+def attach_images(ticket, files, user=None):
+    """
+    บันทึกรูปที่อัปโหลดกับใบงาน คืน list ของ TicketImage
+
+    - ไฟล์ซ้ำกับที่เคยประมวลผลแล้ว → ใช้ไฟล์เดิม ไม่เขียนใหม่
+    - ไม่เกิน HELPDESK_IMAGE_INLINE_COUNT ไฟล์และรวมไม่เกิน HELPDESK_IMAGE_INLINE_BYTES
+      → ประมวลผลเลย, มากกว่านั้น → เก็บต้นฉบับแล้วเข้าคิวให้ run_worker ทำ
+    """
+    files = list(files)
+    inline = (
+        len(files) <= _setting("INLINE_COUNT", 3)
+        and sum(f.size or 0 for f in files) <= _setting("INLINE_BYTES", 8 * 1024 * 1024)
+    )
+
+    created = []
+    deferred = []
+    for f in files:
+        image = TicketImage(ticket=ticket, sha256=_sha256(f.chunks()))
+        twin = _processed_twin(image.sha256)
+        if twin is not None:
+            _reuse(image, twin)
+        elif inline:
+            try:
+                f.seek(0)
+                _apply(image, f.read())
+            except ImageProcessingError:
+                logger.warning("ticket %s: cannot process image %s", ticket.pk, f.name)
+        if not image.is_processed:
+            # ต้นฉบับตามเดิม (upload_to) → worker ประมวลผลทีหลัง หรือคงไว้ถ้าไม่ใช่รูป
+            f.seek(0)
+            image.image = f
+        image.save()
+        created.append(image)
+        if not image.is_processed and not inline:
+            deferred.append(image.pk)
+
+    if deferred:
+        jobs.enqueue(
+            KIND_PROCESS_IMAGES, {"ids": deferred}, user=user,
+            dedupe_key=jobs.make_dedupe_key(KIND_PROCESS_IMAGES, deferred),
+        )
+    return created
+
+
+# ---------- ฝั่ง worker ----------
+def process_image(image):
+    """ประมวลผล TicketImage ที่เก็บต้นฉบับไว้ แล้วลบต้นฉบับ (คืน True ถ้าสำเร็จ)"""
+    if image.is_processed:
+        return True
+    original = image.image.name
+    if not image.sha256:
+        with image.image.open("rb") as fh:
+            image.sha256 = _sha256(fh.chunks())
+
+    twin = _processed_twin(image.sha256)
+    if twin is not None:
+        _reuse(image, twin)
+    else:
+        with image.image.open("rb") as fh:
+            data = fh.read()
+        try:
+            _apply(image, data)
+        except ImageProcessingError:
+            logger.warning("image %s: cannot process %s", image.pk, original)
+            return False
+
+    image.save(update_fields=["image", "thumbnail", "sha256", "is_processed"])
+    if original != image.image.name:
+        media_storage().delete(original)
+    return True
+
+
+@jobs.register(KIND_PROCESS_IMAGES)
+def _process_images_job(job):
+    ids = job.params.get("ids", [])
+    images = TicketImage.objects.filter(id__in=ids, is_processed=False)
+    for done, image in enumerate(images, start=1):
+        process_image(image)
+        jobs.set_progress(job, done * 100 // max(len(ids), 1))
+    return None
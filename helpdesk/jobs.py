@@ -0,0 +1,165 @@
+# helpdesk/jobs.py — คิวงานเบื้องหลังในฐานข้อมูล (BackgroundJob)
+#
+#   1) view เรียก enqueue(kind, params, user, dedupe_key) แล้วตอบกลับทันที
+#   2) manage.py run_worker หยิบงานทีละชิ้น (claim_next) แล้วเรียก handler ตาม kind
+#   3) ผู้ใช้ถามสถานะ/ดาวน์โหลดไฟล์ผลลัพธ์จาก BackgroundJob.result_file
+#
+# handler ลงทะเบียนด้วย @register("ชื่อชนิด") รับ job คืน (ชื่อไฟล์, bytes)
+# หรือ None ถ้างานไม่มีไฟล์ผลลัพธ์ (เช่น ประมวลผลรูปแนบ)
+# และรายงานความคืบหน้าได้ด้วย set_progress(job, 0-100)
+
+import datetime as dt
+import hashlib
+import logging
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+_HANDLERS = {}
+
+# งาน running ที่ไม่ขยับเกินเวลานี้ถือว่า worker ตายกลางทาง → คืนเข้าคิว
+STALE_AFTER = dt.timedelta(minutes=15)
+MAX_ATTEMPTS = 3
+
+
+class JobError(Exception):
+    """ข้อผิดพลาดที่คาดไว้ (แสดงข้อความให้ผู้ใช้ได้ ไม่ต้องลองใหม่)"""
+
+
+def register(kind):
+    def decorator(func):
+        _HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def get_handler(kind):
+    return _HANDLERS.get(kind)
+
+
+def make_dedupe_key(*parts):
+    """กุญแจของผลลัพธ์ (ส่วนประกอบเดียวกัน → ไฟล์เดียวกัน)"""
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+
+# ---------- ฝั่ง view ----------
+def enqueue(kind, params=None, user=None, dedupe_key=""):
+    """
+    เข้าคิวงานใหม่ หรือคืนงานเดิมที่ได้ผลลัพธ์เดียวกัน (dedupe_key ตรงกัน)
+
+    - มีไฟล์ที่สร้างเสร็จแล้ว → คืนงานนั้น (ไม่ต้องสร้างซ้ำ)
+    - มีงานเดียวกันรอคิว/กำลังทำ → คืนงานนั้น (ไม่เข้าคิวซ้ำ)
+    """
+    if kind not in _HANDLERS:
+        raise JobError(f"ไม่รู้จักงานชนิด {kind}")
+
+    if dedupe_key:
+        existing = (
+            BackgroundJob.objects.filter(
+                kind=kind, dedupe_key=dedupe_key, status__in=("queued", "running", "done")
+            )
+            .order_by("-created_at")
+            .first()
+        )
+        if existing and (existing.status != "done" or _artifact_exists(existing)):
+            return existing
+
+    return BackgroundJob.objects.create(
+        kind=kind,
+        params=params or {},
+        requested_by=user if user is not None and user.is_authenticated else None,
+        dedupe_key=dedupe_key,
+    )
+
+
+def _artifact_exists(job):
+    if not job.result_file:
+        return False
+    try:
+        return job.result_file.storage.exists(job.result_file.name)
+    except Exception:
+        return False
+
+
+# ---------- ฝั่ง worker ----------
+def claim_next(kinds=None):
+    """
+    หยิบงานที่รอคิวเก่าสุด 1 งาน (ปลอดภัยเมื่อมี worker หลายตัว)
+
+    ใช้ UPDATE ... WHERE status='queued' แบบมีเงื่อนไข: ใครอัปเดตได้ 1 แถวคนนั้นได้งาน
+    (ใช้ได้ทั้ง SQLite และ PostgreSQL ไม่ต้องพึ่ง SELECT ... FOR UPDATE SKIP LOCKED)
+    """
+    queued = BackgroundJob.objects.filter(status="queued")
+    if kinds:
+        queued = queued.filter(kind__in=kinds)
+
+    for job_id in queued.order_by("created_at", "id").values_list("id", flat=True)[:10]:
+        now = timezone.now()
+        claimed = BackgroundJob.objects.filter(id=job_id, status="queued").update(
+            status="running", started_at=now, progress=0, attempts=F("attempts") + 1
+        )
+        if claimed:
+            return BackgroundJob.objects.get(id=job_id)
+    return None
+
+
+def set_progress(job, percent):
+    """บันทึกความคืบหน้า (0-100) — ใช้ .update() ไม่แตะฟิลด์อื่น"""
+    percent = max(0, min(100, int(percent)))
+    job.progress = percent
+    # started_at ใช้เป็น heartbeat ด้วย (กันโดนมองว่า stale)
+    job.started_at = timezone.now()
+    BackgroundJob.objects.filter(id=job.id).update(
+        progress=percent, started_at=job.started_at
+    )
+
+
+def run_job(job):
+    """เรียก handler ของงาน แล้วเก็บไฟล์ผลลัพธ์/ข้อผิดพลาด"""
+    handler = get_handler(job.kind)
+    try:
+        if handler is None:
+            raise JobError(f"ไม่รู้จักงานชนิด {job.kind}")
+        result = handler(job)
+    except Exception as exc:
+        expected = isinstance(exc, JobError)
+        if not expected:
+            # traceback ลง log เท่านั้น — job.error แสดงให้ผู้ใช้เห็น (export_status)
+            logger.exception("background job %s failed", job.pk)
+        retry = not expected and job.attempts < MAX_ATTEMPTS
+        job.status = "queued" if retry else "failed"
+        job.error = str(exc) if expected else f"เกิดข้อผิดพลาดในระบบ (งาน #{job.pk}) กรุณาติดต่อผู้ดูแล"
+        job.finished_at = None if retry else timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        return job
+
+    with transaction.atomic():
+        if result is not None:
+            filename, content = result
+            job.result_file.save(filename, ContentFile(content), save=False)
+            job.result_name = filename
+        job.status = "done"
+        job.progress = 100
+        job.error = ""
+        job.finished_at = timezone.now()
+        job.save(update_fields=[
+            "result_file", "result_name", "status", "progress", "error", "finished_at",
+        ])
+    return job
+
+
+def requeue_stale(older_than=STALE_AFTER):
+    """งาน running ที่ค้าง (worker ตาย) → คืนเข้าคิว หรือ failed ถ้าลองครบแล้ว"""
+    cutoff = timezone.now() - older_than
+    stale = BackgroundJob.objects.filter(status="running", started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status="failed", error="worker หยุดทำงานระหว่างประมวลผล", finished_at=timezone.now()
+    )
+    requeued = stale.update(status="queued")
+    return requeued, failed
@@ -0,0 +1,20 @@
+import datetime as dt
+
+from django.core.management.base import BaseCommand
+
+from helpdesk import uploads
+
+
+class Command(BaseCommand):
+    help = "ยกเลิกการอัปโหลดไฟล์แนบที่ค้าง (ไม่มี chunk ใหม่นานเกินกำหนด) และลบไฟล์ชั่วคราว — รันจาก cron"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours", type=float, default=None,
+            help="อายุสูงสุดของ session ที่ค้าง (ค่าเริ่มต้น HELPDESK_UPLOAD_SESSION_TTL_HOURS หรือ 24)",
+        )
+
+    def handle(self, *args, **options):
+        older_than = dt.timedelta(hours=options["hours"]) if options["hours"] else None
+        count = uploads.expire_stale(older_than)
+        self.stdout.write(self.style.SUCCESS(f"Done. Aborted {count} stale uploads."))
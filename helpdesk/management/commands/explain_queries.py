@@ -0,0 +1,175 @@
+import datetime as dt
+import random
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from helpdesk import notify, sla
+from helpdesk.filters import TicketFilter
+from helpdesk.models import Category, Ticket, TicketComment, TicketCounter
+from helpdesk.queries import order_open_first, ticket_listing_queryset
+from helpdesk.views import TICKET_LIST_PAGINATOR
+
+User = get_user_model()
+
+# บรรทัดใน plan ที่แปลว่าอ่านทั้งตาราง (SQLite / PostgreSQL) — ทุกตารางรวมตารางที่ JOIN
+_SQLITE_FULL_SCAN = re.compile(r"\bSCAN (\w+)(?!.*\bUSING\b)")
+_PG_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+# sort ชั่วคราว (อ่านทุกแถวที่ตรงก่อนได้แถวแรก): SQLite "USE TEMP B-TREE FOR ORDER BY" / PostgreSQL "Sort"
+_SQLITE_TEMP_SORT = re.compile(r"USE TEMP B-TREE FOR ([A-Z ]+)")
+_PG_SORT = re.compile(r"^[\s>-]*(Sort|Incremental Sort)\b", re.MULTILINE)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN queryset ของแต่ละหน้า (dashboard, ticket_list, รายงานปี ฯลฯ) "
+        "แล้วแจ้งเตือนถ้ามี sequential scan หรือ sort ชั่วคราว — ใช้ --seed เพื่อจำลองข้อมูลจำนวนมาก (rollback ทิ้งเสมอ)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="จำนวน Ticket ที่จะสร้างชั่วคราวก่อน EXPLAIN (ข้อมูลถูก rollback หลังจบ)",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        flagged = []
+        try:
+            with transaction.atomic():
+                if options["seed"]:
+                    self._seed(options["seed"], options["batch_size"])
+                flagged = self._explain_all(options["verbosity"])
+                if options["seed"]:
+                    # ข้อมูลจำลองไม่ต้องเก็บไว้
+                    raise _Rollback()
+        except _Rollback:
+            pass
+
+        if flagged:
+            self.stdout.write(self.style.WARNING(
+                f"พบ sequential scan / sort ชั่วคราว {len(flagged)} query: " + ", ".join(flagged)
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("ไม่พบ sequential scan หรือ sort ชั่วคราว"))
+
+    # ---------- ข้อมูลจำลอง ----------
+    def _seed(self, total, batch_size):
+        users = [
+            User(username=f"_explain_user_{i}") for i in range(50)
+        ]
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__startswith="_explain_user_"))
+
+        categories = [Category(name=f"_explain_cat_{i}") for i in range(40)]
+        Category.objects.bulk_create(categories)
+        categories = list(Category.objects.filter(name__startswith="_explain_cat_"))
+
+        statuses = [code for code, _ in Ticket.STATUS_CHOICES]
+        now = timezone.now()
+        rnd = random.Random(42)
+
+        created = 0
+        while created < total:
+            n = min(batch_size, total - created)
+            batch = Ticket.objects.bulk_create([
+                Ticket(
+                    title=f"seed #{created + i}",
+                    status=rnd.choice(statuses),
+                    category=rnd.choice(categories),
+                    requester=rnd.choice(users),
+                    assignee=rnd.choice(users) if rnd.random() < 0.7 else None,
+                )
+                for i in range(n)
+            ])
+            # bulk_create ใส่ created_at = now ให้ทุกแถว → กระจายย้อนหลังหลายปี
+            for t in batch:
+                t.created_at = t.updated_at = now - dt.timedelta(minutes=rnd.randint(0, 3 * 365 * 24 * 60))
+            Ticket.objects.bulk_update(batch, ["created_at", "updated_at"], batch_size=500)
+            created += n
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.stdout.write(f"สร้างข้อมูลจำลอง {total} ใบงานแล้ว (จะถูก rollback)")
+
+    # ---------- EXPLAIN ----------
+    def _listing(self, name, qs, sort_ok=False):
+        """หน้าแรกของรายการแบบงานเปิดก่อน: 1 query ต่อกลุ่ม (งานเปิด / งานปิด) ตาม PartitionedKeysetPaginator"""
+        labels = {0: "งานเปิด", 1: "งานปิด"}
+        return [
+            (f"{name}: {labels.get(key, key)}", part, sort_ok)
+            for key, part in TICKET_LIST_PAGINATOR.partition_querysets(
+                ticket_listing_queryset(order_open_first(qs))
+            )
+        ]
+
+    def _querysets(self):
+        """
+        queryset เดียวกับที่ view ใช้จริง (ตัดให้เหลือหน้าแรก): (ชื่อ, queryset[, sort ได้])
+
+        sort ได้ = query ที่ต้อง GROUP BY / เรียงแถวที่ index กรองมาให้แล้ว (จำนวนจำกัด) — ไม่นับเป็นปัญหา
+        """
+        user = User.objects.order_by("id").first()
+        user_id = user.pk if user else 0
+        year = timezone.localdate().year
+        filtered = TicketFilter({
+            "status": "open",
+            "date_from": f"{year}-01-01",
+            "date_to": f"{year}-12-31",
+        })
+        return [
+            *self._listing("ticket_list (IT)", Ticket.objects.all()),
+            *self._listing("ticket_list (ผู้ใช้)", Ticket.objects.filter(requester_id=user_id)),
+            *self._listing("ticket_list (status + ช่วงวันที่)", filtered.apply(Ticket.objects.all())),
+            # requester OR assignee = 2 index → เรียงเฉพาะใบงานของผู้ใช้คนนี้
+            *self._listing(
+                "dashboard: รายการล่าสุด (ผู้ใช้)",
+                Ticket.objects.filter(Q(requester_id=user_id) | Q(assignee_id=user_id)),
+                sort_ok=True,
+            ),
+            ("dashboard: ยอดนับ (TicketCounter)",
+             TicketCounter.objects.filter(user_id__in=[0, user_id])),
+            ("dashboard: by_status (ผู้ใช้ + ตัวกรอง)",
+             filtered.apply(Ticket.objects.filter(Q(requester_id=user_id) | Q(assignee_id=user_id)))
+             .values("status").annotate(c=Count("id")).order_by(), True),
+            # เฉพาะใบที่เพิ่งถึงเกณฑ์ (partial index) เรียงตาม due_at
+            ("run_sla_scanner: ใบงานใกล้/เลยกำหนด",
+             sla.due_queryset(timezone.now()).order_by("due_at")[:500], True),
+            ("run_notifier: ผู้รับที่มีข้อความถึงเวลาส่ง",
+             notify.due_recipients(timezone.now())[:100], True),
+            ("รายงานรายปี",
+             Ticket.objects.filter(created_at__year=year)
+             .annotate(month=TruncMonth("created_at"))
+             .values("month", "category_id").annotate(c=Count("id")).order_by(), True),
+            ("ticket_detail: คอมเมนต์",
+             TicketComment.objects.filter(ticket_id=1).order_by("created_at")),
+        ]
+
+    def _explain_all(self, verbosity):
+        flagged = []
+        for name, qs, *sort_ok in self._querysets():
+            plan = qs.explain()
+            scans = sorted(set(_SQLITE_FULL_SCAN.findall(plan)) | set(_PG_SEQ_SCAN.findall(plan)))
+            sorts = sorted(
+                {f"sort ({m.strip().lower()})" for m in _SQLITE_TEMP_SORT.findall(plan)}
+                | {"sort" for _ in _PG_SORT.findall(plan)}
+            )
+            bad = scans + ([] if sort_ok and sort_ok[0] else sorts)
+            if bad:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(f"[SEQ SCAN/SORT] {name}: {', '.join(bad)}"))
+            else:
+                self.stdout.write(f"[ok] {name}")
+            if bad or verbosity > 1:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+        return flagged
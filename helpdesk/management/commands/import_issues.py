@@ -1,58 +1,203 @@
-from django.core.management.base import BaseCommand
-from openpyxl import load_workbook
+import csv
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from helpdesk import catalog, reports
 from helpdesk.models import Category, IssueType
 
+# openpyxl จำเป็นเฉพาะไฟล์ .xlsx (ไฟล์ .csv ไม่ต้องใช้)
+try:
+    from openpyxl import load_workbook
+except ImportError:
+    load_workbook = None
+
+
+def _clean(value):
+    return str(value).strip() if value is not None else ""
+
+
+def _iter_xlsx(path):
+    # read_only: อ่านทีละแถวแบบ streaming ไม่โหลดทั้ง workbook เข้าหน่วยความจำ
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in wb.active.iter_rows(values_only=True):
+            yield row
+    finally:
+        wb.close()
+
+
+def _iter_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        yield from csv.reader(fh)
+
+
 class Command(BaseCommand):
-    help = "Import IssueType from Excel with columns: Category, Issue"
+    help = (
+        "Import IssueType from Excel/CSV with columns: Category, Issue "
+        "(ทั้งไฟล์ใน transaction เดียว, ใช้ --dry-run เพื่อดูผลต่างก่อน)"
+    )
 
     def add_arguments(self, parser):
-        parser.add_argument("xlsx_path", type=str)
+        parser.add_argument("xlsx_path", type=str, help="ไฟล์ .xlsx หรือ .csv")
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="แสดงรายการที่จะเปลี่ยนแปลงโดยไม่บันทึก",
+        )
+        parser.add_argument(
+            "--deactivate-missing", action="store_true",
+            help="ปิดใช้งาน (is_active=False) IssueType ที่ไม่มีในไฟล์",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
 
     def handle(self, *args, **options):
+        started = time.monotonic()
         path = options["xlsx_path"]
-        wb = load_workbook(path)
-        ws = wb.active
+        rows = self._read(path)
+
+        plan = self._plan(rows, options["deactivate_missing"])
+        self._report(plan, options["verbosity"])
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run — ไม่มีการบันทึกข้อมูล"))
+            return
+
+        self._apply(plan, options["batch_size"])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Category created: {len(plan['new_categories'])}, "
+            f"Issue created: {len(plan['new_issues'])}, "
+            f"Issue re-activated: {len(plan['reactivate'])}, "
+            f"Issue deactivated: {len(plan['deactivate'])} "
+            f"({len(rows)} rows in {elapsed:.1f}s)"
+        ))
+
+    # ---------- อ่านไฟล์ ----------
+    def _read(self, path):
+        """คืน [(category, issue), ...] ไม่ซ้ำ ตามลำดับในไฟล์"""
+        if not os.path.exists(path):
+            raise CommandError(f"ไม่พบไฟล์ {path}")
+        if path.lower().endswith(".csv"):
+            reader = _iter_csv(path)
+        elif load_workbook is None:
+            raise CommandError("อ่านไฟล์ .xlsx ต้องติดตั้ง openpyxl (หรือใช้ไฟล์ .csv)")
+        else:
+            reader = _iter_xlsx(path)
 
         # หา header
-        headers = [str(c.value).strip() if c.value else "" for c in next(ws.iter_rows(min_row=1, max_row=1))]
+        headers = [_clean(h) for h in next(reader, [])]
         try:
             idx_cat = headers.index("Category")
             idx_issue = headers.index("Issue")
         except ValueError:
-            self.stderr.write("Excel ต้องมีคอลัมน์ชื่อ 'Category' และ 'Issue'")
-            return
+            raise CommandError("ไฟล์ต้องมีคอลัมน์ชื่อ 'Category' และ 'Issue'")
 
-        created_cat = 0
-        created_issue = 0
-        updated_issue = 0
+        rows = {}
+        width = max(idx_cat, idx_issue) + 1
+        for row in reader:
+            if len(row) < width:
+                continue
+            cat_name = _clean(row[idx_cat])
+            issue_name = _clean(row[idx_issue])
+            if not cat_name or not issue_name:
+                continue
+            rows[(cat_name, issue_name)] = None
+        return list(rows)
 
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            cat_name = (row[idx_cat] or "")
-            issue_name = (row[idx_issue] or "")
-            cat_name = str(cat_name).strip()
-            issue_name = str(issue_name).strip()
+    # ---------- เทียบกับฐานข้อมูล ----------
+    def _plan(self, rows, deactivate_missing):
+        """preload หมวด/IssueType ที่มีอยู่ (2 query) แล้วคำนวณผลต่างในหน่วยความจำ"""
+        categories = dict(Category.objects.values_list("name", "id"))
+        issues = {
+            (cat_id, name): (pk, is_active)
+            for pk, cat_id, name, is_active in IssueType.objects.values_list(
+                "id", "category_id", "name", "is_active"
+            )
+        }
 
-            if not cat_name or not issue_name:
+        new_categories = {}
+        new_issues = []
+        reactivate = []
+        seen_issue_ids = set()
+        for cat_name, issue_name in rows:
+            cat_id = categories.get(cat_name)
+            if cat_id is None:
+                new_categories[cat_name] = None
+                new_issues.append((cat_name, issue_name))
+                continue
+            existing = issues.get((cat_id, issue_name))
+            if existing is None:
+                new_issues.append((cat_name, issue_name))
                 continue
+            pk, is_active = existing
+            seen_issue_ids.add(pk)
+            if not is_active:
+                reactivate.append((pk, cat_name, issue_name))
 
-            cat_obj, cat_created = Category.objects.get_or_create(name=cat_name)
-            if cat_created:
-                created_cat += 1
+        deactivate = []
+        if deactivate_missing:
+            names = {cat_id: name for name, cat_id in categories.items()}
+            deactivate = [
+                (pk, names.get(cat_id, ""), name)
+                for (cat_id, name), (pk, is_active) in issues.items()
+                if is_active and pk not in seen_issue_ids
+            ]
 
-            obj, created = IssueType.objects.get_or_create(
-                name=issue_name,
-                category=cat_obj,
-                defaults={"is_active": True},
+        return {
+            "new_categories": list(new_categories),
+            "new_issues": new_issues,
+            "reactivate": reactivate,
+            "deactivate": deactivate,
+        }
+
+    def _report(self, plan, verbosity):
+        # verbosity 1: แสดงตัวอย่างหมวดละ 20 รายการ, verbosity 2: แสดงทั้งหมด
+        limit = None if verbosity > 1 else 20
+        sections = [
+            ("+ Category", [(name,) for name in plan["new_categories"]]),
+            ("+ Issue", plan["new_issues"]),
+            ("~ Re-activate", [(c, i) for _, c, i in plan["reactivate"]]),
+            ("- Deactivate", [(c, i) for _, c, i in plan["deactivate"]]),
+        ]
+        for label, items in sections:
+            if not items:
+                continue
+            self.stdout.write(f"{label}: {len(items)}")
+            for item in items[:limit]:
+                self.stdout.write("    " + " / ".join(item))
+            if limit is not None and len(items) > limit:
+                self.stdout.write(f"    ... และอีก {len(items) - limit} รายการ")
+
+    # ---------- บันทึก ----------
+    def _apply(self, plan, batch_size):
+        # ทั้งไฟล์สำเร็จหรือไม่บันทึกเลย (ไม่มีการ import ครึ่ง ๆ กลาง ๆ)
+        with transaction.atomic():
+            if plan["new_categories"]:
+                Category.objects.bulk_create(
+                    [Category(name=name) for name in plan["new_categories"]],
+                    batch_size=batch_size,
+                )
+            categories = dict(Category.objects.values_list("name", "id"))
+
+            IssueType.objects.bulk_create(
+                [
+                    IssueType(name=issue_name, category_id=categories[cat_name], is_active=True)
+                    for cat_name, issue_name in plan["new_issues"]
+                ],
+                batch_size=batch_size,
             )
-            if created:
-                created_issue += 1
-            else:
-                # ถ้ามีอยู่แล้วให้ ensure active
-                if not obj.is_active:
-                    obj.is_active = True
-                    obj.save(update_fields=["is_active"])
-                    updated_issue += 1
+            self._set_active([pk for pk, _, _ in plan["reactivate"]], True, batch_size)
+            self._set_active([pk for pk, _, _ in plan["deactivate"]], False, batch_size)
 
-        self.stdout.write(self.style.SUCCESS(
-            f"Done. Category created: {created_cat}, Issue created: {created_issue}, Issue re-activated: {updated_issue}"
-        ))
+        # bulk_create/update ไม่ส่ง signal → ล้างแคชเอง
+        catalog.invalidate()
+        if plan["new_categories"]:
+            reports.invalidate_categories()
+
+    @staticmethod
+    def _set_active(ids, is_active, batch_size):
+        # UPDATE ... WHERE id IN (...) ทีละ batch (ค่าเดียวกันทั้งชุด ไม่ต้องใช้ bulk_update)
+        for i in range(0, len(ids), batch_size):
+            IssueType.objects.filter(id__in=ids[i:i + batch_size]).update(is_active=is_active)
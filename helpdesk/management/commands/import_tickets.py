@@ -0,0 +1,314 @@
+import csv
+import datetime as dt
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from helpdesk import counters, reports, search, sla
+from helpdesk.models import Category, IssueType, Ticket, TicketComment, TicketEvent
+
+User = get_user_model()
+
+VALID_STATUSES = {code for code, _ in Ticket.STATUS_CHOICES}
+
+
+class RowError(Exception):
+    pass
+
+
+def _iter_jsonl(path):
+    with open(path, encoding="utf-8-sig") as fh:
+        for line_no, line in enumerate(fh, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as exc:
+                yield line_no, RowError(f"JSON ไม่ถูกต้อง: {exc}")
+
+
+def _iter_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        # บรรทัดที่ 1 เป็น header
+        for line_no, row in enumerate(csv.DictReader(fh), start=2):
+            yield line_no, row
+
+
+def _text(record, name):
+    value = record.get(name)
+    return str(value).strip() if value is not None else ""
+
+
+def _parse_dt(value, field):
+    if not value:
+        return None
+    value = str(value).strip()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise RowError(f"{field}: รูปแบบวันเวลาไม่ถูกต้อง ({value})")
+        parsed = dt.datetime.combine(day, dt.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+@contextmanager
+def _keep_timestamps(model, *field_names):
+    """
+    ปิด auto_now / auto_now_add ชั่วคราว ให้ bulk_create ใช้ค่าที่กำหนดเอง
+
+    (ไม่เช่นนั้น created_at/updated_at จะถูกทับเป็นเวลาปัจจุบัน แล้วต้อง bulk_update ซ้ำ
+    ซึ่งช้ามากเพราะสร้าง CASE WHEN ต่อแถว) — ใช้ในคำสั่ง manage.py เท่านั้น ไม่ใช่ใน view
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, (auto_now, auto_now_add) in zip(fields, saved):
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "นำเข้าใบงานย้อนหลังจำนวนมากจากไฟล์ JSONL หรือ CSV (bulk_create ทีละ batch, "
+        "คง created_at เดิมไว้) — JSONL ใส่คอมเมนต์ใน key \"comments\" ได้"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=str, help="ไฟล์ .jsonl หรือ .csv")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--create-users", action="store_true",
+            help="สร้างผู้ใช้ที่ไม่มีในระบบ (ตั้งรหัสผ่านใช้งานไม่ได้) แทนการข้ามแถว",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="ตรวจสอบข้อมูลทั้งไฟล์โดยไม่บันทึก",
+        )
+        parser.add_argument(
+            "--no-index", action="store_true",
+            help="ไม่อัปเดต search index ระหว่าง import (รัน rebuild_search_index ทีหลัง)",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"ไม่พบไฟล์ {path}")
+        if path.lower().endswith(".csv"):
+            records = _iter_csv(path)
+        elif path.lower().endswith((".jsonl", ".ndjson", ".json")):
+            records = _iter_jsonl(path)
+        else:
+            raise CommandError("รองรับเฉพาะไฟล์ .jsonl / .csv")
+
+        self.options = options
+        self._load_lookups()
+
+        started = time.monotonic()
+        imported = comments = skipped = 0
+        batch = []
+        years = set()
+
+        for line_no, record in records:
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                batch.append(self._build(record))
+            except RowError as exc:
+                skipped += 1
+                self.stderr.write(f"บรรทัด {line_no}: {exc}")
+                continue
+
+            if len(batch) >= options["batch_size"]:
+                n, c = self._flush(batch, years)
+                imported += n
+                comments += c
+                batch = []
+                self._progress(imported, started)
+
+        if batch:
+            n, c = self._flush(batch, years)
+            imported += n
+            comments += c
+
+        if not options["dry_run"]:
+            # bulk_create ไม่ส่ง signal → ล้างแคชรายงานของปีที่มีข้อมูลใหม่
+            for year in years:
+                reports.invalidate_year(year)
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. {verb} {imported} tickets, {comments} comments, skipped {skipped} rows "
+            f"in {elapsed:.1f}s ({imported / elapsed:,.0f} rows/sec)"
+        ))
+
+    # ---------- lookup ในหน่วยความจำ (โหลดครั้งเดียว) ----------
+    def _load_lookups(self):
+        self.users = dict(User.objects.values_list("username", "id"))
+        self.categories = dict(Category.objects.values_list("name", "id"))
+        self.category_names = {pk: name for name, pk in self.categories.items()}
+
+        # (หมวด, ชื่อ) → (id, category_id, name) และ ชื่อ → [...] (กรณีไม่ระบุหมวด)
+        self.issues = {}
+        self.issues_by_name = {}
+        for pk, name, cat_id in IssueType.objects.values_list("id", "name", "category_id"):
+            entry = (pk, cat_id, name)
+            self.issues[(self.category_names.get(cat_id), name)] = entry
+            self.issues_by_name.setdefault(name, []).append(entry)
+
+    def _user_id(self, username, field, required):
+        if not username:
+            if required:
+                raise RowError(f"ไม่ได้ระบุ {field}")
+            return None
+        user_id = self.users.get(username)
+        if user_id is None:
+            if not self.options["create_users"]:
+                raise RowError(f"{field}: ไม่พบผู้ใช้ {username} (ใช้ --create-users เพื่อสร้าง)")
+            if self.options["dry_run"]:
+                # ยังไม่สร้างจริง แต่ถือว่าผ่าน
+                return 0
+            user = User(username=username)
+            user.set_unusable_password()
+            user.save()
+            user_id = self.users[username] = user.pk
+        return user_id
+
+    def _issue(self, record):
+        """คืน (issue_type_id, category_id, title) — title/category มาจาก IssueType เหมือน Ticket.save()"""
+        issue_name = _text(record, "issue_type")
+        cat_name = _text(record, "category")
+        if issue_name:
+            if cat_name:
+                entry = self.issues.get((cat_name, issue_name))
+            else:
+                matches = self.issues_by_name.get(issue_name, [])
+                if len(matches) > 1:
+                    raise RowError(f"issue_type {issue_name} มีหลายหมวด — ต้องระบุ category")
+                entry = matches[0] if matches else None
+            if entry is None:
+                raise RowError(f"ไม่พบ issue_type {cat_name + ' / ' if cat_name else ''}{issue_name}")
+            pk, cat_id, name = entry
+            return pk, cat_id, name
+
+        title = _text(record, "title")
+        if not title:
+            raise RowError("ต้องมี issue_type หรือ title")
+        cat_id = None
+        if cat_name:
+            cat_id = self.categories.get(cat_name)
+            if cat_id is None:
+                raise RowError(f"ไม่พบหมวด {cat_name}")
+        return None, cat_id, title[:200]
+
+    # ---------- แปลง 1 แถว ----------
+    def _build(self, record):
+        if not isinstance(record, dict):
+            raise RowError("แต่ละบรรทัดต้องเป็น object")
+
+        status = _text(record, "status") or "open"
+        if status not in VALID_STATUSES:
+            raise RowError(f"สถานะไม่ถูกต้อง ({status})")
+
+        issue_type_id, category_id, title = self._issue(record)
+        created_at = _parse_dt(record.get("created_at"), "created_at") or timezone.now()
+        updated_at = _parse_dt(record.get("updated_at"), "updated_at") or created_at
+
+        ticket = Ticket(
+            issue_type_id=issue_type_id,
+            category_id=category_id,
+            title=title,
+            description=_text(record, "description"),
+            status=status,
+            contact=_text(record, "contact")[:100],
+            requester_id=self._user_id(_text(record, "requester"), "requester", required=True),
+            assignee_id=self._user_id(_text(record, "assignee"), "assignee", required=False),
+            due_at=_parse_dt(record.get("due_at"), "due_at"),
+        )
+
+        comments = []
+        raw_comments = record.get("comments") or []
+        if not isinstance(raw_comments, list):
+            raise RowError("comments ต้องเป็น list")
+        for raw in raw_comments:
+            if not isinstance(raw, dict) or not _text(raw, "body"):
+                raise RowError("comment ต้องมี body")
+            comments.append((
+                TicketComment(
+                    author_id=self._user_id(_text(raw, "author"), "comment author", required=True),
+                    body=_text(raw, "body"),
+                    internal=bool(raw.get("internal", False)),
+                ),
+                _parse_dt(raw.get("created_at"), "comment created_at") or created_at,
+            ))
+
+        return ticket, created_at, updated_at, comments
+
+    # ---------- บันทึกทีละ batch ----------
+    def _flush(self, batch, years):
+        n_comments = sum(len(comments) for _, _, _, comments in batch)
+        if self.options["dry_run"]:
+            return len(batch), n_comments
+
+        batch_size = self.options["batch_size"]
+        tickets = []
+        for ticket, created_at, updated_at, comments in batch:
+            ticket.created_at = created_at
+            ticket.updated_at = updated_at
+            # ไม่มีประวัติสถานะ → เวลา SLA โดยประมาณ (ปิดงาน = updated_at ฯลฯ)
+            responses = [
+                at for comment, at in comments
+                if not comment.internal and comment.author_id != ticket.requester_id
+            ]
+            sla.estimate(ticket, min(responses, default=None))
+            tickets.append(ticket)
+            years.add(timezone.localtime(created_at).year)
+
+        with transaction.atomic(), _keep_timestamps(Ticket, "created_at", "updated_at"), \
+                _keep_timestamps(TicketComment, "created_at"):
+            tickets = Ticket.objects.bulk_create(tickets, batch_size=batch_size)
+            # bulk_create ไม่ผ่าน Ticket.save → บวกยอดนับ dashboard + ประวัติ "สร้างใบงาน" ของทั้ง batch ทีเดียว
+            counters.apply_deltas(counters.deltas((None, counters.state(t)) for t in tickets))
+            TicketEvent.objects.bulk_create(
+                [
+                    TicketEvent(
+                        ticket=t, kind="created", to_status=t.status,
+                        to_assignee_id=t.assignee_id, created_at=t.created_at,
+                    )
+                    for t in tickets
+                ],
+                batch_size=batch_size,
+            )
+
+            comment_objs = []
+            for ticket, (_, _, _, comments) in zip(tickets, batch):
+                for comment, created_at in comments:
+                    comment.ticket_id = ticket.pk
+                    comment.created_at = created_at
+                    comment_objs.append(comment)
+            if comment_objs:
+                TicketComment.objects.bulk_create(comment_objs, batch_size=batch_size)
+
+            if not self.options["no_index"]:
+                search.index_tickets([t.pk for t in tickets])
+
+        return len(tickets), len(comment_objs)
+
+    def _progress(self, imported, started):
+        if self.options["verbosity"] > 1:
+            elapsed = max(time.monotonic() - started, 1e-9)
+            self.stdout.write(f"  {imported} tickets ({imported / elapsed:,.0f} rows/sec)")
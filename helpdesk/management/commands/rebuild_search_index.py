@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from helpdesk import search
+
+
+class Command(BaseCommand):
+    help = "สร้าง full-text index ของใบงานใหม่ทั้งหมด (ใช้หลัง import ข้อมูลจำนวนมาก)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        if backend.vendor is None:
+            self.stderr.write(
+                "ฐานข้อมูลนี้ไม่มีตาราง search index (ยังไม่ได้ migrate หรือไม่รองรับ) — ใช้ icontains แทน"
+            )
+            return
+        total = search.rebuild_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Done. Indexed {total} tickets."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from helpdesk import counters
+
+
+class Command(BaseCommand):
+    help = (
+        "นับยอดใบงานของ dashboard (TicketCounter) ใหม่จากตาราง Ticket แล้วซ่อมแถวที่คลาด "
+        "(ตั้ง cron เป็นระยะ เช่น ทุกคืน หรือหลังแก้ข้อมูลด้วย SQL ตรง)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="แสดงแถวที่ยอดไม่ตรง แต่ไม่แก้"
+        )
+
+    def handle(self, *args, **options):
+        checked, drift = counters.reconcile(dry_run=options["dry_run"])
+        for (scope, user_id, status), have, want in drift:
+            self.stdout.write(f"  {scope}:{user_id}:{status} {have} -> {want}")
+        verb = "found" if options["dry_run"] else "repaired"
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Checked {checked} counters, {verb} {len(drift)}."
+            if drift else f"Done. Checked {checked} counters, all in sync."
+        ))
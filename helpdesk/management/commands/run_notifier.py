@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from helpdesk import notify
+
+
+class Command(BaseCommand):
+    help = (
+        "ส่งข้อความแจ้งผู้แจ้งงานที่ค้างใน outbox (อีเมล / LINE) — "
+        "รันค้างไว้ (ตรวจทุก --interval วินาที) หรือใช้ --once จาก cron"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="ส่งข้อความที่ถึงเวลาจนหมดแล้วออก")
+        parser.add_argument("--interval", type=float, default=10.0, help="วินาทีที่รอเมื่อไม่มีข้อความถึงเวลา")
+        parser.add_argument(
+            "--limit", type=int, default=0,
+            help="จำนวนผู้รับสูงสุดต่อรอบ (0 = HELPDESK_NOTIFY_BATCH)",
+        )
+
+    def handle(self, *args, **options):
+        limit = options["limit"] or notify.batch_size()
+        totals = [0, 0, 0, 0]
+        try:
+            while True:
+                close_old_connections()
+                result = notify.deliver(limit=limit)
+                totals = [a + b for a, b in zip(totals, result)]
+                if any(result):
+                    self.stdout.write(
+                        f"ส่ง {result.digests} ราย ({result.sent} ข้อความ), "
+                        f"รอลองใหม่ {result.retried}, ล้มเหลว {result.failed}"
+                    )
+                    # มีงานในรอบนี้ = อาจยังมีค้าง → ทำรอบต่อทันที
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            f"Done. Sent {totals[1]} messages in {totals[0]} digests, "
+            f"retrying {totals[2]}, failed {totals[3]}."
+        )
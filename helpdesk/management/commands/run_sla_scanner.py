@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from helpdesk import sla
+
+
+class Command(BaseCommand):
+    help = (
+        "แจ้งเตือน/ยกระดับใบงานที่ใกล้หรือเลยกำหนด (due_at) — "
+        "รันค้างไว้ (ตรวจทุก --interval วินาที) หรือใช้ --once จาก cron ทุกนาที"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="ตรวจจนไม่มีใบงานที่ถึงเกณฑ์แล้วออก")
+        parser.add_argument("--interval", type=float, default=60.0, help="วินาทีระหว่างแต่ละรอบ")
+        parser.add_argument(
+            "--limit", type=int, default=0,
+            help="จำนวนใบงานสูงสุดต่อรอบ (0 = HELPDESK_SLA_SCAN_BATCH)",
+        )
+
+    def handle(self, *args, **options):
+        limit = options["limit"] or sla.scan_batch()
+        totals = [0, 0, 0, 0]
+        try:
+            while True:
+                close_old_connections()
+                result = sla.scan(limit=limit)
+                totals = [a + b for a, b in zip(totals, result)]
+                if result.warned or result.breached:
+                    self.stdout.write(
+                        f"ใกล้ครบกำหนด {result.warned}, เลยกำหนด {result.breached}, "
+                        f"มอบหมายใหม่ {result.reassigned}, แจ้งเตือน {result.notified}"
+                    )
+
+                # เต็ม batch = อาจยังมีค้าง → ทำรอบต่อทันที
+                if result.warned + result.breached >= limit:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            f"Done. Warned {totals[0]}, breached {totals[1]}, "
+            f"reassigned {totals[2]}, notifications {totals[3]}."
+        )
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from helpdesk import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "ประมวลผลงานเบื้องหลังในคิว (BackgroundJob) เช่น export PDF, ย่อรูปแนบ — "
+        "รันค้างไว้ หรือใช้ --once จาก cron"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true",
+            help="ทำงานที่ค้างในคิวจนหมดแล้วออก (เหมาะกับ cron)",
+        )
+        parser.add_argument(
+            "--kind", action="append", dest="kinds",
+            help="ทำเฉพาะงานชนิดนี้ (ระบุซ้ำได้)",
+        )
+        parser.add_argument("--sleep", type=float, default=2.0, help="วินาทีที่รอเมื่อคิวว่าง")
+        parser.add_argument("--max-jobs", type=int, default=0, help="ออกเมื่อทำครบจำนวนนี้ (0 = ไม่จำกัด)")
+
+    def handle(self, *args, **options):
+        # handler ของ export / รูปแนบ ลงทะเบียนตอน import
+        from helpdesk import exports, images  # noqa: F401
+
+        done = 0
+        try:
+            while True:
+                close_old_connections()
+                # ทุกรอบ: worker ตัวอื่นอาจตายกลางงานเมื่อไรก็ได้ (ไม่ใช่แค่ก่อนตัวนี้เริ่ม)
+                requeued, failed = jobs.requeue_stale()
+                if requeued or failed:
+                    self.stdout.write(f"คืนงานค้างเข้าคิว {requeued} งาน, ล้มเหลว {failed} งาน")
+                job = jobs.claim_next(options["kinds"])
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+
+                started = time.monotonic()
+                job = jobs.run_job(job)
+                elapsed = time.monotonic() - started
+                line = f"[{job.status}] {job} {elapsed:.1f}s"
+                if job.status == "done":
+                    self.stdout.write(self.style.SUCCESS(line))
+                else:
+                    self.stdout.write(self.style.WARNING(line))
+
+                done += 1
+                if options["max_jobs"] and done >= options["max_jobs"]:
+                    break
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f"Done. Processed {done} jobs.")
@@ -0,0 +1,182 @@
+# helpdesk/media.py — ส่งไฟล์รูป/ไฟล์แนบของใบงานผ่าน view (หลังตรวจสิทธิ์แล้ว)
+#
+#   - ETag: ไฟล์ content-addressed ใช้ sha256 จากชื่อ (ไม่ต้องอ่านไฟล์), ไฟล์อื่นใช้ชื่อ+ขนาด
+#   - ไฟล์ content-addressed: Cache-Control แบบ immutable อายุ 1 ปี (private เพราะต้องมีสิทธิ์)
+#   - If-None-Match → 304, Range: bytes=... → 206 (ช่วงเดียว) — เล่นวิดีโอ/ดาวน์โหลดต่อได้
+#   - ส่งทั้งไฟล์ด้วย FileResponse (WSGI server ใช้ sendfile ได้ผ่าน wsgi.file_wrapper)
+#   - ตั้ง HELPDESK_MEDIA_SENDFILE → Django ตรวจสิทธิ์แล้วให้ proxy ส่งไฟล์เอง (ไม่ผ่าน Python เลย)
+#
+#       "x-accel-redirect" (nginx) — ตั้ง location ภายในให้ตรงกับ HELPDESK_MEDIA_ACCEL_PREFIX:
+#           location /protected-media/ { internal; alias /srv/helpdesk/media/; }
+#       "x-sendfile" (Apache mod_xsendfile / lighttpd) — ส่ง path เต็มของไฟล์ให้ server
+#
+#     ใช้ได้กับ storage ที่เป็นไฟล์ในเครื่อง (มี .path()) เท่านั้น S3 ยังส่งผ่าน Django ตามเดิม
+
+import hashlib
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from .storage import content_hash
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+# ไฟล์ที่ชื่อไม่ได้มาจากเนื้อหา (ไฟล์เก่า) → ให้ browser ถามใหม่ทุกครั้ง (ได้ 304 ถ้าไม่เปลี่ยน)
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+STREAM_BLOCK = 64 * 1024
+
+# ชนิดไฟล์ที่เปิดดูใน browser ได้ (นอกนั้นบังคับดาวน์โหลด — กัน HTML/SVG ที่แนบมารันในโดเมนเรา)
+INLINE_TYPES = {
+    "image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp",
+    "application/pdf", "text/plain",
+}
+
+SENDFILE_MODES = ("x-accel-redirect", "x-sendfile")
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    แปลง Range header เป็น (start, end) รวมปลาย — None ถ้าไม่มี/ไม่รองรับ (ส่งทั้งไฟล์)
+
+    รองรับช่วงเดียว: bytes=0-99, bytes=100-, bytes=-500
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first == "":
+        if last == "" or int(last) == 0:
+            raise RangeNotSatisfiable()
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def etag_for(name, size):
+    sha = content_hash(name)
+    if sha:
+        return f'"{sha}"'
+    return '"{}"'.format(hashlib.sha1(f"{name}:{size}".encode()).hexdigest())
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # เทียบแบบ weak (ตัด W/ ออก)
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return etag in tags
+
+
+def _iter_range(fh, length):
+    try:
+        remaining = length
+        while remaining > 0:
+            block = fh.read(min(STREAM_BLOCK, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        fh.close()
+
+
+def _sendfile_response(storage, name):
+    """HttpResponse ว่างที่บอก proxy ให้ส่งไฟล์เอง (None ถ้าไม่ได้ตั้งไว้ หรือ storage ไม่ใช่ไฟล์ในเครื่อง)"""
+    mode = getattr(settings, "HELPDESK_MEDIA_SENDFILE", None)
+    if not mode:
+        return None
+    if mode not in SENDFILE_MODES:
+        raise ImproperlyConfigured(f"HELPDESK_MEDIA_SENDFILE ต้องเป็นหนึ่งใน {SENDFILE_MODES}")
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        return None
+
+    response = HttpResponse()
+    if mode == "x-accel-redirect":
+        prefix = getattr(settings, "HELPDESK_MEDIA_ACCEL_PREFIX", "/protected-media/")
+        response["X-Accel-Redirect"] = quote(prefix.rstrip("/") + "/" + name.replace("\\", "/"))
+    else:
+        response["X-Sendfile"] = path
+    # Content-Length / Range / If-Range ให้ proxy จัดการเองจากไฟล์จริง
+    return response
+
+
+def serve_file(request, field_file, filename=None, content_type=None, as_attachment=None):
+    """
+    HttpResponse ของไฟล์ใน FieldFile (รองรับ ETag / If-None-Match / Range)
+
+    as_attachment=None → เปิดใน browser เฉพาะชนิดใน INLINE_TYPES นอกนั้นให้ดาวน์โหลด
+    ผู้เรียกต้องตรวจสิทธิ์ก่อนเสมอ
+    """
+    storage = field_file.storage
+    name = field_file.name
+    size = storage.size(name)
+    etag = etag_for(name, size)
+    immutable = content_hash(name) is not None
+    filename = filename or name.rsplit("/", 1)[-1]
+    content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if as_attachment is None:
+        as_attachment = content_type not in INLINE_TYPES
+
+    def finish(response):
+        response["ETag"] = etag
+        response["Accept-Ranges"] = "bytes"
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        response["X-Content-Type-Options"] = "nosniff"
+        if not isinstance(response, HttpResponseNotModified):
+            response["Content-Type"] = content_type
+            response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+        return response
+
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return finish(HttpResponseNotModified())
+
+    offloaded = _sendfile_response(storage, name)
+    if offloaded is not None:
+        return finish(offloaded)
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return finish(response)
+
+    if byte_range is None:
+        response = FileResponse(storage.open(name, "rb"), content_type=content_type)
+        # ไม่มี wsgi.file_wrapper (runserver/ASGI) → อ่านทีละก้อนใหญ่แทนค่าเริ่มต้น 4KB
+        response.block_size = STREAM_BLOCK
+        response["Content-Length"] = str(size)
+        return finish(response)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        _iter_range(storage.open_range(name, start, length), length),
+        status=206,
+        content_type=content_type,
+    )
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(length)
+    return finish(response)
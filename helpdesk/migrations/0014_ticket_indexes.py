@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('helpdesk', '0013_alter_ticket_contact_issuetype_ticket_issue_type_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status', 'closed'), _negated=True), fields=['-updated_at'], name='ticket_open_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['requester', 'status'], name='ticket_requester_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['assignee', 'status'], name='ticket_assignee_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['category', 'created_at'], name='ticket_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_at'], name='ticket_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketcomment',
+            index=models.Index(fields=['ticket', 'created_at'], name='comment_ticket_created_idx'),
+        ),
+    ]
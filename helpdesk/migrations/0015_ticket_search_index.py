@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# สร้าง full-text index ของใบงาน (ดู helpdesk/search.py) แล้วเติมข้อมูลเดิมทั้งหมด
+# ฐานข้อมูลที่ไม่รองรับ (หรือ SQLite ที่ไม่มี FTS5 trigram) จะข้ามไป → ระบบใช้ icontains แทน
+# DDL เขียนไว้ตรงนี้ (ไม่ import จาก helpdesk.search) → migration ไม่เปลี่ยนตามโค้ดปัจจุบัน
+
+SEARCH_TABLE = "helpdesk_ticket_search"
+
+BACKFILL_SQL = {
+    "sqlite": (
+        f"INSERT INTO {SEARCH_TABLE} (rowid, title, body) "
+        "SELECT t.id, t.title, t.description || COALESCE(char(10) || ("
+        "  SELECT group_concat(c.body, char(10)) FROM helpdesk_ticketcomment c"
+        "  WHERE c.ticket_id = t.id AND NOT c.internal"
+        "), '') FROM helpdesk_ticket t"
+    ),
+    "postgresql": (
+        f"INSERT INTO {SEARCH_TABLE} (ticket_id, title, body) "
+        "SELECT t.id, t.title, t.description || COALESCE(E'\\n' || ("
+        "  SELECT string_agg(c.body, E'\\n' ORDER BY c.created_at) FROM helpdesk_ticketcomment c"
+        "  WHERE c.ticket_id = t.id AND NOT c.internal"
+        "), '') FROM helpdesk_ticket t"
+    ),
+}
+
+CREATE_SQL = {
+    "sqlite": (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+        "USING fts5(title, body, tokenize='trigram')"
+    ),
+    "postgresql": (
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm;"
+        f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+        "  ticket_id integer PRIMARY KEY,"
+        "  title text NOT NULL DEFAULT '',"
+        "  body text NOT NULL DEFAULT '',"
+        "  document text GENERATED ALWAYS AS (title || ' ' || body) STORED"
+        ");"
+        f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_trgm "
+        f"ON {SEARCH_TABLE} USING gin (document gin_trgm_ops);"
+    ),
+}
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in CREATE_SQL:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == "sqlite":
+            # FTS5 + trigram tokenizer ต้องใช้ SQLite >= 3.34
+            try:
+                cursor.execute(CREATE_SQL[vendor])
+            except Exception:
+                return
+        else:
+            cursor.execute(CREATE_SQL[vendor])
+        cursor.execute(BACKFILL_SQL[vendor])
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('helpdesk', '0014_ticket_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
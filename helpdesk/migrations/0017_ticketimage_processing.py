@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('helpdesk', '0016_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketimage',
+            name='is_processed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='ticketimage',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='ticketimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='ticket_images/thumbs/'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:22
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('helpdesk', '0017_ticketimage_processing'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketattachment',
+            name='content_type',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='ticketattachment',
+            name='original_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='ticketattachment',
+            name='sha256',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='ticketattachment',
+            name='size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='ticketattachment',
+            name='file',
+            field=models.FileField(upload_to='ticket_attachments/%Y/%m/'),
+        ),
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(blank=True, default='', max_length=100)),
+                ('size', models.BigIntegerField()),
+                ('sha256', models.CharField(blank=True, default='', max_length=64)),
+                ('received', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('open', 'กำลังอัปโหลด'), ('complete', 'เสร็จแล้ว'), ('failed', 'ล้มเหลว'), ('aborted', 'ยกเลิก')], default='open', max_length=20)),
+                ('error', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('attachment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='helpdesk.ticketattachment')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='helpdesk.ticket')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'open')), fields=['ticket'], name='upload_open_ticket_idx')],
+            },
+        ),
+    ]
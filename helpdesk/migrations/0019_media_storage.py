@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:25
+
+import helpdesk.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('helpdesk', '0018_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticketattachment',
+            name='file',
+            field=models.FileField(storage=helpdesk.storage.media_storage, upload_to='ticket_attachments/%Y/%m/'),
+        ),
+        migrations.AlterField(
+            model_name='ticketimage',
+            name='image',
+            field=models.ImageField(storage=helpdesk.storage.media_storage, upload_to='ticket_images/%Y/%m/%d/'),
+        ),
+        migrations.AlterField(
+            model_name='ticketimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, storage=helpdesk.storage.media_storage, upload_to='ticket_images/thumbs/'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:36
+
+from django.db import migrations, models
+
+from helpdesk.counters import expected_counts
+
+# ยอดนับใบงานของ dashboard (ดู helpdesk/counters.py) — เติมจากใบงานที่มีอยู่แล้ว
+
+
+def backfill_counters(apps, schema_editor):
+    Ticket = apps.get_model("helpdesk", "Ticket")
+    TicketCounter = apps.get_model("helpdesk", "TicketCounter")
+    TicketCounter.objects.bulk_create(
+        [
+            TicketCounter(scope=scope, user_id=user_id, status=status, count=n)
+            for (scope, user_id, status), n in expected_counts(Ticket.objects.all()).items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('helpdesk', '0019_media_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=20)),
+                ('user_id', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user_id', 'scope', 'status'), name='uniq_ticket_counter')],
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
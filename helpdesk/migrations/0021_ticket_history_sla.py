@@ -0,0 +1,114 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min, OuterRef, Q, Subquery
+
+from helpdesk.sla import SLA_FIELDS, estimate
+
+# ใบงานเดิมไม่มีประวัติ → ประวัติ "สร้างใบงาน" หนึ่งแถว + เวลา SLA โดยประมาณ (ดู helpdesk.sla.estimate)
+
+
+def backfill_history(apps, schema_editor):
+    Ticket = apps.get_model("helpdesk", "Ticket")
+    TicketComment = apps.get_model("helpdesk", "TicketComment")
+    TicketEvent = apps.get_model("helpdesk", "TicketEvent")
+
+    first_response = (
+        TicketComment.objects.filter(ticket=OuterRef("pk"), internal=False)
+        .filter(~Q(author_id=OuterRef("requester_id")))
+        .order_by()
+        .values("ticket")
+        .annotate(at=Min("created_at"))
+        .values("at")
+    )
+    tickets = Ticket.objects.annotate(first_comment_at=Subquery(first_response)).order_by("pk")
+
+    batch = []
+    for ticket in tickets.iterator(chunk_size=1000):
+        estimate(ticket, ticket.first_comment_at)
+        batch.append(ticket)
+        if len(batch) >= 1000:
+            _flush(Ticket, TicketEvent, batch)
+            batch = []
+    if batch:
+        _flush(Ticket, TicketEvent, batch)
+
+
+def _flush(Ticket, TicketEvent, tickets):
+    Ticket.objects.bulk_update(tickets, SLA_FIELDS)
+    TicketEvent.objects.bulk_create([
+        TicketEvent(
+            ticket_id=t.pk, kind="created", to_status=t.status,
+            to_assignee_id=t.assignee_id, created_at=t.created_at,
+        )
+        for t in tickets
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('helpdesk', '0020_ticket_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='claim_time',
+            field=models.DurationField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='first_response_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='first_response_time',
+            field=models.DurationField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='resolution_time',
+            field=models.DurationField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='TicketEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('created', 'สร้างใบงาน'), ('status', 'เปลี่ยนสถานะ'), ('assigned', 'มอบหมายงาน')], max_length=20)),
+                ('from_status', models.CharField(blank=True, default='', max_length=20)),
+                ('to_status', models.CharField(blank=True, default='', max_length=20)),
+                ('duration', models.DurationField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('from_assignee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history', to='helpdesk.ticket')),
+                ('to_assignee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['ticket', 'created_at'], name='event_ticket_created_idx'), models.Index(fields=['created_at', 'from_status'], name='event_created_status_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('helpdesk', '0021_ticket_history_sla'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('sla_warning', 'ใกล้ครบกำหนด SLA'), ('sla_breach', 'เกินกำหนด SLA')], max_length=30)),
+                ('message', models.CharField(max_length=255)),
+                ('dedupe_key', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='sla_level',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'ปกติ'), (1, 'ใกล้ครบกำหนด'), (2, 'เกินกำหนด')], default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='ticketevent',
+            name='kind',
+            field=models.CharField(choices=[('created', 'สร้างใบงาน'), ('status', 'เปลี่ยนสถานะ'), ('assigned', 'มอบหมายงาน'), ('sla_warning', 'ใกล้ครบกำหนด SLA'), ('sla_breach', 'เกินกำหนด SLA')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(models.Q(('status', 'closed'), _negated=True), ('due_at__isnull', False), ('sla_level__lt', 2)), fields=['sla_level', 'due_at'], name='ticket_sla_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='ticket',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='helpdesk.ticket'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-created_at'], name='notification_recipient_idx'),
+        ),
+    ]
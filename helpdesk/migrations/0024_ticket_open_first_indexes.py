@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('helpdesk', '0023_notification_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_open_updated_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status', 'closed'), _negated=True), fields=['-updated_at', '-id'], name='ticket_open_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status', 'closed')), fields=['-updated_at', '-id'], name='ticket_closed_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['requester', '-updated_at', '-id'], name='ticket_requester_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('helpdesk', '0024_ticket_open_first_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='writer',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
@@ -1,5 +1,14 @@
+import uuid
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+
+from .storage import media_storage
+
+# Ticket ที่ไม่ได้โหลดจากฐานข้อมูล (สร้างเอง) → ไม่รู้ issue_type เดิม
+_NOT_LOADED = object()
+
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -24,6 +33,29 @@ class IssueType(models.Model):
             models.UniqueConstraint(fields=["name", "category"], name="uniq_issue_per_category")
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # ค่าที่โหลดมา ใช้ตรวจว่าชื่อ/หมวดเปลี่ยนตอน save
+        instance._loaded = (instance.__dict__.get("name"), instance.__dict__.get("category_id"))
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, "_loaded", None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # เปลี่ยนชื่อ/ย้ายหมวด → อัปเดต title/category ของใบงานเดิมทั้งหมดใน UPDATE เดียว
+            if loaded is not None and loaded != (self.name, self.category_id):
+                from . import catalog
+
+                catalog.propagate_issue_type(self, category_changed=loaded[1] != self.category_id)
+        self._loaded = (self.name, self.category_id)
+
+    def rename(self, name):
+        self.name = name
+        self.save(update_fields=["name"])
+
     def __str__(self):
         return self.name
 
@@ -72,18 +104,303 @@ class Ticket(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # ---------- SLA (helpdesk/sla.py ตั้งให้ตอนเปลี่ยนสถานะ/ผู้รับผิดชอบ — ไม่แก้เอง) ----------
+    # เวลาที่เข้าสถานะปัจจุบัน (ใช้คิดเวลาที่อยู่ในแต่ละสถานะ → TicketEvent.duration)
+    status_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # ตอบสนองครั้งแรก: คอมเมนต์ของคนอื่นที่ไม่ใช่ผู้แจ้ง หรือออกจากสถานะ "เปิดงาน"
+    first_response_at = models.DateTimeField(null=True, blank=True, editable=False)
+    first_response_time = models.DurationField(null=True, blank=True, editable=False)
+    # มีผู้รับผิดชอบครั้งแรก
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    claim_time = models.DurationField(null=True, blank=True, editable=False)
+    # ปิดงานล่าสุด (เปิดใหม่ → ล้าง)
+    closed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    resolution_time = models.DurationField(null=True, blank=True, editable=False)
+    # ระดับการแจ้งเตือน SLA ของ due_at ปัจจุบัน (run_sla_scanner ตั้ง, เปลี่ยน due_at → เริ่มใหม่)
+    SLA_OK, SLA_WARNING, SLA_BREACHED = 0, 1, 2
+    SLA_LEVEL_CHOICES = [
+        (SLA_OK, "ปกติ"),
+        (SLA_WARNING, "ใกล้ครบกำหนด"),
+        (SLA_BREACHED, "เกินกำหนด"),
+    ]
+    sla_level = models.PositiveSmallIntegerField(choices=SLA_LEVEL_CHOICES, default=SLA_OK, editable=False)
+
     class Meta:
         ordering = ["-created_at"]
+        # index ตามรูปแบบการเข้าถึงจริง (ดู manage.py explain_queries)
+        indexes = [
+            # รายการ/dashboard: งานเปิดก่อนแล้วงานปิด แต่ละกลุ่มเรียงตามอัปเดตล่าสุด
+            # (queries.OPEN_FIRST_PARTITIONS — อ่านทีละกลุ่มเป็น range scan ไม่ต้อง sort)
+            models.Index(
+                fields=["-updated_at", "-id"],
+                name="ticket_open_updated_idx",
+                condition=~models.Q(status="closed"),
+            ),
+            models.Index(
+                fields=["-updated_at", "-id"],
+                name="ticket_closed_updated_idx",
+                condition=models.Q(status="closed"),
+            ),
+            # KPI "งานของฉัน" / "มอบหมายให้ฉัน" + หน้ารายการของผู้ใช้ทั่วไป
+            models.Index(fields=["requester", "status"], name="ticket_requester_status_idx"),
+            models.Index(fields=["requester", "-updated_at", "-id"], name="ticket_requester_updated_idx"),
+            models.Index(fields=["assignee", "status"], name="ticket_assignee_status_idx"),
+            # รายงานรายปี: ช่วง created_at แยกตามหมวด
+            models.Index(fields=["category", "created_at"], name="ticket_category_created_idx"),
+            models.Index(fields=["created_at"], name="ticket_created_idx"),
+            # run_sla_scanner: งานที่ยังไม่ปิดและยังแจ้งเตือนไม่ครบ เรียงตาม due_at
+            # (ใบที่แจ้ง "เกินกำหนด" แล้ว/ปิดแล้วหลุดจาก index → แต่ละรอบอ่านเฉพาะใบที่เพิ่งถึงกำหนด)
+            models.Index(
+                fields=["sla_level", "due_at"],
+                name="ticket_sla_due_idx",
+                condition=~models.Q(status="closed") & models.Q(sla_level__lt=2, due_at__isnull=False),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # issue_type ที่โหลดมา: save() ตั้ง title/category ใหม่เฉพาะเมื่อ issue_type เปลี่ยน
+        if "issue_type_id" in instance.__dict__:
+            instance._loaded_issue_type_id = instance.issue_type_id
+        return instance
+
+    def save(self, *args, actor=None, **kwargs):
+        # actor: ผู้ที่ทำการเปลี่ยนแปลง (บันทึกใน TicketEvent) — ไม่ระบุ = ไม่ทราบ
+        # 🔒 Title และ Category มาจาก IssueType
+        # - ตั้งเฉพาะใบงานใหม่ หรือเมื่อ issue_type เปลี่ยนจากที่โหลดมา
+        #   (save เต็มใบของใบงานเดิมไม่แตะ title — catalog ของ process นี้อาจยังเป็นชื่อเก่า
+        #    จะเขียนทับชื่อใหม่ที่ propagate_issue_type ตั้งไว้)
+        # - ชื่อ/หมวดอ่านจาก catalog ในหน่วยความจำ (ไม่ query IssueType/Category ทุกครั้ง)
+        update_fields = kwargs.get("update_fields")
+        issue_changed = (
+            self._state.adding
+            or getattr(self, "_loaded_issue_type_id", _NOT_LOADED) != self.issue_type_id
+        )
+        if self.issue_type_id and issue_changed and (
+            update_fields is None or "issue_type" in update_fields
+        ):
+            from . import catalog
+
+            entry = catalog.issue_type(self.issue_type_id)
+            if entry is not None and (self.title, self.category_id) != (entry.name, entry.category_id):
+                self.title = entry.name
+                self.category_id = entry.category_id
+                if update_fields is not None:
+                    kwargs["update_fields"] = set(update_fields) | {"title", "category"}
+
+        # ยอดนับ dashboard (helpdesk/counters.py) + ประวัติ/เวลา SLA (helpdesk/sla.py)
+        # — เฉพาะ save ที่เขียนสถานะ/ผู้แจ้ง/ผู้รับผิดชอบ
+        from . import counters, sla
+
+        if update_fields is not None and not ((counters.COUNTED_FIELDS | sla.TRACKED_FIELDS) & set(update_fields)):
+            super().save(*args, **kwargs)
+            self._loaded_issue_type_id = self.issue_type_id
+            return
+        with transaction.atomic():
+            old = None
+            old_due_at = self.due_at
+            if self.pk is not None and not self._state.adding:
+                # ค่าจริงในฐานข้อมูล (ล็อกแถว) ไม่ใช่ค่าที่โหลดไว้ในหน่วยความจำ → ไม่คลาดเมื่อมีคนแก้ก่อน
+                row = (
+                    Ticket.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list("status", "requester_id", "assignee_id", "due_at", *sla.SLA_FIELDS)
+                    .first()
+                )
+                if row is not None:
+                    old, old_due_at = row[:3], row[3]
+                    for name, value in zip(sla.SLA_FIELDS, row[4:]):
+                        setattr(self, name, value)
+            new = counters.state(self)
+            if update_fields is not None and old is not None:
+                # ฟิลด์ที่ไม่ได้อยู่ใน update_fields ยังเป็นค่าเดิมในฐานข้อมูล
+                new = tuple(
+                    n if name in update_fields else o
+                    for name, o, n in zip(("status", "requester", "assignee"), old, new)
+                )
+
+            if update_fields is not None and "due_at" not in update_fields:
+                self.due_at = old_due_at
+            changed, history = sla.track(
+                self, old, new, actor_id=getattr(actor, "pk", None), old_due_at=old_due_at
+            )
+            if changed and kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = set(kwargs["update_fields"]) | changed
+            super().save(*args, **kwargs)
+            if history:
+                TicketEvent.objects.bulk_create(history)
+            counters.record(old, new)
+        self._loaded_issue_type_id = self.issue_type_id
+
+    def __str__(self):
+        return f"#{self.pk} {self.title}"
+
+
+class TicketEvent(models.Model):
+    """
+    ประวัติการเปลี่ยนสถานะ/ผู้รับผิดชอบของใบงาน (เพิ่มอย่างเดียว ไม่แก้ไข) — ดู helpdesk/sla.py
+
+    duration = เวลาที่ใบงานอยู่ใน from_status ก่อนเปลี่ยน → รวม/เฉลี่ยด้วย SQL ได้เลย
+    """
+
+    KIND_CHOICES = [
+        ("created", "สร้างใบงาน"),
+        ("status", "เปลี่ยนสถานะ"),
+        ("assigned", "มอบหมายงาน"),
+        ("sla_warning", "ใกล้ครบกำหนด SLA"),
+        ("sla_breach", "เกินกำหนด SLA"),
+    ]
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="history")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    from_status = models.CharField(max_length=20, blank=True, default="")
+    to_status = models.CharField(max_length=20, blank=True, default="")
+    from_assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    to_assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    duration = models.DurationField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            models.Index(fields=["ticket", "created_at"], name="event_ticket_created_idx"),
+            # เวลาเฉลี่ยในแต่ละสถานะตามช่วงเวลา (รายงาน)
+            models.Index(fields=["created_at", "from_status"], name="event_created_status_idx"),
+        ]
 
     def save(self, *args, **kwargs):
-        # 🔒 ล็อก Title และ Category ให้มาจาก IssueType เท่านั้น
-        if self.issue_type_id:
-            self.title = self.issue_type.name
-            self.category = self.issue_type.category
+        if not self._state.adding:
+            raise ValueError("TicketEvent แก้ไขไม่ได้ (บันทึกเพิ่มอย่างเดียว)")
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"#{self.pk} {self.title}"
+        return f"#{self.ticket_id} {self.kind} {self.from_status}->{self.to_status}"
+
+
+class Notification(models.Model):
+    """
+    การแจ้งเตือนถึงผู้ใช้ (เช่น SLA ใกล้ครบ/เกินกำหนด จาก run_sla_scanner) — ดู helpdesk/sla.py
+
+    สร้างแล้วส่งออกทางอีเมล/LINE ด้วย OutboxMessage (notify.enqueue_notifications)
+    """
+
+    KIND_CHOICES = [
+        ("sla_warning", "ใกล้ครบกำหนด SLA"),
+        ("sla_breach", "เกินกำหนด SLA"),
+    ]
+
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications"
+    )
+    ticket = models.ForeignKey(
+        Ticket, on_delete=models.CASCADE, null=True, blank=True, related_name="notifications"
+    )
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    message = models.CharField(max_length=255)
+    # กันแจ้งซ้ำ (ชนิด + ใบงาน + ผู้รับ + กำหนดเวลา) → scanner รันซ้ำ/หลายตัวพร้อมกันได้
+    dedupe_key = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["recipient", "-created_at"], name="notification_recipient_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} → {self.recipient} (#{self.ticket_id})"
+
+
+class OutboxMessage(models.Model):
+    """
+    ข้อความที่รอส่งออกนอกระบบ (อีเมล / LINE ฯลฯ) — ดู helpdesk/notify.py
+
+    บันทึกใน transaction เดียวกับการเปลี่ยนแปลงใบงาน แล้ว manage.py run_notifier ส่งทีหลัง
+    (ข้อความของผู้รับเดียวกันที่ค้างอยู่ รวมส่งเป็นข้อความเดียว)
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "รอส่ง"),
+        ("sending", "กำลังส่ง"),
+        ("sent", "ส่งแล้ว"),
+        ("failed", "ส่งไม่สำเร็จ"),
+    ]
+
+    # ช่องทาง (ชื่อ transport ใน HELPDESK_NOTIFY_TRANSPORTS) + ที่อยู่ปลายทางของช่องทางนั้น
+    channel = models.CharField(max_length=20)
+    address = models.CharField(max_length=255)
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    ticket = models.ForeignKey(
+        Ticket, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    kind = models.CharField(max_length=30)
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # ส่งได้ตั้งแต่เวลานี้ (หน่วงไว้รอรวมข้อความ / รอลองใหม่แบบ backoff)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # worker ที่หยิบไปส่ง (ไม่ขยับนาน → run_notifier คืนเข้าคิว)
+    claimed_by = models.CharField(max_length=32, blank=True, default="")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # run_notifier: ข้อความที่ถึงเวลาส่ง / ข้อความที่ค้างของผู้รับเดียวกัน (เฉพาะที่ยังรอส่ง)
+            models.Index(
+                fields=["next_attempt_at"],
+                name="outbox_pending_idx",
+                condition=models.Q(status="pending"),
+            ),
+            models.Index(
+                fields=["address", "channel"],
+                name="outbox_pending_address_idx",
+                condition=models.Q(status="pending"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"[{self.status}] {self.channel}:{self.address} {self.subject}"
+
+
+class TicketCounter(models.Model):
+    """
+    จำนวนใบงานต่อ (scope, user_id, status) สำหรับ dashboard — ดู helpdesk/counters.py
+
+    user_id เป็นเลขธรรมดา (0 = ทุกคน) ไม่ใช่ ForeignKey: ไม่ทำให้การลบใบงาน/ผู้ใช้ล้ม
+    แถวของผู้ใช้ที่ถูกลบล้างด้วย counters.forget_user (signal post_delete ของ User)
+    """
+
+    scope = models.CharField(max_length=20)
+    user_id = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_id", "scope", "status"], name="uniq_ticket_counter"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.user_id}:{self.status} = {self.count}"
 
 
 class TicketComment(models.Model):
@@ -95,6 +412,9 @@ class TicketComment(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["ticket", "created_at"], name="comment_ticket_created_idx"),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author} on {self.ticket}"
@@ -106,7 +426,13 @@ class TicketImage(models.Model):
         on_delete=models.CASCADE,
         related_name="images",
     )
-    image = models.ImageField(upload_to="ticket_images/%Y/%m/%d/")
+    image = models.ImageField(upload_to="ticket_images/%Y/%m/%d/", storage=media_storage)
+    # รูปย่อสำหรับหน้ารายละเอียด (ว่าง = ยังไม่ได้ประมวลผล → แสดงรูปเต็มแทน)
+    thumbnail = models.ImageField(upload_to="ticket_images/thumbs/", blank=True, storage=media_storage)
+    # sha256 ของไฟล์ที่อัปโหลดมา (ก่อนประมวลผล) ใช้หาไฟล์ซ้ำ
+    sha256 = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    # ย่อขนาด/ลบ EXIF/บีบอัดแล้ว (ดู helpdesk/images.py)
+    is_processed = models.BooleanField(default=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -119,7 +445,12 @@ class TicketAttachment(models.Model):
         on_delete=models.CASCADE,
         related_name="attachments",
     )
-    file = models.ImageField(upload_to="ticket_attachments/%Y/%m/")
+    # ไฟล์ทุกชนิด (log, PDF, zip ...) — อัปโหลดทีละ chunk ผ่าน UploadSession (helpdesk/uploads.py)
+    file = models.FileField(upload_to="ticket_attachments/%Y/%m/", storage=media_storage)
+    original_name = models.CharField(max_length=255, blank=True, default="")
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    size = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, default="")
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -135,6 +466,56 @@ class TicketAttachment(models.Model):
         return f"Attachment for #{self.ticket_id} - {self.file.name}"
 
 
+class UploadSession(models.Model):
+    """
+    การอัปโหลดไฟล์แนบแบบแบ่ง chunk (ต่อได้ถ้าหลุดกลางทาง)
+
+    chunk ถูกเขียนต่อท้ายไฟล์ชั่วคราวทีละส่วน เมื่อครบ size แล้วตรวจ sha256
+    แล้วย้ายเข้า storage เป็น TicketAttachment
+    """
+
+    STATUS_CHOICES = [
+        ("open", "กำลังอัปโหลด"),
+        ("complete", "เสร็จแล้ว"),
+        ("failed", "ล้มเหลว"),
+        ("aborted", "ยกเลิก"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="upload_sessions")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    size = models.BigIntegerField()
+    # sha256 ทั้งไฟล์ที่ client ส่งมาตอนเริ่ม (บังคับ) — ตรวจกับไฟล์ที่ได้รับครบแล้วก่อนแนบ
+    sha256 = models.CharField(max_length=64, blank=True, default="")
+    received = models.BigIntegerField(default=0)
+    # request ที่จอง offset received ไว้เขียน chunk อยู่ (ว่าง = ไม่มี) — ดู uploads.write_chunk
+    writer = models.CharField(max_length=32, blank=True, default="")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="open")
+    error = models.CharField(max_length=255, blank=True, default="")
+    attachment = models.ForeignKey(
+        TicketAttachment, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # โควตาต่อใบงาน + ล้าง session ที่ค้าง
+            models.Index(
+                fields=["ticket"], name="upload_open_ticket_idx", condition=models.Q(status="open")
+            ),
+        ]
+
+    def __str__(self):
+        return f"Upload {self.filename} for #{self.ticket_id} ({self.status})"
+
+
 # ✅ ย้ายออกมาเป็น model ของตัวเอง (ไม่อยู่ใน TicketAttachment)
 class UserProfile(models.Model):
     user = models.OneToOneField(
@@ -151,3 +532,59 @@ class UserProfile(models.Model):
 
     def __str__(self):
         return self.user.username
+
+
+class BackgroundJob(models.Model):
+    """งานเบื้องหลัง (เช่น สร้างไฟล์ PDF) — คิวในฐานข้อมูล ประมวลผลโดย manage.py run_worker"""
+
+    STATUS_CHOICES = [
+        ("queued", "รอคิว"),
+        ("running", "กำลังทำงาน"),
+        ("done", "เสร็จแล้ว"),
+        ("failed", "ล้มเหลว"),
+    ]
+
+    # ชนิดงาน (ชื่อ handler ที่ลงทะเบียนใน helpdesk/jobs.py) เช่น "pdf.ticket_list"
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="background_jobs",
+    )
+
+    # งานที่ได้ผลลัพธ์เดียวกัน (ชนิด + ตัวกรอง + ขอบเขตผู้ใช้ + เวอร์ชันข้อมูล) ใช้ไฟล์ร่วมกัน
+    dedupe_key = models.CharField(max_length=64, blank=True, default="")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    progress = models.PositiveSmallIntegerField(default=0)  # 0-100
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    result_file = models.FileField(upload_to="exports/%Y/%m/", blank=True)
+    result_name = models.CharField(max_length=255, blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # worker หยิบงานที่รอคิวเก่าสุดก่อน
+            models.Index(
+                fields=["created_at"],
+                name="job_queued_created_idx",
+                condition=models.Q(status="queued"),
+            ),
+            models.Index(fields=["dedupe_key", "status"], name="job_dedupe_status_idx"),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in ("done", "failed")
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
@@ -0,0 +1,384 @@
+# helpdesk/notify.py — แจ้งผู้แจ้งงาน (อีเมล / LINE ฯลฯ) เมื่อมีคนรับงาน คอมเมนต์ หรือปิดงาน
+#                      + ส่ง Notification ถึงเจ้าหน้าที่ (เช่น SLA จาก sla.scan) ออกช่องทางเดียวกัน
+#
+#   1) view เรียก enqueue() (sla.scan เรียก enqueue_notifications()) ใน transaction เดียวกับการบันทึก
+#      → เขียนแค่ OutboxMessage ไม่ส่งเอง
+#      (rollback = ไม่มีข้อความ, commit แล้วไม่หายแม้ปลายทางล่ม) คำขอไม่ต้องรอการส่ง
+#   2) manage.py run_notifier เรียก deliver() เป็นรอบ ๆ:
+#      - ผู้รับที่มีข้อความถึงเวลาส่ง → รวมทุกข้อความที่ค้างของผู้รับนั้นเป็นข้อความเดียว (digest)
+#      - ส่งพร้อมกันไม่เกิน HELPDESK_NOTIFY_CONCURRENCY ราย
+#      - ส่งไม่สำเร็จ → ลองใหม่แบบ exponential backoff จนครบ HELPDESK_NOTIFY_MAX_ATTEMPTS ครั้ง
+#
+# ข้อความใหม่หน่วงไว้ HELPDESK_NOTIFY_DELAY_SECONDS ก่อนส่ง → เหตุการณ์ติด ๆ กัน (รับงาน + คอมเมนต์ + ปิดงาน)
+# ถึงผู้แจ้งเป็นข้อความเดียว
+#
+# ช่องทางส่ง (transport) เลือกได้ใน settings (ค่าเริ่มต้น: อีเมลผ่าน EMAIL_BACKEND ของ Django):
+#
+#   HELPDESK_NOTIFY_TRANSPORTS = {
+#       "email": {"BACKEND": "helpdesk.notify.EmailTransport"},
+#       "line": {
+#           "BACKEND": "helpdesk.notify.LineWebhookTransport",
+#           "OPTIONS": {"url": "https://line-gateway.example.com/push", "token": "..."},
+#       },
+#   }
+#
+# transport ต้องมี address(user, ticket) → ที่อยู่ปลายทาง ("" = ข้ามผู้ใช้นี้) และ send(address, subject, body)
+# (ticket=None = ข้อความถึงเจ้าหน้าที่ ไม่ใช่ผู้แจ้งของใบงาน → ใช้ที่อยู่ของผู้ใช้เอง)
+# LocMemTransport เก็บข้อความไว้ใน LocMemTransport.sent แทนการส่งจริง (ใช้ในการทดสอบ)
+
+import datetime as dt
+import json
+import logging
+import random
+import urllib.error
+import urllib.request
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Min, Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxMessage, UserProfile
+
+logger = logging.getLogger(__name__)
+
+MESSAGES = {
+    "claimed": "มีเจ้าหน้าที่รับงานแล้ว",
+    "commented": "มีคอมเมนต์ใหม่",
+    "closed": "ปิดงานแล้ว",
+}
+
+# ข้อความ sending ที่ไม่ขยับเกินเวลานี้ถือว่า worker ตายกลางทาง → คืนเข้าคิว (อาจส่งซ้ำได้ 1 ครั้ง)
+STALE_AFTER = dt.timedelta(minutes=10)
+
+DeliveryResult = namedtuple("DeliveryResult", "digests sent retried failed")
+
+
+def _setting(name, default):
+    return getattr(settings, f"HELPDESK_NOTIFY_{name}", default)
+
+
+def batch_size():
+    """จำนวนผู้รับสูงสุดต่อรอบ (HELPDESK_NOTIFY_BATCH)"""
+    return _setting("BATCH", 100)
+
+
+class UndeliverableError(Exception):
+    """ส่งถึงปลายทางนี้ไม่ได้แน่นอน (ที่อยู่ผิด ฯลฯ) → ไม่ต้องลองใหม่"""
+
+
+# ---------- transport ----------
+class EmailTransport:
+    """อีเมลถึง User.email ผ่าน EMAIL_BACKEND ของ Django"""
+
+    def __init__(self, from_email=None):
+        self.from_email = from_email
+
+    def address(self, user, ticket):
+        return user.email
+
+    def send(self, address, subject, body):
+        send_mail(subject, body, self.from_email, [address], fail_silently=False)
+
+
+class LineWebhookTransport:
+    """
+    POST JSON {"to": ..., "messages": [{"type": "text", "text": ...}]} ไปยัง webhook/เกตเวย์ LINE ขององค์กร
+
+    ปลายทางคือช่อง "เบอร์โทรหรือ Line ID" ของใบงาน (ว่าง/ถึงเจ้าหน้าที่ → ของโปรไฟล์ผู้ใช้) ตามที่ผู้ใช้กรอก
+    เกตเวย์เป็นผู้แปลงเป็นผู้รับจริงใน LINE
+    """
+
+    def __init__(self, url, token="", timeout=10):
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+
+    def address(self, user, ticket):
+        contact = (ticket.contact or "").strip() if ticket is not None else ""
+        if not contact:
+            try:
+                contact = user.profile.contact.strip()
+            except UserProfile.DoesNotExist:
+                contact = ""
+        return contact
+
+    def send(self, address, subject, body):
+        text = f"{subject}\n\n{body}".strip()[:5000]
+        payload = {"to": address, "messages": [{"type": "text", "text": text}]}
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json; charset=utf-8"},
+            method="POST",
+        )
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as exc:
+            # 4xx (ยกเว้น timeout / rate limit) = คำขอหรือผู้รับไม่ถูกต้อง ลองใหม่ก็ไม่ผ่าน
+            if 400 <= exc.code < 500 and exc.code not in (408, 429):
+                raise UndeliverableError(f"HTTP {exc.code}") from exc
+            raise
+
+
+class LocMemTransport:
+    """
+    เก็บข้อความไว้ใน LocMemTransport.sent [(address, subject, body), ...] (ตัวแทนในการทดสอบ)
+
+    fail_with: exception ที่จะโยนแทนการส่ง (จำลองปลายทางล่ม)
+    """
+
+    sent = []
+    fail_with = None
+
+    def __init__(self, fail_with=None):
+        if fail_with is not None:
+            self.fail_with = fail_with
+
+    def address(self, user, ticket):
+        return user.email or user.get_username()
+
+    def send(self, address, subject, body):
+        if self.fail_with is not None:
+            raise self.fail_with
+        LocMemTransport.sent.append((address, subject, body))
+
+
+_transports = {"instances": None}
+
+
+def get_transports():
+    """{ชื่อช่องทาง: transport} ตาม HELPDESK_NOTIFY_TRANSPORTS (สร้างครั้งเดียวต่อ process)"""
+    instances = _transports["instances"]
+    if instances is None:
+        config = _setting("TRANSPORTS", None)
+        if config is None:
+            config = {"email": {"BACKEND": "helpdesk.notify.EmailTransport"}}
+        instances = _transports["instances"] = {
+            channel: import_string(conf["BACKEND"])(**conf.get("OPTIONS", {}))
+            for channel, conf in config.items()
+        }
+    return instances
+
+
+def reset_transports():
+    """ให้สร้าง transport ใหม่ตาม settings ปัจจุบันในการใช้ครั้งถัดไป"""
+    _transports["instances"] = None
+
+
+# ---------- ฝั่ง view ----------
+def _not_before():
+    return timezone.now() + dt.timedelta(seconds=_setting("DELAY_SECONDS", 60))
+
+
+def _body(text, ticket_id):
+    """รายละเอียด + ลิงก์ใบงาน (ถ้าตั้ง HELPDESK_NOTIFY_BASE_URL)"""
+    base_url = _setting("BASE_URL", "").rstrip("/")
+    return "\n\n".join(
+        part for part in (
+            (text or "").strip(),
+            f"{base_url}{reverse('helpdesk:ticket_detail', args=[ticket_id])}" if base_url and ticket_id else "",
+        ) if part
+    )
+
+
+def enqueue(kind, tickets, actor=None, text=""):
+    """
+    เขียนข้อความแจ้งผู้แจ้งของ tickets ลง outbox (เรียกใน transaction เดียวกับการบันทึกใบงาน)
+
+    ไม่แจ้งเมื่อผู้แจ้งเป็นคนทำเอง ส่งทุกช่องทางที่ผู้แจ้งมีที่อยู่ คืนจำนวนข้อความที่เขียน
+    text: รายละเอียดเพิ่ม (เช่น ข้อความคอมเมนต์)
+    """
+    label = MESSAGES[kind]
+    if actor is not None:
+        label = f"{label} ({actor.get_full_name() or actor.get_username()})"
+    not_before = _not_before()
+    transports = get_transports()
+
+    messages = []
+    for ticket in tickets:
+        requester = ticket.requester
+        if not requester.is_active or (actor is not None and requester.pk == actor.pk):
+            continue
+        subject = f"ใบงาน #{ticket.pk} {ticket.title}: {label}"[:255]
+        body = _body(text, ticket.pk)
+        for channel, transport in transports.items():
+            address = (transport.address(requester, ticket) or "").strip()
+            if address:
+                messages.append(OutboxMessage(
+                    channel=channel, address=address[:255], recipient=requester, ticket_id=ticket.pk,
+                    kind=kind, subject=subject, body=body, next_attempt_at=not_before,
+                ))
+    OutboxMessage.objects.bulk_create(messages)
+    return len(messages)
+
+
+def enqueue_notifications(notifications):
+    """
+    Notification ที่เพิ่งสร้าง (ถึงเจ้าหน้าที่) → OutboxMessage ทุกช่องทางที่ผู้รับมีที่อยู่ คืนจำนวนข้อความที่เขียน
+
+    เรียกใน transaction เดียวกับการบันทึก Notification และเฉพาะรายการที่ยังไม่เคยบันทึก (กันส่งซ้ำ)
+    """
+    users = get_user_model().objects.in_bulk({n.recipient_id for n in notifications})
+    not_before = _not_before()
+    transports = get_transports()
+
+    messages = []
+    for notification in notifications:
+        user = users.get(notification.recipient_id)
+        if user is None or not user.is_active:
+            continue
+        body = _body("", notification.ticket_id)
+        for channel, transport in transports.items():
+            address = (transport.address(user, None) or "").strip()
+            if address:
+                messages.append(OutboxMessage(
+                    channel=channel, address=address[:255], recipient=user, ticket_id=notification.ticket_id,
+                    kind=notification.kind, subject=notification.message, body=body, next_attempt_at=not_before,
+                ))
+    OutboxMessage.objects.bulk_create(messages)
+    return len(messages)
+
+
+# ---------- ฝั่ง worker ----------
+def requeue_stale(now=None):
+    """คืนข้อความที่ worker หยิบไปแล้วไม่จบ (ตายกลางทาง) เข้าคิว คืนจำนวนที่คืน"""
+    return OutboxMessage.objects.filter(
+        status="sending", claimed_at__lt=(now or timezone.now()) - STALE_AFTER
+    ).update(status="pending", claimed_by="", claimed_at=None)
+
+
+def due_recipients(now):
+    """ผู้รับ {channel, address, due} ที่มีข้อความถึงเวลาส่ง เรียงตามข้อความที่ค้างนานสุด"""
+    # GROUP BY ผู้รับก่อนตัด limit → limit นับเป็นผู้รับ ไม่ใช่ข้อความ (ผู้รับเดียวมีหลายข้อความได้)
+    return (
+        OutboxMessage.objects.filter(status="pending", next_attempt_at__lte=now)
+        .values("channel", "address")
+        .annotate(due=Min("next_attempt_at"))
+        .order_by("due")
+    )
+
+
+def _claim(now, limit, token):
+    """
+    หยิบข้อความไปส่ง: ผู้รับที่มีข้อความถึงเวลาแล้ว (ไม่เกิน limit ราย) + ข้อความใหม่อื่นของผู้รับนั้น
+
+    ใช้ UPDATE ... WHERE status='pending' แบบมีเงื่อนไขเหมือน jobs.claim_next → worker หลายตัวไม่หยิบซ้ำ
+    """
+    pending = OutboxMessage.objects.filter(status="pending")
+    targets = {(row["channel"], row["address"]) for row in due_recipients(now)[:limit]}
+    if not targets:
+        return []
+
+    # ข้อความที่ยังรอลองใหม่ (backoff) ไม่ดึงมาก่อนเวลา
+    rows = (
+        pending.filter(address__in={address for _, address in targets})
+        .filter(Q(next_attempt_at__lte=now) | Q(attempts=0))
+        .values_list("id", "channel", "address")
+    )
+    ids = [pk for pk, channel, address in rows if (channel, address) in targets]
+    OutboxMessage.objects.filter(id__in=ids, status="pending").update(
+        status="sending", claimed_by=token, claimed_at=now
+    )
+    return list(
+        OutboxMessage.objects.filter(id__in=ids, status="sending", claimed_by=token).order_by("created_at", "id")
+    )
+
+
+def _digest(messages):
+    """ข้อความหลายรายการของผู้รับเดียวกัน → (subject, body) เดียว"""
+    if len(messages) == 1:
+        return messages[0].subject, messages[0].body
+    subject = f"อัปเดตใบงาน {len(messages)} รายการ"
+    body = "\n\n---\n\n".join(f"{m.subject}\n{m.body}".strip() for m in messages)
+    return subject, body
+
+
+def _send(transport, address, messages):
+    """ส่ง digest หนึ่งราย (รันใน thread) คืน None หรือ exception ที่เกิด"""
+    if transport is None:
+        return UndeliverableError("ไม่ได้ตั้งค่าช่องทางนี้ใน HELPDESK_NOTIFY_TRANSPORTS")
+    try:
+        transport.send(address, *_digest(messages))
+    except Exception as exc:
+        return exc
+    return None
+
+
+def backoff(attempt):
+    """เวลารอก่อนลองครั้งถัดไป: RETRY_BASE_SECONDS × 2^(ครั้งที่ล้มเหลว-1) ไม่เกิน RETRY_MAX_SECONDS (+ สุ่ม ≤10%)"""
+    delay = min(_setting("RETRY_MAX_SECONDS", 3600), _setting("RETRY_BASE_SECONDS", 30) * 2 ** (attempt - 1))
+    # กระจายเวลา กันผู้รับจำนวนมากที่ล้มพร้อมกันกลับมาลองใหม่พร้อมกัน
+    return dt.timedelta(seconds=delay + random.uniform(0, delay / 10))
+
+
+def deliver(now=None, limit=None):
+    """
+    ส่งข้อความที่ถึงเวลาหนึ่งรอบ คืน DeliveryResult (digest ที่ส่งสำเร็จ, จำนวนข้อความ ส่งแล้ว/รอลองใหม่/ล้มเหลว)
+
+    การส่งจริงอยู่นอก transaction (ปลายทางช้าไม่ล็อกตาราง) — ฐานข้อมูลใช้เฉพาะใน thread หลัก
+    """
+    now = now or timezone.now()
+    limit = limit or batch_size()
+    # ทุกรอบ ไม่ใช่แค่ตอนเริ่ม worker → ข้อความของ worker อื่นที่ตายกลางทางกลับเข้าคิวแม้ worker นี้รันค้างไว้นาน
+    requeue_stale(now)
+    claimed = _claim(now, limit, uuid.uuid4().hex)
+    if not claimed:
+        return DeliveryResult(0, 0, 0, 0)
+
+    digests = {}
+    for message in claimed:
+        digests.setdefault((message.channel, message.address), []).append(message)
+
+    transports = get_transports()
+    with ThreadPoolExecutor(max_workers=_setting("CONCURRENCY", 4)) as pool:
+        futures = {
+            key: pool.submit(_send, transports.get(key[0]), key[1], messages)
+            for key, messages in digests.items()
+        }
+        errors = {key: future.result() for key, future in futures.items()}
+
+    finished = timezone.now()
+    max_attempts = _setting("MAX_ATTEMPTS", 5)
+    delivered = 0
+    sent, retry, failed = [], [], []
+    for key, messages in digests.items():
+        error = errors[key]
+        if error is None:
+            delivered += 1
+            sent += [m.pk for m in messages]
+            continue
+        logger.warning("cannot deliver notification to %s:%s: %r", key[0], key[1], error)
+        # ทั้ง digest ลองใหม่พร้อมกัน (นับตามข้อความที่ลองมามากสุด) → รอบหน้ายังรวมเป็นข้อความเดียว
+        retry_at = finished + backoff(max(m.attempts for m in messages) + 1)
+        for message in messages:
+            message.attempts += 1
+            message.last_error = f"{type(error).__name__}: {error}"[:1000]
+            message.claimed_by = ""
+            message.claimed_at = None
+            if isinstance(error, UndeliverableError) or message.attempts >= max_attempts:
+                message.status = "failed"
+                failed.append(message)
+            else:
+                message.status = "pending"
+                message.next_attempt_at = retry_at
+                retry.append(message)
+
+    with transaction.atomic():
+        OutboxMessage.objects.filter(id__in=sent).update(
+            status="sent", sent_at=finished, claimed_by="", claimed_at=None, last_error=""
+        )
+        OutboxMessage.objects.bulk_update(
+            retry + failed, ["status", "attempts", "next_attempt_at", "last_error", "claimed_by", "claimed_at"]
+        )
+    return DeliveryResult(delivered, len(sent), len(retry), len(failed))
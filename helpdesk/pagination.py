@@ -0,0 +1,220 @@
+# helpdesk/pagination.py — แบ่งหน้าแบบ keyset (cursor) แทน OFFSET
+
+import datetime as dt
+import hashlib
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+_CURSOR_SALT = "helpdesk.pagination.cursor"
+
+
+class InvalidCursor(ValueError):
+    """cursor token ผิดรูปแบบ/ถูกแก้ไข (page(..., strict=True))"""
+
+
+class KeysetPage:
+    """ผลลัพธ์ 1 หน้า + cursor ไปหน้าถัดไป/ก่อนหน้า (token แบบ opaque)"""
+
+    def __init__(self, object_list, next_cursor=None, prev_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Seek pagination ตามลำดับ ordering (รูปแบบเดียวกับ order_by เช่น "-updated_at")
+
+    - ทุกหน้าใช้ WHERE (k1, k2, ...) > ค่าแถวสุดท้าย แทน OFFSET → หน้าลึก ๆ ก็เร็วเท่าหน้าแรก
+    - คอลัมน์สุดท้ายของ ordering ต้อง unique (เช่น id) และทุกคอลัมน์ต้องไม่เป็น NULL
+    - ฟิลด์ใน ordering ที่เป็น annotation (เช่น is_closed) ต้อง annotate มาแล้วใน queryset
+    """
+
+    def __init__(self, ordering, page_size=50):
+        self.ordering = list(ordering)
+        self.page_size = page_size
+
+    # ---------- cursor token ----------
+    def _fields(self):
+        return [(o.lstrip("-"), o.startswith("-")) for o in self.ordering]
+
+    def encode_cursor(self, obj, direction):
+        values = [_encode_value(getattr(obj, name)) for name, _ in self._fields()]
+        payload = json.dumps({"v": values, "d": direction})
+        return signing.dumps(payload, salt=_CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, token):
+        """คืน (values, direction) หรือ None ถ้า token ไม่ถูกต้อง/ถูกแก้ไข"""
+        if not token:
+            return None
+        try:
+            data = json.loads(signing.loads(token, salt=_CURSOR_SALT))
+            values = data["v"]
+            direction = data["d"]
+        except (signing.BadSignature, ValueError, KeyError, TypeError):
+            return None
+        if direction not in ("next", "prev") or len(values) != len(self.ordering):
+            return None
+        return [_decode_value(v) for v in values], direction
+
+    # ---------- query ----------
+    def _seek_q(self, values, backwards):
+        """(a, b, c) หลังแถว cursor ตามทิศของแต่ละคอลัมน์ (รองรับ asc/desc ปนกัน)"""
+        condition = Q()
+        equal_so_far = Q()
+        for (name, desc), value in zip(self._fields(), values):
+            after = "lt" if desc != backwards else "gt"
+            condition |= equal_so_far & Q(**{f"{name}__{after}": value})
+            equal_so_far &= Q(**{name: value})
+        return condition
+
+    def _reversed_ordering(self):
+        return [o[1:] if o.startswith("-") else f"-{o}" for o in self.ordering]
+
+    def page(self, queryset, token=None, strict=False):
+        """
+        หน้าถัดจาก token (None = หน้าแรก)
+
+        token ไม่ถูกต้อง: strict → InvalidCursor (API: client ที่ตาม next ต้องรู้ ไม่วนหน้าแรกซ้ำ)
+        ไม่ strict → เริ่มหน้าแรก (หน้าเว็บ: ลิงก์เก่า/พิมพ์ผิดยังเปิดได้)
+        """
+        cursor = self.decode_cursor(token)
+        if cursor is None and token and strict:
+            raise InvalidCursor(token)
+        size = self.page_size
+        values, direction = cursor if cursor is not None else (None, "next")
+        backwards = direction == "prev"
+
+        rows = self._fetch(queryset, values, backwards, size + 1)
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if backwards:
+            # ย้อนกลับ: อ่านเรียงกลับด้านแล้วกลับลำดับคืน
+            rows.reverse()
+            prev_cursor = self.encode_cursor(rows[0], "prev") if has_more and rows else None
+            next_cursor = self.encode_cursor(rows[-1], "next") if rows else None
+        else:
+            next_cursor = self.encode_cursor(rows[-1], "next") if has_more and rows else None
+            prev_cursor = self.encode_cursor(rows[0], "prev") if cursor is not None and rows else None
+        return KeysetPage(rows, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+    def _fetch(self, queryset, values, backwards, limit):
+        """แถวถัดจาก values (None = เริ่มต้น) ตามทิศที่อ่าน ไม่เกิน limit แถว"""
+        if values is not None:
+            queryset = queryset.filter(self._seek_q(values, backwards))
+        ordering = self._reversed_ordering() if backwards else self.ordering
+        return list(queryset.order_by(*ordering)[:limit])
+
+
+class PartitionedKeysetPaginator(KeysetPaginator):
+    """
+    KeysetPaginator ที่คอลัมน์แรกของ ordering เป็นกลุ่ม (เช่น is_closed: งานเปิดก่อน แล้วงานปิด)
+
+    อ่านทีละกลุ่มด้วยเงื่อนไขของกลุ่มนั้น เรียงตามคอลัมน์ที่เหลือ → แต่ละกลุ่มเป็น range scan ของ
+    partial index ของกลุ่ม แทน ORDER BY CASE ... ที่ฐานข้อมูลต้อง sort ทุกแถวก่อนได้หน้าแรก
+    (หน้าที่คร่อมสองกลุ่มใช้ 2 query)
+
+    partitions: [(ค่าของคอลัมน์แรก, Q ของกลุ่ม), ...] ตามลำดับที่แสดง
+    queryset ยังต้อง annotate คอลัมน์แรกไว้ (ใช้สร้าง cursor)
+    """
+
+    def __init__(self, ordering, partitions, page_size=50):
+        super().__init__(ordering, page_size)
+        self.partitions = list(partitions)
+        self._within = KeysetPaginator(self.ordering[1:], page_size)
+
+    def partition_querysets(self, queryset):
+        """queryset หน้าแรกของแต่ละกลุ่ม [(ค่าของกลุ่ม, queryset), ...] (ใช้ดู EXPLAIN)"""
+        return [
+            (key, queryset.filter(condition).order_by(*self._within.ordering)[: self.page_size + 1])
+            for key, condition in self.partitions
+        ]
+
+    def _fetch(self, queryset, values, backwards, limit):
+        partitions = self.partitions[::-1] if backwards else self.partitions
+        if values is not None:
+            keys = [key for key, _ in partitions]
+            if values[0] not in keys:
+                return []
+            partitions = partitions[keys.index(values[0]):]
+
+        rows = []
+        for i, (key, condition) in enumerate(partitions):
+            # กลุ่มแรกเริ่มต่อจาก cursor กลุ่มถัดไปเริ่มจากต้นกลุ่ม
+            start = values[1:] if values is not None and i == 0 else None
+            rows += self._within._fetch(queryset.filter(condition), start, backwards, limit - len(rows))
+            if len(rows) >= limit:
+                break
+        return rows
+
+
+def _encode_value(value):
+    # เก็บ datetime แบบเต็มความละเอียด (DjangoJSONEncoder ตัดเหลือ millisecond → cursor เพี้ยน)
+    if isinstance(value, dt.datetime):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, str):
+        parsed = parse_datetime(value)
+        if parsed is not None:
+            return parsed
+    return value
+
+
+def page_links(request, page, param="cursor"):
+    """URL (query string) ของหน้าถัดไป/ก่อนหน้า โดยคงตัวกรองอื่นใน GET ไว้"""
+    links = {}
+    for name, token in (("next_url", page.next_cursor), ("prev_url", page.prev_cursor)):
+        if token is None:
+            links[name] = None
+            continue
+        params = request.GET.copy()
+        params[param] = token
+        links[name] = "?" + params.urlencode()
+    first = request.GET.copy()
+    first.pop(param, None)
+    links["first_url"] = "?" + first.urlencode()
+    return links
+
+
+def approximate_count(queryset, key=None, timeout=None):
+    """
+    จำนวนแถวแบบแคช (ค่าอาจช้ากว่าความจริงไม่เกิน timeout วินาที)
+
+    key: กุญแจแคช (เช่น TicketFilter.cache_key(...)); ถ้าไม่ระบุจะใช้ hash ของ SQL
+
+    คืน None ถ้าปิดการแสดงยอดรวมด้วย settings.HELPDESK_LIST_COUNT = False
+    """
+    if not getattr(settings, "HELPDESK_LIST_COUNT", True):
+        return None
+    if timeout is None:
+        timeout = getattr(settings, "HELPDESK_LIST_COUNT_TIMEOUT", 60)
+    if key is None:
+        sql = str(queryset.order_by().query)
+        key = "helpdesk:count:" + hashlib.sha1(sql.encode("utf-8")).hexdigest()
+    return cache.get_or_set(key, queryset.order_by().count, timeout=timeout)
@@ -0,0 +1,84 @@
+# helpdesk/queries.py — queryset กลางสำหรับหน้ารายการ (list / dashboard / PDF / API)
+
+from django.db.models import Case, IntegerField, Q, When
+
+from . import roles
+from .models import Ticket
+
+# สถานะที่ถือว่า "จบงาน" (ห้ามแก้ไข)
+CLOSED_CODES = ["closed"]
+
+# ลำดับ "งานที่ยังไม่ปิดก่อน แล้วล่าสุดก่อน" (ใช้กับ PartitionedKeysetPaginator — ดู order_open_first)
+OPEN_FIRST_ORDERING = ["is_closed", "-updated_at", "-id"]
+
+# กลุ่มของ OPEN_FIRST_ORDERING: (is_closed, เงื่อนไข) — เงื่อนไขเขียนแบบเดียวกับ partial index
+# ticket_open_updated_idx / ticket_closed_updated_idx (status = ... ไม่ใช่ IN → SQLite จับคู่กับ index ได้)
+OPEN_FIRST_PARTITIONS = [
+    (0, ~Q(status="closed")),
+    (1, Q(status="closed")),
+]
+
+# คอลัมน์ที่ template รายการใช้จริง (ticket_list.html, dashboard.html, ticket_list_pdf.html)
+# ผู้ใช้ใช้ผ่าน filter display_name → ต้องมี first_name / last_name / username
+_USER_FIELDS = ("username", "first_name", "last_name")
+
+TICKET_LISTING_FIELDS = (
+    "id",
+    "title",
+    "status",
+    "created_at",
+    "updated_at",
+    "category",
+    "category__name",
+    "requester",
+    *(f"requester__{f}" for f in _USER_FIELDS),
+    "assignee",
+    *(f"assignee__{f}" for f in _USER_FIELDS),
+)
+
+
+def ticket_listing_queryset(qs, extra_fields=()):
+    """
+    JOIN requester / assignee / category ใน query เดียว และดึงเฉพาะคอลัมน์ที่แสดงผล
+    → จำนวน query ต่อหน้าคงที่ ไม่ขึ้นกับจำนวนแถว (ไม่มี N+1 ใน template)
+
+    extra_fields: คอลัมน์เพิ่มเติม (เช่น description ที่ API ขอผ่าน ?fields=)
+    """
+    return qs.select_related("requester", "assignee", "category").only(
+        *TICKET_LISTING_FIELDS, *extra_fields
+    )
+
+
+def order_open_first(qs):
+    """ให้ Ticket ที่ยังไม่ปิดอยู่บนสุดเสมอ แล้วค่อยเรียงล่าสุดก่อน (annotate is_closed)"""
+    return qs.annotate(
+        is_closed=Case(
+            When(status__in=CLOSED_CODES, then=1),
+            default=0,
+            output_field=IntegerField(),
+        )
+    ).order_by(*OPEN_FIRST_ORDERING)
+
+
+def ticket_list_queryset(user):
+    """
+    ใบงานที่ผู้ใช้เห็นในหน้ารายการ / PDF รายการ
+    IT: เห็นทุกงาน, ผู้ใช้ทั่วไป: เห็นเฉพาะที่ตัวเอง 'ร้องขอ' (requester)
+    """
+    if roles.is_it_staff(user):
+        return Ticket.objects.all()
+    return Ticket.objects.filter(requester=user)
+
+
+def can_view_ticket(user, ticket):
+    """สิทธิ์การมองเห็นใบงาน (หน้ารายละเอียด / ไฟล์แนบ / API): IT หรือ requester หรือ assignee"""
+    return (
+        roles.is_it_staff(user)
+        or ticket.requester_id == user.id
+        or ticket.assignee_id == user.id
+    )
+
+
+def list_scope(user):
+    """ขอบเขตข้อมูลของหน้า ticket_list (ใช้เป็นส่วนหนึ่งของกุญแจแคช/ไฟล์ export)"""
+    return "all" if roles.is_it_staff(user) else f"requester:{user.pk}"
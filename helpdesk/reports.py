@@ -0,0 +1,149 @@
+# helpdesk/reports.py — ข้อมูลรายงานสรุปใบงานรายปี (ใช้ร่วม HTML/PDF)
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import catalog, sla
+from .models import Ticket
+
+# ชื่อเดือนย่อภาษาไทย สำหรับแสดงผลในรายงาน
+MONTH_LABELS_TH = [
+    "ม.ค.", "ก.พ.", "มี.ค.", "เม.ย.",
+    "พ.ค.", "มิ.ย.", "ก.ค.", "ส.ค.",
+    "ก.ย.", "ต.ค.", "พ.ย.", "ธ.ค.",
+]
+
+# ขอบเขตข้อมูลที่ใช้สรุป: IT เห็นทั้งหมด, ผู้ใช้ทั่วไปเห็นเฉพาะงานของตัวเอง
+SCOPE_ALL = "all"
+
+_CACHE_PREFIX = "helpdesk:year_summary"
+
+
+def _generation_key(name):
+    return f"{_CACHE_PREFIX}:gen:{name}"
+
+
+def _generation(name):
+    """เลข generation ของปี (หรือ "categories") — เปลี่ยนเมื่อข้อมูลที่เกี่ยวข้องถูกบันทึก/ลบ"""
+    return cache.get_or_set(_generation_key(name), 1, timeout=None)
+
+
+def _bump(name):
+    key = _generation_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+def invalidate_year(year):
+    """ทำให้แคชของปี year ทุกขอบเขต (visibility) หมดอายุทันที"""
+    _bump(year)
+
+
+def invalidate_categories():
+    """หมวดงานเปลี่ยน (เพิ่ม/ลบ/เปลี่ยนชื่อ) กระทบหัวแถวของรายงานทุกปี"""
+    _bump("categories")
+
+
+def data_version(year):
+    """เวอร์ชันข้อมูลของรายงานปี year (เปลี่ยนทุกครั้งที่แคชถูก invalidate)"""
+    return (_generation(year), _generation("categories"))
+
+
+def summary_scope(user, is_it_staff):
+    """แปลงผู้ใช้เป็น scope key ของแคช"""
+    if user is None or is_it_staff:
+        return SCOPE_ALL
+    return f"user:{user.pk}"
+
+
+def _scoped_queryset(year, scope):
+    qs = Ticket.objects.filter(created_at__year=year)
+    if scope != SCOPE_ALL:
+        user_id = int(scope.split(":", 1)[1])
+        qs = qs.filter(Q(requester_id=user_id) | Q(assignee_id=user_id))
+    return qs
+
+
+def _compute_year_summary(year, scope):
+    """
+    นับจำนวนใบงานด้วย query เดียว: GROUP BY (เดือน, หมวด)
+    แล้วค่อย pivot เป็นตาราง หมวด × เดือน ใน Python
+    """
+    grouped = (
+        _scoped_queryset(year, scope)
+        .annotate(month=TruncMonth("created_at"))
+        .values("month", "category_id")
+        .annotate(c=Count("id"))
+        .order_by()
+    )
+
+    # matrix[category_id][month_index] = count (category_id=None = ไม่ระบุหมวด)
+    matrix = {}
+    month_totals = [0] * 12
+    for r in grouped:
+        month = r["month"]
+        if month is None:
+            continue
+        idx = month.month - 1
+        matrix.setdefault(r["category_id"], [0] * 12)[idx] += r["c"]
+        month_totals[idx] += r["c"]
+
+    rows = []
+    grand_total = 0
+    for cat in catalog.categories():
+        monthly = matrix.get(cat.id, [0] * 12)
+        row_total = sum(monthly)
+        grand_total += row_total
+        rows.append({
+            "category": cat,
+            "monthly": monthly,
+            "row_total": row_total,
+        })
+
+    # เวลาตอบสนอง/รับงาน/ปิดงาน: เฉลี่ยจากค่าที่คำนวณเก็บไว้แล้ว (helpdesk/sla.py)
+    tickets = _scoped_queryset(year, scope)
+    status_labels = dict(Ticket.STATUS_CHOICES)
+    time_in_status = sla.time_in_status(tickets)
+
+    return {
+        "months": MONTH_LABELS_TH,
+        "rows": rows,
+        "month_totals": month_totals,
+        "grand_total": grand_total,
+        "sla": sla.summary(tickets),
+        "time_in_status": [
+            {"status": code, "label": status_labels[code], "avg": time_in_status[code]}
+            for code, _ in Ticket.STATUS_CHOICES
+            if time_in_status.get(code) is not None
+        ],
+    }
+
+
+def build_year_summary(year, scope=SCOPE_ALL):
+    """
+    คืนข้อมูลที่ใช้แสดงตารางสรุปใบงานทั้งปี (แคชตาม (ปี, scope))
+
+    - ปีที่ผ่านมาแล้ว: แคชไม่มีวันหมดอายุ (ข้อมูลไม่เปลี่ยน)
+    - ปีปัจจุบัน: แคชถูกล้างผ่าน signal เมื่อมีการบันทึก/ลบ Ticket
+    """
+    key = (
+        f"{_CACHE_PREFIX}:{year}:{scope}"
+        f":{_generation(year)}:{_generation('categories')}"
+    )
+    summary = cache.get(key)
+    if summary is None:
+        summary = _compute_year_summary(year, scope)
+        cache.set(key, summary, timeout=None)
+    return summary
+
+
+def ticket_years(ticket):
+    """ปีที่ Ticket นี้มีผลต่อรายงาน (ปีที่สร้าง + ปีปัจจุบัน)"""
+    years = {timezone.localdate().year}
+    if ticket.created_at:
+        years.add(timezone.localtime(ticket.created_at).year)
+    return years
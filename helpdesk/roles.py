@@ -0,0 +1,112 @@
+# helpdesk/roles.py — ใครคือเจ้าหน้าที่ IT (ใช้ร่วม views / forms / context processor)
+#
+# เจ้าหน้าที่ IT = ผู้ใช้ที่ active และเป็น superuser หรือมีสิทธิ์ helpdesk.change_ticket
+# (ให้ตรงหรือผ่านกลุ่ม) — เกณฑ์เดียวกับ user.has_perm() ของ ModelBackend
+#
+#   - it_staff_ids() : set ของ user id ทั้งหมด แคชข้ามคำขอ
+#   - is_it_staff()  : ผลของผู้ใช้แต่ละคน จำไว้บน object ของผู้ใช้ตลอดคำขอนั้น
+#   - it_contact()   : ช่องทางติดต่อ IT ที่แสดงท้ายทุกหน้า แคชข้ามคำขอเช่นกัน
+#
+# แคชถูกล้างผ่าน signal ใน helpdesk/signals.py เมื่อผู้ใช้/กลุ่ม/สิทธิ์เปลี่ยน
+# แต่ signal ล้างได้แค่แคชของ process ที่รับคำขอนั้น (LocMemCache แยกต่อ process)
+# → เก็บไว้ไม่เกิน HELPDESK_ROLES_CACHE_TIMEOUT วินาที (ค่าเริ่มต้น 60): ถอนสิทธิ์แล้ว
+#   worker อื่นเลิกถือว่าเป็น IT ภายในเวลานี้ ไม่ค้างไปตลอด
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import UserProfile
+
+IT_PERMISSION_APP = "helpdesk"
+IT_PERMISSION_CODENAME = "change_ticket"
+
+_CACHE_KEY = "helpdesk:roles:it_staff_ids"
+_CONTACT_CACHE_KEY = "helpdesk:roles:it_contact"
+_MEMO_ATTR = "_helpdesk_is_it_staff"
+
+
+def _cache_timeout():
+    return getattr(settings, "HELPDESK_ROLES_CACHE_TIMEOUT", 60)
+
+
+def _compute_it_staff_ids():
+    User = get_user_model()
+    has_perm = Q(
+        user_permissions__codename=IT_PERMISSION_CODENAME,
+        user_permissions__content_type__app_label=IT_PERMISSION_APP,
+    ) | Q(
+        groups__permissions__codename=IT_PERMISSION_CODENAME,
+        groups__permissions__content_type__app_label=IT_PERMISSION_APP,
+    )
+    ids = (
+        User.objects.filter(is_active=True)
+        .filter(Q(is_superuser=True) | has_perm)
+        .values_list("id", flat=True)
+        .distinct()
+    )
+    return frozenset(ids)
+
+
+def it_staff_ids():
+    """user id ของเจ้าหน้าที่ IT ทั้งหมด (frozenset, แคชจนกว่าจะ invalidate หรือครบ HELPDESK_ROLES_CACHE_TIMEOUT)"""
+    ids = cache.get(_CACHE_KEY)
+    if ids is None:
+        ids = _compute_it_staff_ids()
+        cache.set(_CACHE_KEY, ids, timeout=_cache_timeout())
+    return ids
+
+
+def invalidate():
+    """ผู้ใช้/กลุ่ม/สิทธิ์เปลี่ยน → คำนวณรายชื่อ IT (และช่องทางติดต่อ) ใหม่ในครั้งถัดไป"""
+    cache.delete_many([_CACHE_KEY, _CONTACT_CACHE_KEY])
+
+
+def invalidate_contact():
+    """โปรไฟล์ผู้ใช้เปลี่ยน → อ่านช่องทางติดต่อ IT ใหม่"""
+    cache.delete(_CONTACT_CACHE_KEY)
+
+
+def is_it_staff(user):
+    """
+    ผู้ใช้คนนี้เป็นเจ้าหน้าที่ IT หรือไม่
+
+    ผลลัพธ์ถูกจำไว้บน object ของผู้ใช้ (request.user อยู่ได้แค่คำขอเดียว)
+    จึงเรียกซ้ำได้หลายครั้งต่อคำขอโดยไม่ต้องค้นฐานข้อมูล/แคชใหม่
+    """
+    if user is None or not user.is_authenticated:
+        return False
+    memo = getattr(user, _MEMO_ATTR, None)
+    if memo is None:
+        memo = user.is_superuser or user.pk in it_staff_ids()
+        setattr(user, _MEMO_ATTR, memo)
+    return memo
+
+
+def it_staff_queryset():
+    """เจ้าหน้าที่ IT เรียงตามชื่อ (สำหรับดรอปดาวน์เลือกผู้รับผิดชอบ)"""
+    User = get_user_model()
+    return User.objects.filter(id__in=it_staff_ids()).order_by(
+        "first_name", "last_name", "username"
+    )
+
+
+def it_contact():
+    """
+    ช่องทางติดต่อ IT 1 คน (กรณีองค์กรมีคนเดียว) — id น้อยสุดในรายชื่อ IT
+
+    อ่านอย่างเดียว: ไม่มีโปรไฟล์ = ไม่มีช่องทางติดต่อ (ไม่สร้างโปรไฟล์ระหว่าง GET)
+    """
+    contact = cache.get(_CONTACT_CACHE_KEY)
+    if contact is None:
+        ids = it_staff_ids()
+        contact = ""
+        if ids:
+            contact = (
+                UserProfile.objects.filter(user_id=min(ids))
+                .values_list("contact", flat=True)
+                .first()
+            ) or ""
+        cache.set(_CONTACT_CACHE_KEY, contact, timeout=_cache_timeout())
+    return contact
@@ -0,0 +1,354 @@
+# helpdesk/search.py — ค้นหาใบงานด้วย full-text index (แทน icontains ที่ต้องสแกนทั้งตาราง)
+#
+# ข้อความส่วนใหญ่เป็นภาษาไทย (ไม่มีช่องว่างระหว่างคำ) จึงใช้ index แบบ character trigram
+# แทนการตัดคำ: ค้นหา "พิมพ์" เจอใน "เครื่องพิมพ์เสีย" ได้โดยไม่ต้องมีตัวตัดคำภาษาไทย
+#
+#   - SQLite     : FTS5 virtual table (tokenize='trigram')
+#   - PostgreSQL : ตารางเอกสาร + GIN index (pg_trgm)
+#   - อื่น ๆ / ไม่มี index : ถอยกลับไปใช้ icontains แบบเดิม
+#
+# การจัดอันดับ 2 ขั้น:
+#   1) query เดียวใน index: แถวที่ตรงทั้งหมด (ภายใน queryset ที่กรองแล้ว) เรียงตามคะแนนของ index
+#      (FTS5 rank / pg_trgm word_similarity) แล้ว LIMIT HELPDESK_SEARCH_RANK_WINDOW
+#      → คะแนนคิดครั้งเดียวขณะค้น ไม่ใช่ bm25()/similarity() ต่อแถวที่ต้องค้น index ซ้ำทุกแถว
+#   2) เรียงชุดนั้นด้วยจำนวนคำที่เจอ (ใน title หนักกว่า) ด้วยฟังก์ชันสตริงธรรมดา
+#   window จำกัดแค่ว่าใบไหนได้คิดคะแนน ไม่ได้ตัดผลลัพธ์: ใบที่ตรงแต่อยู่นอก window
+#   ต่อท้ายชุดที่จัดอันดับแล้ว เรียงตาม -updated_at (เลื่อนหน้าไปถึงได้ทุกใบ)
+#
+# เอกสารของแต่ละใบงาน = title + description + คอมเมนต์ที่ไม่ใช่ internal
+# (อัปเดตทีละใบผ่าน signal ใน helpdesk/signals.py)
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Case, ExpressionWrapper, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Length, Lower, Replace
+
+from .models import Ticket, TicketComment
+
+SEARCH_TABLE = "helpdesk_ticket_search"
+
+# trigram index ใช้ได้กับคำที่ยาว >= 3 ตัวอักษรเท่านั้น คำที่สั้นกว่าใช้ icontains
+MIN_TERM_LENGTH = 3
+
+# ลำดับผลค้นหา: search_rank น้อย = เกี่ยวข้องมาก (ทุก backend) → ใช้กับ KeysetPaginator ได้
+SEARCH_ORDERING = ["search_rank", "-updated_at", "-id"]
+
+# search_rank ของใบที่ตรงแต่อยู่นอก window (คะแนนจริงเป็น 0 หรือติดลบเสมอ → อยู่ท้ายสุด)
+UNRANKED = 1
+
+# คำที่เจอในชื่อเรื่องมีน้ำหนักมากกว่าในรายละเอียด
+TITLE_WEIGHT = 10
+
+
+def _terms(q):
+    return [t for t in (q or "").split() if t]
+
+
+def _occurrences(field, term):
+    """จำนวนครั้งที่ term (ตัวพิมพ์เล็ก) ปรากฏในฟิลด์ — (len(f) - len(replace(f, term, ''))) / len(term)"""
+    text = Lower(field)
+    removed = Length(text) - Length(Replace(text, Value(term), Value("")))
+    return removed / len(term)
+
+
+def _ids_sql(qs):
+    """(sql, params) ของ SELECT id จาก queryset — ใช้เป็น subquery ใน SQL ของ index"""
+    return qs.order_by().values("id").query.get_compiler(using=qs.db).as_sql()
+
+
+def build_document(ticket_ids):
+    """คืน {ticket_id: (title, body)} สำหรับเขียนลง index (2 query ต่อชุด)"""
+    docs = {
+        t["id"]: [t["title"] or "", [t["description"] or ""]]
+        for t in Ticket.objects.filter(id__in=ticket_ids).values("id", "title", "description")
+    }
+    comments = (
+        TicketComment.objects.filter(ticket_id__in=list(docs), internal=False)
+        .order_by("ticket_id", "created_at")
+        .values_list("ticket_id", "body")
+    )
+    for ticket_id, body in comments:
+        docs[ticket_id][1].append(body or "")
+    return {tid: (title, "\n".join(parts)) for tid, (title, parts) in docs.items()}
+
+
+class IcontainsBackend:
+    """ค้นหาแบบเดิม (สแกนทั้งตาราง) — ใช้เมื่อฐานข้อมูลไม่มี full-text index"""
+
+    vendor = None
+
+    def is_available(self):
+        return True
+
+    def _term_q(self, term):
+        comment_ids = TicketComment.objects.filter(
+            internal=False, body__icontains=term
+        ).values("ticket_id")
+        return (
+            Q(title__icontains=term)
+            | Q(description__icontains=term)
+            | Q(id__in=comment_ids)
+        )
+
+    def filter(self, qs, q):
+        for term in _terms(q):
+            qs = qs.filter(self._term_q(term))
+        return qs
+
+    def candidates(self, qs, q, window):
+        """id ของใบงานที่เกี่ยวข้องที่สุดไม่เกิน window ใบใน qs ตามคะแนนของ index (None = ทุกแถวใน qs)"""
+        # ไม่มี index → ไม่มีคะแนนถูก ๆ ให้เลือกก่อน (และสแกนทั้งตารางอยู่แล้ว) จัดอันดับทุกแถว
+        return None
+
+    def rank(self, qs, q):
+        """
+        annotate search_rank แล้วเรียงตาม SEARCH_ORDERING
+
+        คะแนน = จำนวนครั้งที่คำค้นปรากฏ (ใน title นับ TITLE_WEIGHT เท่า) คิดเป็นค่าติดลบ
+        คำนวณด้วยฟังก์ชันสตริงธรรมดา (ใช้ได้ทุกฐานข้อมูล) เฉพาะ settings.HELPDESK_SEARCH_RANK_WINDOW ใบ
+        ที่ index ให้คะแนนสูงสุดจากแถวที่ตรงทั้งหมด (0 = ทุกแถว) ใบที่เหลือได้ UNRANKED
+        และตามหลังชุดนั้นโดยเรียงตาม -updated_at
+        """
+        # คำกว้าง ๆ อาจตรงเป็นหมื่นใบ การคิดคะแนนสตริงทุกแถวจะช้า → ให้ index เลือกมาก่อน 1 query
+        # แล้วคิดคะแนนเฉพาะ id ชุดนั้นใน CASE (ไม่ต้องค้น index ซ้ำทุกหน้า)
+        window = getattr(settings, "HELPDESK_SEARCH_RANK_WINDOW", 1000)
+        ids = self.candidates(qs, q, window) if window else None
+
+        score = Value(0)
+        for term in sorted({t.lower() for t in _terms(q)}):
+            score = score + TITLE_WEIGHT * _occurrences("title", term) + _occurrences("description", term)
+        search_rank = ExpressionWrapper(-score, output_field=IntegerField())
+        if ids is not None:
+            search_rank = Case(
+                When(id__in=ids, then=search_rank), default=Value(UNRANKED), output_field=IntegerField()
+            )
+        return qs.annotate(search_rank=search_rank).order_by(*SEARCH_ORDERING)
+
+    def index_tickets(self, ticket_ids):
+        pass
+
+    def remove_tickets(self, ticket_ids):
+        pass
+
+    def rebuild(self, batch_size=1000):
+        return 0
+
+
+class SQLiteFTSBackend(IcontainsBackend):
+    vendor = "sqlite"
+
+    create_sql = (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+        "USING fts5(title, body, tokenize='trigram')"
+    )
+    drop_sql = f"DROP TABLE IF EXISTS {SEARCH_TABLE}"
+
+    def is_available(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [SEARCH_TABLE],
+            )
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def _match_expr(terms):
+        # ทุกคำต้องเจอ (AND), ครอบด้วย "..." เพื่อให้เป็น phrase (กันอักขระพิเศษของ FTS5)
+        return " AND ".join('"{}"'.format(t.replace('"', '""')) for t in terms)
+
+    def filter(self, qs, q):
+        terms = _terms(q)
+        long_terms = [t for t in terms if len(t) >= MIN_TERM_LENGTH]
+        if long_terms:
+            qs = qs.filter(id__in=RawSQL(
+                f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s",
+                [self._match_expr(long_terms)],
+            ))
+        for term in terms:
+            if len(term) < MIN_TERM_LENGTH:
+                qs = qs.filter(self._term_q(term))
+        return qs
+
+    def candidates(self, qs, q, window):
+        long_terms = [t for t in _terms(q) if len(t) >= MIN_TERM_LENGTH]
+        if not long_terms:
+            return None
+        ids_sql, ids_params = _ids_sql(qs)
+        # ORDER BY rank ใน query ของ FTS5 = bm25 ที่คำนวณระหว่างค้น (ไม่ค้น index ซ้ำต่อแถว)
+        # +rowid: ไม่ส่งเงื่อนไข IN ให้ FTS5 (ไม่งั้น FTS5 ค้น MATCH ใหม่ทีละ id — ช้ากว่าหลายสิบเท่า)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+                f"AND +rowid IN ({ids_sql}) ORDER BY rank LIMIT %s",
+                [self._match_expr(long_terms), *ids_params, window],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_tickets(self, ticket_ids):
+        ticket_ids = list(ticket_ids)
+        if not ticket_ids:
+            return
+        docs = build_document(ticket_ids)
+        with connection.cursor() as cursor:
+            self._delete(cursor, ticket_ids)
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, body) VALUES (%s, %s, %s)",
+                [(tid, title, body) for tid, (title, body) in docs.items()],
+            )
+
+    def _delete(self, cursor, ticket_ids):
+        placeholders = ", ".join(["%s"] * len(ticket_ids))
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", ticket_ids
+        )
+
+    def remove_tickets(self, ticket_ids):
+        ticket_ids = list(ticket_ids)
+        if ticket_ids:
+            with connection.cursor() as cursor:
+                self._delete(cursor, ticket_ids)
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    def rebuild(self, batch_size=1000):
+        """ล้างแล้วสร้าง index ใหม่ทั้งหมด ทีละ batch_size ใบ"""
+        self.clear()
+        total = 0
+        ids = list(Ticket.objects.order_by("id").values_list("id", flat=True))
+        for i in range(0, len(ids), batch_size):
+            chunk = ids[i:i + batch_size]
+            self.index_tickets(chunk)
+            total += len(chunk)
+        return total
+
+
+class PostgresTrigramBackend(SQLiteFTSBackend):
+    vendor = "postgresql"
+
+    create_sql = (
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm;"
+        f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+        "  ticket_id integer PRIMARY KEY,"
+        "  title text NOT NULL DEFAULT '',"
+        "  body text NOT NULL DEFAULT '',"
+        "  document text GENERATED ALWAYS AS (title || ' ' || body) STORED"
+        ");"
+        f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_trgm "
+        f"ON {SEARCH_TABLE} USING gin (document gin_trgm_ops);"
+    )
+
+    def is_available(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [SEARCH_TABLE])
+            return cursor.fetchone()[0] is not None
+
+    @staticmethod
+    def _like(term):
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"%{escaped}%"
+
+    def _where(self, terms):
+        # ILIKE '%คำ%' ใช้ GIN trigram index ได้โดยตรง
+        sql = " AND ".join(["document ILIKE %s"] * len(terms))
+        return sql, [self._like(t) for t in terms]
+
+    def filter(self, qs, q):
+        terms = _terms(q)
+        long_terms = [t for t in terms if len(t) >= MIN_TERM_LENGTH]
+        if long_terms:
+            where, params = self._where(long_terms)
+            qs = qs.filter(id__in=RawSQL(
+                f"SELECT ticket_id FROM {SEARCH_TABLE} WHERE {where}", params
+            ))
+        for term in terms:
+            if len(term) < MIN_TERM_LENGTH:
+                qs = qs.filter(self._term_q(term))
+        return qs
+
+    def candidates(self, qs, q, window):
+        long_terms = [t for t in _terms(q) if len(t) >= MIN_TERM_LENGTH]
+        if not long_terms:
+            return None
+        where, params = self._where(long_terms)
+        ids_sql, ids_params = _ids_sql(qs)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT ticket_id FROM {SEARCH_TABLE} WHERE {where} AND ticket_id IN ({ids_sql}) "
+                "ORDER BY word_similarity(%s, document) DESC, ticket_id DESC LIMIT %s",
+                [*params, *ids_params, " ".join(long_terms), window],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_tickets(self, ticket_ids):
+        ticket_ids = list(ticket_ids)
+        if not ticket_ids:
+            return
+        docs = build_document(ticket_ids)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (ticket_id, title, body) VALUES (%s, %s, %s) "
+                "ON CONFLICT (ticket_id) DO UPDATE SET title = EXCLUDED.title, body = EXCLUDED.body",
+                [(tid, title, body) for tid, (title, body) in docs.items()],
+            )
+
+    def _delete(self, cursor, ticket_ids):
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE ticket_id = ANY(%s)", [ticket_ids]
+        )
+
+
+_BACKENDS = {b.vendor: b for b in (SQLiteFTSBackend(), PostgresTrigramBackend())}
+_FALLBACK = IcontainsBackend()
+_resolved = {}
+
+
+def get_backend():
+    """backend ของฐานข้อมูลปัจจุบัน (ตรวจครั้งเดียวต่อ process ว่ามีตาราง index แล้ว)"""
+    vendor = connection.vendor
+    if vendor not in _resolved:
+        backend = _BACKENDS.get(vendor)
+        try:
+            ok = backend is not None and backend.is_available()
+        except DatabaseError:
+            ok = False
+        _resolved[vendor] = backend if ok else _FALLBACK
+    return _resolved[vendor]
+
+
+def reset_backend_cache():
+    _resolved.clear()
+
+
+# ---------- API ที่ส่วนอื่นเรียกใช้ ----------
+def filter_tickets(qs, q):
+    """กรอง queryset ของ Ticket ด้วยคำค้น q (ทุกคำต้องเจอ)"""
+    if not (q or "").strip():
+        return qs
+    return get_backend().filter(qs, q)
+
+
+def rank_tickets(qs, q):
+    """annotate search_rank ให้ queryset ที่กรองด้วย q แล้ว และเรียงตาม SEARCH_ORDERING"""
+    return get_backend().rank(qs, q)
+
+
+def ranked_tickets(qs, q):
+    """กรองด้วย q แล้วเรียงตามความเกี่ยวข้อง"""
+    if not (q or "").strip():
+        return qs
+    return rank_tickets(filter_tickets(qs, q), q)
+
+
+def index_tickets(ticket_ids):
+    get_backend().index_tickets(ticket_ids)
+
+
+def remove_tickets(ticket_ids):
+    get_backend().remove_tickets(ticket_ids)
+
+
+def rebuild_index(batch_size=1000):
+    return get_backend().rebuild(batch_size=batch_size)
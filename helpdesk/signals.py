@@ -0,0 +1,100 @@
+# helpdesk/signals.py — ล้างแคชเมื่อข้อมูลที่เกี่ยวข้องเปลี่ยน
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalog, counters, reports, roles, search, sla
+from .models import Category, IssueType, Ticket, TicketComment, UserProfile
+
+User = get_user_model()
+
+# ฟิลด์ที่อยู่ในเอกสารค้นหา (title มาจาก issue_type ตอน save)
+_SEARCH_FIELDS = {"title", "description", "issue_type"}
+
+
+@receiver([post_save, post_delete], sender=Ticket)
+def _invalidate_year_summary(sender, instance, **kwargs):
+    for year in reports.ticket_years(instance):
+        reports.invalidate_year(year)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def _invalidate_year_summary_categories(sender, instance, **kwargs):
+    reports.invalidate_categories()
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=IssueType)
+def _invalidate_catalog(sender, **kwargs):
+    # หลัง commit: ถ้าเปลี่ยนเวอร์ชันก่อน คำขออื่นอาจโหลดแถวเดิม (ยังไม่ commit) มาแคชใต้เวอร์ชันใหม่
+    transaction.on_commit(catalog.invalidate)
+
+
+@receiver(post_save, sender=Ticket)
+def _index_ticket(sender, instance, update_fields=None, **kwargs):
+    # save(update_fields=["status", ...]) ไม่กระทบข้อความ → ไม่ต้อง reindex
+    if update_fields is not None and not (set(update_fields) & _SEARCH_FIELDS):
+        return
+    search.index_tickets([instance.pk])
+
+
+@receiver(post_delete, sender=Ticket)
+def _unindex_ticket(sender, instance, **kwargs):
+    search.remove_tickets([instance.pk])
+
+
+@receiver(post_delete, sender=Ticket)
+def _uncount_ticket(sender, instance, **kwargs):
+    # การบันทึกนับใน Ticket.save แล้ว — ที่นี่เฉพาะการลบ (รวมลบแบบ cascade)
+    counters.record(counters.state(instance), None)
+
+
+@receiver(post_delete, sender=User)
+def _uncount_user(sender, instance, **kwargs):
+    counters.forget_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=TicketComment)
+def _reindex_ticket_comments(sender, instance, **kwargs):
+    search.index_tickets([instance.ticket_id])
+
+
+@receiver(post_save, sender=TicketComment)
+def _record_first_response(sender, instance, created, **kwargs):
+    # คอมเมนต์ภายใน (internal) ผู้แจ้งไม่เห็น → ไม่นับเป็นการตอบสนอง
+    if created and not instance.internal:
+        if sla.record_response(instance.ticket_id, instance.author_id, instance.created_at):
+            # .update() ไม่ส่ง signal ของ Ticket → ล้างแคชรายงาน (มีเวลาตอบสนองเฉลี่ย) เอง
+            for year in reports.ticket_years(instance.ticket):
+                reports.invalidate_year(year)
+
+
+# ---------- รายชื่อเจ้าหน้าที่ IT (helpdesk/roles.py) ----------
+@receiver([post_save, post_delete], sender=User)
+def _invalidate_it_staff_user(sender, instance, update_fields=None, **kwargs):
+    # login บันทึกแค่ last_login → ไม่กระทบสิทธิ์
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    roles.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=Permission)
+def _invalidate_it_staff(sender, **kwargs):
+    roles.invalidate()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def _invalidate_it_staff_m2m(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        roles.invalidate()
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def _invalidate_it_contact(sender, **kwargs):
+    roles.invalidate_contact()
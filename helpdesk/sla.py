@@ -0,0 +1,293 @@
+# helpdesk/sla.py — ประวัติสถานะใบงาน (TicketEvent) + เวลา SLA ที่คำนวณเก็บไว้ล่วงหน้า
+#
+# ทุกครั้งที่สถานะ/ผู้รับผิดชอบเปลี่ยน (Ticket.save, bulk.apply, import_tickets) track() จะ
+#   - สร้าง TicketEvent (ไม่บันทึกเอง → ผู้เรียก bulk_create ทีเดียว)
+#   - ตั้งเวลา SLA บนใบงาน: first_response / claim / resolution (+ *_time = ห่างจาก created_at)
+# คอมเมนต์แรกของคนที่ไม่ใช่ผู้แจ้งนับเป็นการตอบสนองครั้งแรก (record_response ผ่าน signal)
+#
+# รายงานใช้ summary() เฉลี่ยจากคอลัมน์ที่เก็บไว้ใน SQL ไม่ต้องไล่ประวัติใน Python
+#
+# scan() (manage.py run_sla_scanner ทุก ~1 นาที) แจ้งเตือนใบงานที่ใกล้/เลย due_at:
+#   ใกล้ครบ (เหลือไม่เกิน HELPDESK_SLA_WARNING_MINUTES) → sla_level 1 แจ้งผู้รับผิดชอบ (ไม่มี → IT ทุกคน)
+#   เลยกำหนด → sla_level 2 แจ้งผู้รับผิดชอบ + HELPDESK_SLA_ESCALATE_TO (ค่าเริ่มต้น: superuser)
+#             ใบที่ยังไม่มีผู้รับผิดชอบ → มอบหมายให้ HELPDESK_SLA_BREACH_ASSIGNEE (ถ้าตั้งไว้)
+# ผู้รับได้ทั้ง Notification (ในระบบ) และข้อความทางอีเมล/LINE ผ่าน outbox (notify.enqueue_notifications)
+# index ticket_sla_due_idx มีแค่ใบที่ยังไม่ปิดและยังแจ้งไม่ครบ → แต่ละรอบอ่านเฉพาะใบที่เพิ่งถึงเกณฑ์
+
+import datetime as dt
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Q, Value
+from django.db.models.fields import DateTimeField
+from django.utils import timezone
+
+from . import events, notify, roles
+from .models import Notification, Ticket, TicketEvent
+from .queries import CLOSED_CODES
+
+
+def _setting(name, default):
+    return getattr(settings, f"HELPDESK_SLA_{name}", default)
+
+
+# ฟิลด์ของ Ticket ที่ track() ดูแล (Ticket.save อ่านค่าจริงจากแถวที่ล็อกก่อนคำนวณ)
+SLA_FIELDS = (
+    "status_changed_at",
+    "first_response_at",
+    "first_response_time",
+    "claimed_at",
+    "claim_time",
+    "closed_at",
+    "resolution_time",
+    "sla_level",
+)
+
+# ฟิลด์ที่ user แก้ได้และกระทบ SLA (Ticket.save ต้องผ่าน track() เมื่อเขียนฟิลด์เหล่านี้)
+TRACKED_FIELDS = {"status", "assignee", "due_at"}
+
+
+def track(ticket, old, new, actor_id=None, at=None, old_due_at=None):
+    """
+    ใบงานเปลี่ยนจาก old → new: (status, requester_id, assignee_id), old=None = ใบงานใหม่
+
+    ตั้งฟิลด์ SLA บน ticket (ยังไม่ save) คืน (ชื่อฟิลด์ที่เปลี่ยน, [TicketEvent ที่ยังไม่บันทึก])
+    old_due_at: due_at ในฐานข้อมูลก่อนบันทึก (เปลี่ยน → เริ่มนับการแจ้งเตือน SLA ใหม่)
+    """
+    at = at or timezone.now()
+    created_at = ticket.created_at or at
+    changed = set()
+    history = []
+
+    def set_field(name, value):
+        setattr(ticket, name, value)
+        changed.add(name)
+
+    def event(kind, **fields):
+        history.append(TicketEvent(ticket=ticket, kind=kind, actor_id=actor_id, created_at=at, **fields))
+
+    old_status, _, old_assignee = old or (None, None, None)
+    status, _, assignee = new
+
+    if old is None:
+        event("created", to_status=status, to_assignee_id=assignee)
+        set_field("status_changed_at", at)
+        hours = _setting("RESOLUTION_HOURS", None)
+        if ticket.due_at is None and hours:
+            set_field("due_at", at + dt.timedelta(hours=hours))
+    elif ticket.due_at != old_due_at and ticket.sla_level != Ticket.SLA_OK:
+        # เลื่อนกำหนด → แจ้งเตือนใหม่ได้อีกรอบ
+        set_field("sla_level", Ticket.SLA_OK)
+
+    if old is not None and status != old_status:
+        event(
+            "status", from_status=old_status, to_status=status,
+            duration=at - (ticket.status_changed_at or created_at),
+        )
+        set_field("status_changed_at", at)
+        if old_status == "open" and ticket.first_response_at is None:
+            set_field("first_response_at", at)
+            set_field("first_response_time", at - created_at)
+
+    if status != old_status:
+        if status in CLOSED_CODES:
+            set_field("closed_at", at)
+            set_field("resolution_time", at - created_at)
+        elif old_status in CLOSED_CODES:
+            # เปิดใหม่ → ยังไม่เสร็จ
+            set_field("closed_at", None)
+            set_field("resolution_time", None)
+
+    if old is not None and assignee != old_assignee:
+        event("assigned", from_assignee_id=old_assignee, to_assignee_id=assignee)
+    if assignee and ticket.claimed_at is None:
+        set_field("claimed_at", at)
+        set_field("claim_time", at - created_at)
+
+    return changed, history
+
+
+def estimate(ticket, first_response_at=None):
+    """
+    เวลา SLA โดยประมาณของใบงานที่ไม่มีประวัติ (ข้อมูลก่อนมีตารางนี้ / นำเข้าย้อนหลัง)
+
+    - เข้าสถานะปัจจุบัน: created_at ถ้ายังเปิดงาน ไม่งั้น updated_at
+    - ปิดงาน: updated_at, ตอบสนองครั้งแรก: first_response_at (คอมเมนต์แรกของคนอื่น) ถ้ามี
+    - เวลารับงานไม่ทราบ → เว้นว่าง (ไม่นับในค่าเฉลี่ย)
+    """
+    ticket.status_changed_at = ticket.created_at if ticket.status == "open" else ticket.updated_at
+    if first_response_at is not None:
+        ticket.first_response_at = first_response_at
+        ticket.first_response_time = first_response_at - ticket.created_at
+    if ticket.status in CLOSED_CODES:
+        ticket.closed_at = ticket.updated_at
+        ticket.resolution_time = ticket.updated_at - ticket.created_at
+
+
+def record_response(ticket_id, author_id, at):
+    """คอมเมนต์ของคนที่ไม่ใช่ผู้แจ้ง → ตอบสนองครั้งแรก (UPDATE แบบมีเงื่อนไข ครั้งแรกเท่านั้น)"""
+    elapsed = ExpressionWrapper(
+        Value(at, output_field=DateTimeField()) - F("created_at"), output_field=DurationField()
+    )
+    return (
+        Ticket.objects.filter(pk=ticket_id, first_response_at__isnull=True)
+        .exclude(requester_id=author_id)
+        .update(first_response_at=at, first_response_time=elapsed)
+    )
+
+
+# ---------- scanner (run_sla_scanner) ----------
+ScanResult = namedtuple("ScanResult", "warned breached reassigned notified")
+
+
+def scan_batch():
+    """จำนวนใบงานสูงสุดต่อรอบ (HELPDESK_SLA_SCAN_BATCH)"""
+    return _setting("SCAN_BATCH", 500)
+
+
+def due_queryset(now):
+    """ใบงานที่ต้องแจ้งเตือนรอบนี้: ยังไม่แจ้งและใกล้ครบกำหนด หรือแจ้ง "ใกล้" แล้วและเลยกำหนด"""
+    warning = dt.timedelta(minutes=_setting("WARNING_MINUTES", 60))
+    # ทุกกิ่งของ OR ซ้ำ condition ของ ticket_sla_due_idx → แต่ละกิ่งค้นช่วง (sla_level, due_at) ใน partial index
+    # (ถ้ายก condition ออกมานอก OR, SQLite จะอ่านทั้งช่วง sla_level < 2 แทน)
+    indexed = ~Q(status="closed") & Q(sla_level__lt=Ticket.SLA_BREACHED, due_at__isnull=False)
+    return Ticket.objects.filter(
+        (indexed & Q(sla_level=Ticket.SLA_OK, due_at__lte=now + warning))
+        | (indexed & Q(sla_level=Ticket.SLA_WARNING, due_at__lte=now))
+    )
+
+
+def _escalation_ids():
+    """ผู้รับแจ้งเมื่อเลยกำหนด นอกจากผู้รับผิดชอบ (HELPDESK_SLA_ESCALATE_TO = [username, ...])"""
+    User = get_user_model()
+    usernames = _setting("ESCALATE_TO", None)
+    users = User.objects.filter(is_active=True)
+    if usernames is None:
+        users = users.filter(is_superuser=True)
+    else:
+        users = users.filter(username__in=usernames)
+    return set(users.values_list("id", flat=True))
+
+
+def _breach_assignee():
+    username = _setting("BREACH_ASSIGNEE", None)
+    if not username:
+        return None
+    return get_user_model().objects.filter(username=username, is_active=True).first()
+
+
+def _notification(kind, ticket_id, title, due_at, recipient_id):
+    label = dict(Notification.KIND_CHOICES)[kind]
+    due = timezone.localtime(due_at).strftime("%d/%m/%Y %H:%M")
+    return Notification(
+        recipient_id=recipient_id,
+        ticket_id=ticket_id,
+        kind=kind,
+        message=f"{label}: #{ticket_id} {title} (กำหนด {due})"[:255],
+        dedupe_key=f"{kind}:{ticket_id}:{recipient_id}:{int(due_at.timestamp())}",
+    )
+
+
+def scan(now=None, limit=None):
+    """
+    แจ้งเตือน/ยกระดับใบงานที่ใกล้หรือเลย due_at หนึ่งรอบ คืน ScanResult
+
+    อ่านด้วย query เดียว (ไม่เกิน limit ใบ เรียงตาม due_at) แล้วอัปเดต sla_level ทีละระดับ
+    ใน transaction เดียวกับการบันทึก Notification / TicketEvent / OutboxMessage
+    รันหลายตัวพร้อมกันได้: ฐานข้อมูลที่รองรับ SKIP LOCKED ไม่หยิบใบซ้ำ + dedupe_key กันแจ้งซ้ำ
+    """
+    now = now or timezone.now()
+    limit = limit or scan_batch()
+
+    with transaction.atomic():
+        due = due_queryset(now).order_by("due_at")
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        rows = list(due.values_list("id", "title", "due_at", "assignee_id")[:limit])
+        if not rows:
+            return ScanResult(0, 0, 0, 0)
+
+        warned = [row for row in rows if row[2] > now]
+        breached = [row for row in rows if row[2] <= now]
+        for level, group in ((Ticket.SLA_WARNING, warned), (Ticket.SLA_BREACHED, breached)):
+            if group:
+                Ticket.objects.filter(id__in=[row[0] for row in group], sla_level__lt=level).update(
+                    sla_level=level
+                )
+
+        history = [
+            TicketEvent(ticket_id=row[0], kind=kind, to_assignee_id=row[3], created_at=now)
+            for kind, group in (("sla_warning", warned), ("sla_breach", breached))
+            for row in group
+        ]
+
+        # เลยกำหนดแต่ยังไม่มีใครรับ → มอบหมายตามที่ตั้งไว้ (ผ่าน Ticket.save: ประวัติ/ยอดนับ/SLA ครบ)
+        reassigned = 0
+        assignee = _breach_assignee() if any(row[3] is None for row in breached) else None
+        if assignee is not None:
+            for i, (pk, title, due_at, assignee_id) in enumerate(breached):
+                if assignee_id is not None:
+                    continue
+                ticket = Ticket.objects.get(pk=pk)
+                ticket.assignee = assignee
+                ticket.save(update_fields=["assignee", "updated_at"])
+                events.publish_ticket("updated", ticket)
+                breached[i] = (pk, title, due_at, assignee.pk)
+                reassigned += 1
+
+        it_staff = None
+        escalation = _escalation_ids() if breached else set()
+        notifications = []
+        for kind, group in (("sla_warning", warned), ("sla_breach", breached)):
+            for pk, title, due_at, assignee_id in group:
+                recipients = {assignee_id} if assignee_id else set()
+                if kind == "sla_breach":
+                    recipients |= escalation
+                if not recipients:
+                    # ไม่มีผู้รับผิดชอบ → แจ้ง IT ทุกคน
+                    it_staff = it_staff if it_staff is not None else roles.it_staff_ids()
+                    recipients = set(it_staff)
+                notifications += [
+                    _notification(kind, pk, title, due_at, user_id) for user_id in sorted(recipients)
+                ]
+
+        # ส่งออกเฉพาะที่ยังไม่เคยแจ้ง (bulk_create + ignore_conflicts ไม่บอกว่าแถวไหนใหม่)
+        existing = set(
+            Notification.objects.filter(
+                dedupe_key__in=[n.dedupe_key for n in notifications]
+            ).values_list("dedupe_key", flat=True)
+        )
+        notifications = [n for n in notifications if n.dedupe_key not in existing]
+
+        TicketEvent.objects.bulk_create(history)
+        Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+        notify.enqueue_notifications(notifications)
+
+    return ScanResult(len(warned), len(breached), reassigned, len(notifications))
+
+
+# ---------- รายงาน ----------
+def summary(tickets):
+    """เวลาเฉลี่ย/สูงสุดของใบงานชุดนี้ (aggregate เดียว) — timedelta หรือ None ถ้ายังไม่มีข้อมูล"""
+    return tickets.order_by().aggregate(
+        responded=Count("id", filter=Q(first_response_at__isnull=False)),
+        claimed=Count("id", filter=Q(claimed_at__isnull=False)),
+        closed=Count("id", filter=Q(closed_at__isnull=False)),
+        avg_first_response=Avg("first_response_time"),
+        avg_claim=Avg("claim_time"),
+        avg_resolution=Avg("resolution_time"),
+        max_resolution=Max("resolution_time"),
+    )
+
+
+def time_in_status(tickets):
+    """{สถานะ: เวลาเฉลี่ยที่อยู่ในสถานะนั้นก่อนเปลี่ยน} จาก TicketEvent ของใบงานชุดนี้"""
+    rows = (
+        TicketEvent.objects.filter(kind="status", ticket__in=tickets)
+        .values_list("from_status")
+        .annotate(avg=Avg("duration"))
+        .order_by()
+    )
+    return dict(rows)
@@ -0,0 +1,193 @@
+# helpdesk/storage.py — ที่เก็บไฟล์แนบ/รูปของใบงาน (เลือก backend ได้)
+#
+# ค่าเริ่มต้นเก็บในเครื่อง (MEDIA_ROOT) ตั้ง S3 (หรือ MinIO ฯลฯ ที่รองรับ S3 API) ได้ใน settings:
+#
+#   HELPDESK_MEDIA_STORAGE = {
+#       "BACKEND": "helpdesk.storage.S3MediaStorage",
+#       "OPTIONS": {"bucket": "helpdesk-media", "endpoint_url": "http://minio:9000"},
+#   }
+#
+# ไฟล์ที่บันทึกด้วย save_content() ตั้งชื่อตาม sha256 ของเนื้อหา: <prefix>/<ab>/<sha256><ext>
+# → ไฟล์เดียวกันเก็บครั้งเดียว และเนื้อหาของชื่อหนึ่งไม่มีวันเปลี่ยน (แคชฝั่ง browser ได้ถาวร)
+
+import hashlib
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import LazyObject, empty
+from django.utils.module_loading import import_string
+
+# S3 backend is optional - needs boto3 (ไม่ต้องติดตั้งถ้าใช้ storage ในเครื่อง)
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+_CONTENT_NAME_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def content_hash(name):
+    """sha256 จากชื่อไฟล์แบบ content-addressed (None ถ้าไม่ใช่)"""
+    stem = os.path.basename(name or "").split(".", 1)[0]
+    return stem if _CONTENT_NAME_RE.match(stem) else None
+
+
+class ContentAddressedMixin:
+    """บันทึกไฟล์โดยใช้ sha256 ของเนื้อหาเป็นชื่อ + อ่านไฟล์บางช่วง (HTTP Range)"""
+
+    def save_content(self, content, prefix, ext="", sha256=None):
+        """
+        content: bytes หรือ file-like ที่ seek ได้ — คืน (ชื่อไฟล์, sha256, ขนาด)
+
+        ถ้ามีไฟล์ชื่อนี้อยู่แล้ว (เนื้อหาเดียวกัน) ไม่เขียนซ้ำ
+        """
+        if isinstance(content, bytes):
+            content = ContentFile(content)
+        elif not isinstance(content, File):
+            content = File(content)
+
+        if sha256 is None:
+            digest = hashlib.sha256()
+            content.seek(0)
+            for chunk in content.chunks():
+                digest.update(chunk)
+            sha256 = digest.hexdigest()
+        content.seek(0)
+
+        name = f"{prefix.rstrip('/')}/{sha256[:2]}/{sha256}{ext.lower()}"
+        if not self.exists(name):
+            name = self.save(name, content)
+        return name, sha256, content.size
+
+    def open_range(self, name, start, length):
+        """file-like ที่อ่านได้ตั้งแต่ไบต์ start (ผู้เรียกอ่านไม่เกิน length เอง)"""
+        fh = self.open(name, "rb")
+        fh.seek(start)
+        return fh
+
+
+@deconstructible
+class LocalMediaStorage(ContentAddressedMixin, FileSystemStorage):
+    """เก็บใน MEDIA_ROOT (ค่าเริ่มต้น)"""
+
+
+@deconstructible
+class S3MediaStorage(ContentAddressedMixin, Storage):
+    """
+    เก็บใน bucket ที่รองรับ S3 API (AWS S3, MinIO, Ceph ...)
+
+    ส่ง client เข้ามาเองได้ (เช่น client ของ MinIO หรือตัวจำลองตอนทดสอบ)
+    ไม่เช่นนั้นสร้างด้วย boto3 จาก endpoint_url / region_name / access_key / secret_key
+    """
+
+    def __init__(self, bucket=None, prefix="", client=None, endpoint_url=None,
+                 region_name=None, access_key=None, secret_key=None, url_expires=300):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.endpoint_url = endpoint_url
+        self.region_name = region_name
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.url_expires = url_expires
+        self._client = client
+        if not self.bucket:
+            raise ImproperlyConfigured("S3MediaStorage ต้องระบุ bucket")
+
+    @property
+    def client(self):
+        if self._client is None:
+            if boto3 is None:
+                raise ImproperlyConfigured("S3MediaStorage ต้องติดตั้ง boto3")
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=self.endpoint_url,
+                region_name=self.region_name,
+                aws_access_key_id=self.access_key,
+                aws_secret_access_key=self.secret_key,
+            )
+        return self._client
+
+    def _key(self, name):
+        return self.prefix + name.replace("\\", "/")
+
+    @staticmethod
+    def _not_found(exc):
+        # botocore.exceptions.ClientError (ไม่ import ตรง ๆ เพราะ boto3 เป็น optional)
+        code = str(getattr(exc, "response", {}).get("Error", {}).get("Code", ""))
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _open(self, name, mode="rb"):
+        body = self.client.get_object(Bucket=self.bucket, Key=self._key(name))["Body"]
+        return File(body, name=name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.client.upload_fileobj(
+            content, self.bucket, self._key(name), ExtraArgs={"ContentType": content_type}
+        )
+        return name
+
+    def exists(self, name):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(name))
+        except Exception as exc:
+            if self._not_found(exc):
+                return False
+            raise
+        return True
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(name))
+
+    def size(self, name):
+        return self.client.head_object(Bucket=self.bucket, Key=self._key(name))["ContentLength"]
+
+    def url(self, name):
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(name)},
+            ExpiresIn=self.url_expires,
+        )
+
+    def open_range(self, name, start, length):
+        # ดึงเฉพาะช่วงที่ต้องการจาก S3 (ไม่ต้องโหลดทั้งไฟล์แล้วข้าม)
+        end = start + length - 1
+        obj = self.client.get_object(
+            Bucket=self.bucket, Key=self._key(name), Range=f"bytes={start}-{end}"
+        )
+        return obj["Body"]
+
+
+# ---------- storage ที่ใช้จริง ----------
+class _MediaStorage(LazyObject):
+    """สร้าง backend ตาม HELPDESK_MEDIA_STORAGE ตอนใช้ครั้งแรก (แบบเดียวกับ default_storage)"""
+
+    def _setup(self):
+        config = getattr(settings, "HELPDESK_MEDIA_STORAGE", None) or {}
+        backend = import_string(config.get("BACKEND", "helpdesk.storage.LocalMediaStorage"))
+        self._wrapped = backend(**config.get("OPTIONS", {}))
+
+
+_media = _MediaStorage()
+
+
+def media_storage():
+    """
+    storage ของ TicketImage / TicketAttachment
+
+    ใช้เป็น storage=... ของ FileField (callable → migration ไม่ผูกกับ backend ที่ตั้งไว้)
+    """
+    return _media
+
+
+def reset_storage():
+    """ให้สร้าง backend ใหม่ตาม settings ปัจจุบันในการใช้ครั้งถัดไป"""
+    _media._wrapped = empty
@@ -0,0 +1,18 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def duration(value):
+    """timedelta → ข้อความสั้น ๆ เช่น "2 วัน 3 ชม." / "45 นาที" (None → "-")"""
+    if value is None:
+        return "-"
+    minutes = max(int(value.total_seconds() // 60), 0)
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days} วัน {hours} ชม." if hours else f"{days} วัน"
+    if hours:
+        return f"{hours} ชม. {minutes} นาที" if minutes else f"{hours} ชม."
+    return f"{minutes} นาที"
@@ -0,0 +1,134 @@
+# helpdesk/tests/test_api.py — JSON API (helpdesk/api/)
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from helpdesk.models import Category, IssueType, Ticket, TicketComment
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.it = User.objects.create_user("it", password="pw", is_staff=True)
+        cls.it.user_permissions.add(Permission.objects.get(codename="change_ticket"))
+        cls.alice = User.objects.create_user("alice", password="pw")
+        cls.bob = User.objects.create_user("bob", password="pw")
+        category = Category.objects.create(name="HW")
+        cls.issue = IssueType.objects.create(name="Printer", category=category)
+        cls.ticket = Ticket.objects.create(
+            issue_type=cls.issue, requester=cls.alice, assignee=cls.it, status="in_progress",
+            title="", description="กระดาษติด",
+        )
+        TicketComment.objects.create(ticket=cls.ticket, author=cls.it, body="รับเรื่องแล้ว")
+        TicketComment.objects.create(ticket=cls.ticket, author=cls.it, body="โน้ตภายใน", internal=True)
+
+    def setUp(self):
+        cache.clear()
+        self.list_url = reverse("helpdesk:api:tickets")
+        self.url = reverse("helpdesk:api:ticket", args=[self.ticket.pk])
+        self.comments_url = reverse("helpdesk:api:ticket_comments", args=[self.ticket.pk])
+
+    def _patch(self, data, **headers):
+        return self.client.patch(self.url, data, content_type="application/json", **headers)
+
+    def test_anonymous_gets_401_and_wrong_method_405(self):
+        self.assertEqual(self.client.get(self.list_url).status_code, 401)
+
+        self.client.force_login(self.alice)
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response["Allow"], "GET, PATCH")
+
+    def test_other_requesters_ticket_is_hidden(self):
+        self.client.force_login(self.bob)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.comments_url).status_code, 403)
+        self.assertEqual(self.client.get(self.list_url).json()["results"], [])
+        missing = reverse("helpdesk:api:ticket", args=[999999])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_sparse_fields(self):
+        self.client.force_login(self.alice)
+        response = self.client.get(self.list_url, {"fields": "id,status"})
+        self.assertEqual(response.json()["results"], [{"id": self.ticket.pk, "status": "in_progress"}])
+
+        response = self.client.get(self.url, {"fields": "id,description"})
+        self.assertEqual(response.json(), {"id": self.ticket.pk, "description": "กระดาษติด"})
+
+        response = self.client.get(self.url, {"fields": "id,password"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password", response.json()["error"])
+
+    def test_cursor_pages_and_invalid_cursor_is_400(self):
+        older = Ticket.objects.create(issue_type=self.issue, requester=self.alice, title="", status="closed")
+        self.client.force_login(self.alice)
+
+        first = self.client.get(self.list_url, {"limit": 1, "fields": "id"}).json()
+        self.assertEqual(first["results"], [{"id": self.ticket.pk}])
+        second = self.client.get(self.list_url, {"limit": 1, "fields": "id", "cursor": first["next"]}).json()
+        self.assertEqual((second["results"], second["next"]), ([{"id": older.pk}], None))
+
+        # token เสีย → 400 (ไม่ย้อนกลับไปหน้าแรกให้ client วนไม่จบ) — หน้าเว็บยังเริ่มหน้าแรกให้
+        response = self.client.get(self.list_url, {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse("helpdesk:ticket_list"), {"cursor": "garbage"}).status_code, 200)
+
+    def test_if_none_match_gives_304(self):
+        self.client.force_login(self.alice)
+        for url in (self.list_url, self.url, self.comments_url):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                again = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(again.status_code, 304)
+                self.assertEqual(again["ETag"], response["ETag"])
+
+        # ใบงานเปลี่ยน → ETag เปลี่ยน
+        etag = self.client.get(self.url)["ETag"]
+        Ticket.objects.get(pk=self.ticket.pk).save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_patch_with_stale_if_match_is_412(self):
+        self.client.force_login(self.it)
+        etag = self.client.get(self.url)["ETag"]
+        response = self._patch({"contact": "081"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["contact"], "081")
+
+        # ETag เดิม (ก่อนแก้ครั้งแรก) ใช้ไม่ได้แล้ว
+        response = self._patch({"contact": "082"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Ticket.objects.get(pk=self.ticket.pk).contact, "081")
+
+    def test_patch_permissions_and_closed_ticket(self):
+        self.client.force_login(self.alice)
+        self.assertEqual(self._patch({"contact": "x"}).status_code, 403)
+
+        self.client.force_login(self.it)
+        Ticket.objects.filter(pk=self.ticket.pk).update(status="closed")
+        self.assertEqual(self._patch({"contact": "x"}).status_code, 409)
+
+    def test_internal_comments_hidden_from_non_staff(self):
+        self.client.force_login(self.alice)
+        bodies = [c["body"] for c in self.client.get(self.comments_url).json()["results"]]
+        self.assertEqual(bodies, ["รับเรื่องแล้ว"])
+
+        self.client.force_login(self.it)
+        bodies = [c["body"] for c in self.client.get(self.comments_url).json()["results"]]
+        self.assertEqual(bodies, ["รับเรื่องแล้ว", "โน้ตภายใน"])
+
+    def test_create_ticket(self):
+        self.client.force_login(self.bob)
+        response = self.client.post(
+            self.list_url, {"issue_type": self.issue.pk, "description": "จอดับ"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["requester"]["username"], "bob")
+        self.assertEqual(response["Location"], reverse("helpdesk:api:ticket", args=[response.json()["id"]]))
+
+        response = self.client.post(self.list_url, {"description": "x"}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("issue_type", response.json()["errors"])
@@ -0,0 +1,123 @@
+# helpdesk/tests/test_bulk.py — คำสั่งหลายใบงาน (helpdesk/bulk.py + ticket_bulk)
+
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from helpdesk import bulk, counters
+from helpdesk.models import Category, IssueType, OutboxMessage, Ticket, TicketComment, TicketEvent
+
+
+class BulkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        change = Permission.objects.get(codename="change_ticket")
+        cls.it = User.objects.create_user("it", password="pw")
+        cls.it2 = User.objects.create_user("it2", password="pw")
+        for user in (cls.it, cls.it2):
+            user.user_permissions.add(change)
+        cls.requester = User.objects.create_user("req", email="req@example.com", password="pw")
+        category = Category.objects.create(name="HW")
+        cls.issue = IssueType.objects.create(name="Printer", category=category)
+
+    def setUp(self):
+        cache.clear()
+
+    def _ticket(self, **kwargs):
+        return Ticket.objects.create(issue_type=self.issue, requester=self.requester, title="", **kwargs)
+
+    def assertCountersInSync(self):
+        self.assertEqual(counters.reconcile(dry_run=True)[1], [])
+
+    def test_per_ticket_errors(self):
+        free = self._ticket()
+        others = self._ticket(assignee=self.it2, status="in_progress")
+        closed = self._ticket(status="closed")
+
+        results = bulk.apply(self.it, "claim", [free.pk, others.pk, closed.pk, 999999])
+        self.assertEqual(
+            [(r.id, r.ok, r.error) for r in results],
+            [
+                (free.pk, True, None),
+                (others.pk, False, "มีผู้รับผิดชอบแล้ว"),
+                (closed.pk, False, "ใบงานปิดแล้ว"),
+                (999999, False, "ไม่พบใบงาน"),
+            ],
+        )
+        [error] = [r.error for r in bulk.apply(self.it, "close", [others.pk])]
+        self.assertEqual(error, "เฉพาะผู้รับผิดชอบงานเท่านั้น")
+
+        free.refresh_from_db()
+        self.assertEqual((free.assignee, free.status), (self.it, "in_progress"))
+        self.assertCountersInSync()
+
+    def test_requester_cannot_bulk(self):
+        with self.assertRaises(bulk.BulkError):
+            bulk.apply(self.requester, "claim", [self._ticket().pk])
+
+    def test_ticket_closed_between_check_and_write(self):
+        first = self._ticket(assignee=self.it, status="in_progress")
+        second = self._ticket(assignee=self.it, status="in_progress")
+        check = bulk._check
+
+        def close_second_meanwhile(action, user, status, assignee_id):
+            # อีกคำขอปิดใบที่สองหลังอ่านแถวแล้ว (SQLite ไม่มี FOR UPDATE กันไว้)
+            if Ticket.objects.filter(pk=second.pk).exclude(status="closed").update(status="closed"):
+                counters.record(
+                    ("in_progress", self.requester.pk, self.it.pk), ("closed", self.requester.pk, self.it.pk)
+                )
+            return check(action, user, status, assignee_id)
+
+        with mock.patch("helpdesk.bulk._check", close_second_meanwhile):
+            results = bulk.apply(self.it, "close", [first.pk, second.pk], comment="เรียบร้อย")
+
+        self.assertEqual(
+            [(r.id, r.ok, r.error) for r in results],
+            [(first.pk, True, None), (second.pk, False, bulk.CHANGED_MEANWHILE)],
+        )
+        # ผลข้างเคียงเฉพาะใบที่เปลี่ยนจริง
+        self.assertEqual(
+            list(TicketEvent.objects.filter(kind="status").values_list("ticket_id", flat=True)), [first.pk]
+        )
+        self.assertEqual(list(TicketComment.objects.values_list("ticket_id", flat=True)), [first.pk])
+        self.assertEqual(
+            set(OutboxMessage.objects.values_list("ticket_id", flat=True)), {first.pk}
+        )
+        self.assertCountersInSync()
+
+    def test_every_action_keeps_counters_in_sync(self):
+        tickets = [self._ticket() for _ in range(4)]
+        ids = [t.pk for t in tickets]
+        bulk.apply(self.it, "claim", ids)
+        bulk.apply(self.it, "status", ids[:2], status="on_hold")
+        bulk.apply(self.it, "assign", ids[2:], assignee=self.it2)
+        bulk.apply(self.it, "close", ids[:2])
+        self.assertCountersInSync()
+        self.assertEqual(
+            counters.dashboard_counts(self.it2, is_it_staff=False)["assigned_to_me"], 2
+        )
+
+    def test_form_redirects_to_safe_next_only(self):
+        ticket = self._ticket()
+        self.client.force_login(self.it)
+        url = reverse("helpdesk:ticket_bulk")
+        back = reverse("helpdesk:ticket_list") + "?status=open"
+
+        response = self.client.post(url, {"action": "claim", "ids": [ticket.pk], "next": back})
+        self.assertRedirects(response, back, fetch_redirect_response=False)
+
+        for evil in ("https://evil.example/", "//evil.example/x"):
+            response = self.client.post(url, {"action": "claim", "ids": [ticket.pk], "next": evil})
+            self.assertRedirects(response, reverse("helpdesk:ticket_list"), fetch_redirect_response=False)
+
+    def test_json_validation(self):
+        self.client.force_login(self.it)
+        url = reverse("helpdesk:ticket_bulk")
+        response = self.client.post(url, {"action": "explode", "ids": [1]}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(url, "[1]", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
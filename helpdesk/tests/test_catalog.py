@@ -0,0 +1,59 @@
+# helpdesk/tests/test_catalog.py — title/category ของใบงานจาก IssueType (helpdesk/catalog.py)
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from helpdesk import catalog
+from helpdesk.models import Category, IssueType, Ticket
+
+
+class CatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.requester = User.objects.create_user("req", password="pw")
+        cls.hardware = Category.objects.create(name="HW")
+        cls.software = Category.objects.create(name="SW")
+        cls.printer = IssueType.objects.create(name="Printer", category=cls.hardware)
+        cls.email = IssueType.objects.create(name="Email", category=cls.software)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_new_ticket_takes_title_and_category(self):
+        ticket = Ticket.objects.create(issue_type=self.printer, requester=self.requester, title="")
+        self.assertEqual((ticket.title, ticket.category_id), ("Printer", self.hardware.pk))
+
+    def test_changing_issue_type_updates_title(self):
+        ticket = Ticket.objects.create(issue_type=self.printer, requester=self.requester, title="")
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.issue_type = self.email
+        ticket.save()
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.title, ticket.category_id), ("Email", self.software.pk))
+
+    def test_stale_snapshot_does_not_undo_rename(self):
+        ticket = Ticket.objects.create(issue_type=self.printer, requester=self.requester, title="")
+        catalog.issues()  # process นี้ถือ snapshot ที่ยังเป็นชื่อเดิม
+
+        # เปลี่ยนชื่อ "ที่ process อื่น": on_commit ไม่ทำงาน → snapshot ของ process นี้ค้าง
+        with self.captureOnCommitCallbacks(execute=False):
+            IssueType.objects.get(pk=self.printer.pk).rename("Printer / Scanner")
+        self.assertEqual(catalog.issue_type(self.printer.pk).name, "Printer")
+
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        self.assertEqual(ticket.title, "Printer / Scanner")
+        ticket.description = "edited"
+        ticket.save()
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.title, "Printer / Scanner")
+
+    def test_invalidate_runs_after_commit(self):
+        before = catalog.version()
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            IssueType.objects.get(pk=self.printer.pk).rename("Printer 2")
+            self.assertEqual(catalog.version(), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(catalog.version(), before)
+        self.assertEqual(catalog.issue_type(self.printer.pk).name, "Printer 2")
@@ -0,0 +1,131 @@
+# helpdesk/tests/test_counters.py — ยอดนับ dashboard (helpdesk/counters.py) ตรงกับยอดจริงทุกทางที่เขียนใบงาน
+
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from helpdesk import bulk, counters
+from helpdesk.models import Category, IssueType, Ticket, TicketCounter
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        change = Permission.objects.get(codename="change_ticket")
+        cls.it = User.objects.create_user("it", password="pw")
+        cls.it2 = User.objects.create_user("it2", password="pw")
+        for user in (cls.it, cls.it2):
+            user.user_permissions.add(change)
+        cls.alice = User.objects.create_user("alice", password="pw")
+        category = Category.objects.create(name="HW")
+        cls.issue = IssueType.objects.create(name="Printer", category=category)
+
+    def setUp(self):
+        cache.clear()
+
+    def _ticket(self, requester=None, **kwargs):
+        return Ticket.objects.create(
+            issue_type=self.issue, requester=requester or self.alice, title="", **kwargs
+        )
+
+    def assertCountersMatch(self):
+        stored = {
+            (scope, user_id, status): count
+            for scope, user_id, status, count in TicketCounter.objects.values_list(
+                "scope", "user_id", "status", "count"
+            )
+            if count
+        }
+        self.assertEqual(stored, counters.expected_counts())
+
+    def test_ticket_lifecycle(self):
+        ticket = self._ticket()
+        own = self._ticket(requester=self.it, assignee=self.it, status="in_progress")
+        self.assertCountersMatch()
+
+        self.client.force_login(self.it)
+        self.client.post(reverse("helpdesk:ticket_claim", args=[ticket.pk]))
+        self.assertCountersMatch()
+        self.assertEqual(counters.dashboard_counts(self.it, is_it_staff=False)["assigned_to_me"], 2)
+
+        # โอนงาน
+        ticket.refresh_from_db()
+        ticket.assignee = self.it2
+        ticket.save()
+        self.assertCountersMatch()
+
+        self.client.force_login(self.it2)
+        self.client.post(reverse("helpdesk:ticket_close", args=[ticket.pk]), {"comment": "เสร็จแล้ว"})
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).status, "closed")
+        self.assertCountersMatch()
+
+        own.delete()
+        self.assertCountersMatch()
+        self.assertEqual(
+            counters.dashboard_counts(self.alice, is_it_staff=False),
+            {"my_open": 0, "assigned_to_me": 0, "by_status": {"closed": 1}},
+        )
+
+    def test_deleting_users_cascades(self):
+        bob = User.objects.create_user("bob", password="pw")
+        helper = User.objects.create_user("helper", password="pw")
+        self._ticket(requester=bob, assignee=self.it, status="in_progress")
+        self._ticket(requester=bob)
+        self._ticket(assignee=helper, status="in_progress")
+        self._ticket(requester=helper, assignee=helper, status="in_progress")
+
+        # ใบของผู้แจ้งถูกลบแบบ cascade (post_delete ทีละใบ)
+        bob.delete()
+        self.assertCountersMatch()
+        # ใบที่รับผิดชอบถูก SET NULL ด้วย UPDATE ตรง (ไม่ผ่าน Ticket.save)
+        helper.delete()
+        self.assertCountersMatch()
+        self.assertEqual(Ticket.objects.filter(assignee__isnull=True).count(), 1)
+
+    def test_bulk_apply(self):
+        ids = [self._ticket().pk for _ in range(3)]
+        bulk.apply(self.it, "claim", ids)
+        bulk.apply(self.it, "assign", ids[:1], assignee=self.it2)
+        bulk.apply(self.it, "close", ids[1:])
+        self.assertCountersMatch()
+
+    def test_import_tickets(self):
+        self._ticket()
+        rows = [
+            {"issue_type": "Printer", "requester": "alice", "status": "open"},
+            {"issue_type": "Printer", "requester": "alice", "assignee": "it", "status": "in_progress"},
+            {"title": "ขอรหัสผ่าน", "requester": "it", "assignee": "it", "status": "closed"},
+        ]
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(json.dumps(row, ensure_ascii=False) for row in rows))
+
+        call_command("import_tickets", path, stdout=io.StringIO())
+        self.assertEqual(Ticket.objects.count(), 4)
+        self.assertCountersMatch()
+
+    def test_reconcile_dry_run_reports_without_writing(self):
+        self._ticket()
+        key = {"scope": counters.SCOPE_ALL, "user_id": 0, "status": "open"}
+        TicketCounter.objects.filter(**key).update(count=7)
+
+        out = io.StringIO()
+        call_command("reconcile_counters", "--dry-run", stdout=out)
+        self.assertIn("  all:0:open 7 -> 1", out.getvalue())
+        self.assertIn("found 1.", out.getvalue())
+        self.assertEqual(TicketCounter.objects.get(**key).count, 7)
+
+        out = io.StringIO()
+        call_command("reconcile_counters", stdout=out)
+        self.assertIn("repaired 1.", out.getvalue())
+        self.assertCountersMatch()
+        self.assertEqual(counters.reconcile(dry_run=True)[1], [])
@@ -0,0 +1,105 @@
+# helpdesk/tests/test_events.py — real-time (helpdesk/events.py) ด้วย broker ตัวแทนในหน่วยความจำ
+
+import asyncio
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from helpdesk import events
+from helpdesk.models import Category, IssueType, Ticket
+
+
+class RecordingBroker(events.InMemoryBroker):
+    """broker ตัวแทน: จำทุกเหตุการณ์ที่ publish ไว้ + กระจายในหน่วยความจำเหมือน InMemoryBroker"""
+
+    def __init__(self):
+        super().__init__(queue_size=10)
+        self.published = []
+
+    def publish(self, event):
+        self.published.append(event)
+        super().publish(event)
+
+
+class EventsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.requester = User.objects.create_user("req", password="pw")
+        cls.other = User.objects.create_user("other", password="pw")
+        cls.it = User.objects.create_user("it", password="pw")
+        cls.it.user_permissions.add(Permission.objects.get(codename="change_ticket"))
+        category = Category.objects.create(name="HW")
+        cls.issue = IssueType.objects.create(name="Printer", category=category)
+        cls.ticket = Ticket.objects.create(issue_type=cls.issue, requester=cls.requester, title="")
+
+    def setUp(self):
+        self.broker = RecordingBroker()
+        events.set_broker(self.broker)
+        self.addCleanup(events.set_broker, None)
+
+
+class DisabledTests(EventsTestCase):
+    """ค่าเริ่มต้น (WSGI): ไม่เปิดสตรีม ไม่ publish"""
+
+    def test_stream_returns_204(self):
+        self.client.force_login(self.requester)
+        self.assertEqual(self.client.get(reverse("helpdesk:event_stream")).status_code, 204)
+
+    def test_pages_do_not_open_event_source(self):
+        self.client.force_login(self.requester)
+        for url in (reverse("helpdesk:dashboard"), reverse("helpdesk:ticket_detail", args=[self.ticket.pk])):
+            self.assertNotContains(self.client.get(url), "new EventSource")
+
+    def test_publish_is_noop(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            events.publish_ticket("updated", self.ticket)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.broker.published, [])
+
+
+@override_settings(HELPDESK_EVENTS_ENABLED=True)
+class EnabledTests(EventsTestCase):
+    def test_pages_open_event_source(self):
+        self.client.force_login(self.requester)
+        for url in (reverse("helpdesk:dashboard"), reverse("helpdesk:ticket_detail", args=[self.ticket.pk])):
+            self.assertContains(self.client.get(url), "new EventSource")
+
+    def test_publish_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            events.publish_ticket("claimed", self.ticket, actor=self.it)
+            self.assertEqual(self.broker.published, [])
+        for callback in callbacks:
+            callback()
+        [event] = self.broker.published
+        self.assertEqual((event["type"], event["ticket"], event["actor"]), ("claimed", self.ticket.pk, self.it.pk))
+
+    def test_claim_view_publishes(self):
+        self.client.force_login(self.it)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("helpdesk:ticket_claim", args=[self.ticket.pk]))
+        self.assertEqual([e["type"] for e in self.broker.published], ["claimed"])
+
+    def test_stream_filters_by_visibility(self):
+        visible = events.ticket_event("updated", self.ticket.pk, "open", self.requester.pk, None)
+        hidden = events.ticket_event("updated", 999, "open", self.other.pk, None)
+
+        async def first_message(user_id):
+            stream = events.stream(user_id, is_it_staff=False)
+            try:
+                self.assertTrue((await stream.__anext__()).startswith("retry:"))
+                task = asyncio.ensure_future(stream.__anext__())
+                # รอให้ stream subscribe ก่อนส่ง
+                while not self.broker.subscriber_count:
+                    await asyncio.sleep(0)
+                self.broker.publish(hidden)
+                self.broker.publish(visible)
+                return await asyncio.wait_for(task, 1)
+            finally:
+                await stream.aclose()
+
+        message = asyncio.run(first_message(self.requester.pk))
+        self.assertIn(f'"ticket": {self.ticket.pk}', message)
+        self.assertEqual(self.broker.subscriber_count, 0)
@@ -0,0 +1,36 @@
+# helpdesk/tests/test_exports.py — ส่งออก CSV (helpdesk/exports.py)
+
+import csv
+import io
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from helpdesk.models import Category, IssueType, Ticket
+
+
+class CsvExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.requester = User.objects.create_user("req", password="pw", first_name="=cmd|' /C calc'!A0")
+        category = Category.objects.create(name="HW")
+        issue = IssueType.objects.create(name="@SUM(1+1)", category=category)
+        Ticket.objects.create(
+            issue_type=issue, requester=cls.requester, title="", contact='=HYPERLINK("http://x")'
+        )
+
+    def test_formula_cells_are_escaped(self):
+        self.client.force_login(self.requester)
+        response = self.client.get(reverse("helpdesk:ticket_list_csv"))
+        content = b"".join(response.streaming_content).decode("utf-8-sig")
+        header, row = list(csv.reader(io.StringIO(content)))
+
+        self.assertEqual(row[1], "'@SUM(1+1)")
+        self.assertEqual(row[4], "'=cmd|' /C calc'!A0")
+        self.assertEqual(row[6], "'=HYPERLINK(\"http://x\")")
+        # ตัวเลข/ข้อความปกติไม่แตะ
+        self.assertEqual(row[0], str(Ticket.objects.get().pk))
+        self.assertEqual(row[3], "HW")
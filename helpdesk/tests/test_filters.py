@@ -0,0 +1,44 @@
+# helpdesk/tests/test_filters.py — ตัวกรองรายการใบงาน (helpdesk/filters.py)
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from helpdesk.filters import TicketFilter
+from helpdesk.models import Category, IssueType, Ticket
+
+
+class TicketFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.user = User.objects.create_user("req", password="pw")
+        category = Category.objects.create(name="HW")
+        issue = IssueType.objects.create(name="Printer", category=category)
+        Ticket.objects.create(issue_type=issue, requester=cls.user, title="")
+
+    def test_dates_at_the_limits_are_rejected(self):
+        ticket_filter = TicketFilter({"date_from": "0001-01-01", "date_to": "9999-12-31", "status": "x"})
+        self.assertEqual(
+            ticket_filter.errors, {"date_from": "0001-01-01", "date_to": "9999-12-31", "status": "x"}
+        )
+        self.assertFalse(ticket_filter.is_filtered)
+        self.assertEqual(ticket_filter.apply(Ticket.objects.all()).count(), 1)
+
+    def test_date_range_includes_whole_last_day(self):
+        today = timezone.localdate(Ticket.objects.get().updated_at).isoformat()
+        ticket_filter = TicketFilter({"date_from": today, "date_to": today})
+        self.assertEqual(ticket_filter.errors, {})
+        self.assertEqual(ticket_filter.apply(Ticket.objects.all()).count(), 1)
+
+    def test_views_handle_out_of_range_dates(self):
+        self.client.force_login(self.user)
+        for name in ("helpdesk:ticket_list", "helpdesk:dashboard"):
+            response = self.client.get(reverse(name), {"date_to": "9999-12-31"})
+            self.assertEqual(response.status_code, 200)
+        for name in ("helpdesk:api:tickets", "helpdesk:api:dashboard"):
+            response = self.client.get(reverse(name), {"date_to": "9999-12-31"})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("date_to", response.json()["errors"])
@@ -0,0 +1,104 @@
+# helpdesk/tests/test_images.py — ย่อ/ลบ EXIF/บีบอัดรูปแนบ (helpdesk/images.py)
+
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from helpdesk import images, jobs, storage
+from helpdesk.models import BackgroundJob, Category, IssueType, Ticket, TicketImage
+
+
+def _jpeg(size=(3000, 1000), orientation=6):
+    """รูป JPEG ที่มี EXIF (หมุน 90° + ข้อมูลกล้อง)"""
+    exif = Image.Exif()
+    exif[0x0112] = orientation  # Orientation
+    exif[0x010F] = "ACME Camera"  # Make
+    out = io.BytesIO()
+    Image.new("RGB", size, "red").save(out, "JPEG", exif=exif.tobytes())
+    return out.getvalue()
+
+
+class ProcessBytesTests(TestCase):
+    def _open(self, data):
+        img = Image.open(io.BytesIO(data))
+        img.load()
+        return img
+
+    def test_resize_rotate_and_strip_exif(self):
+        ext, main, thumb = images.process_bytes(_jpeg())
+        self.assertEqual(ext, "webp")
+
+        img = self._open(main)
+        self.assertEqual(img.format, "WEBP")
+        # หมุนตาม EXIF ก่อนย่อ: 3000x1000 แนวนอน → 640x1920 แนวตั้ง
+        self.assertEqual(img.size, (640, 1920))
+        self.assertFalse(img.getexif())
+        self.assertNotIn("exif", img.info)
+
+        img = self._open(thumb)
+        self.assertEqual(max(img.size), 320)
+        self.assertFalse(img.getexif())
+
+    @override_settings(HELPDESK_IMAGE_FORMAT="jpeg", HELPDESK_IMAGE_MAX_SIDE=800, HELPDESK_IMAGE_THUMB_SIDE=100)
+    def test_jpeg_setting(self):
+        rgba = io.BytesIO()
+        Image.new("RGBA", (1600, 400), (0, 0, 255, 128)).save(rgba, "PNG")
+        ext, main, thumb = images.process_bytes(rgba.getvalue())
+        self.assertEqual(ext, "jpg")
+        img = self._open(main)
+        self.assertEqual((img.format, img.mode, img.size), ("JPEG", "RGB", (800, 200)))
+        self.assertEqual(self._open(thumb).size, (100, 25))
+
+    def test_not_an_image(self):
+        with self.assertRaises(images.ImageProcessingError):
+            images.process_bytes(b"%PDF-1.4 not an image")
+
+
+class AttachImagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.requester = User.objects.create_user("req", password="pw")
+        category = Category.objects.create(name="HW")
+        issue = IssueType.objects.create(name="Printer", category=category)
+        cls.ticket = Ticket.objects.create(issue_type=issue, requester=cls.requester, title="")
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        storage.reset_storage()
+        self.addCleanup(storage.reset_storage)
+
+    def _upload(self, data, name="photo.jpg"):
+        return SimpleUploadedFile(name, data, content_type="image/jpeg")
+
+    def test_inline_and_duplicate_share_one_file(self):
+        data = _jpeg()
+        first, second = images.attach_images(self.ticket, [self._upload(data), self._upload(data, "again.jpg")])
+        self.assertTrue(first.is_processed)
+        self.assertTrue(first.image.name.endswith(".webp"))
+        self.assertEqual((second.image.name, second.thumbnail.name), (first.image.name, first.thumbnail.name))
+        with first.thumbnail.open("rb") as fh:
+            self.assertEqual(max(Image.open(fh).size), 320)
+
+    @override_settings(HELPDESK_IMAGE_INLINE_COUNT=0)
+    def test_large_batch_is_processed_by_worker(self):
+        [image] = images.attach_images(self.ticket, [self._upload(_jpeg(size=(400, 300)))], user=self.requester)
+        self.assertFalse(image.is_processed)
+        original = image.image.name
+
+        job = BackgroundJob.objects.get(kind=images.KIND_PROCESS_IMAGES)
+        jobs.run_job(job)
+        image = TicketImage.objects.get(pk=image.pk)
+        self.assertTrue(image.is_processed)
+        self.assertTrue(image.image.name.endswith(".webp"))
+        self.assertFalse(storage.media_storage().exists(original))
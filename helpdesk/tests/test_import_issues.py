@@ -0,0 +1,88 @@
+# helpdesk/tests/test_import_issues.py — นำเข้า IssueType จากไฟล์ (manage.py import_issues)
+
+import io
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from helpdesk import catalog
+from helpdesk.models import Category, IssueType, Ticket
+
+
+class ImportIssuesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _import(self, rows, *args):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write("Category,Issue\n")
+            fh.writelines(f"{cat},{issue}\n" for cat, issue in rows)
+        out = io.StringIO()
+        call_command("import_issues", path, *args, stdout=out)
+        return out.getvalue()
+
+    def _active(self):
+        return set(IssueType.objects.filter(is_active=True).values_list("category__name", "name"))
+
+    def test_import_twice_is_idempotent(self):
+        rows = [("HW", "Printer"), ("HW", "Monitor"), ("SW", "Email"), ("HW", "Printer")]
+        first = self._import(rows)
+        self.assertIn("Category created: 2, Issue created: 3,", first)
+        ids = list(IssueType.objects.order_by("id").values_list("id", flat=True))
+
+        second = self._import(rows, "--deactivate-missing")
+        self.assertIn(
+            "Category created: 0, Issue created: 0, Issue re-activated: 0, Issue deactivated: 0", second
+        )
+        self.assertEqual(list(IssueType.objects.order_by("id").values_list("id", flat=True)), ids)
+        self.assertEqual(Category.objects.count(), 2)
+
+    def test_renamed_issue_and_deactivate_missing(self):
+        self._import([("HW", "Printer"), ("SW", "Email")])
+        printer = IssueType.objects.get(name="Printer")
+        requester = User.objects.create_user("req", password="pw")
+        ticket = Ticket.objects.create(issue_type=printer, requester=requester, title="")
+        catalog.issue_choices()  # มี snapshot ของรายการเดิมอยู่แล้ว
+
+        renamed = [("HW", "Printer / Scanner"), ("SW", "Email")]
+        self._import(renamed)
+        # ชื่อใหม่ขึ้นในฟอร์มทันที (import ล้าง catalog) — ไม่ระบุ flag = ชื่อเดิมยังใช้งานอยู่
+        scanner = IssueType.objects.get(name="Printer / Scanner")
+        self.assertIn((scanner.pk, scanner.name), catalog.issue_choices()[0][1])
+        self.assertEqual(
+            self._active(), {("HW", "Printer"), ("HW", "Printer / Scanner"), ("SW", "Email")}
+        )
+
+        output = self._import(renamed, "--dry-run", "--deactivate-missing")
+        self.assertIn("- Deactivate: 1\n    HW / Printer", output)
+        self.assertIn(("HW", "Printer"), self._active())
+
+        self._import(renamed, "--deactivate-missing")
+        self.assertEqual(self._active(), {("HW", "Printer / Scanner"), ("SW", "Email")})
+        self.assertNotIn("Printer", [e.name for e in catalog.issue_groups()[0][1]])
+        # ใบงานเดิมยังอ้าง IssueType เดิม (ปิดใช้งาน ไม่ได้ลบ)
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).title, "Printer")
+
+        # กลับมาอยู่ในไฟล์ → เปิดใช้งานอีกครั้ง
+        output = self._import([("HW", "Printer")])
+        self.assertIn("Issue re-activated: 1", output)
+        self.assertTrue(IssueType.objects.get(pk=printer.pk).is_active)
+
+    def test_rename_in_admin_then_reimport(self):
+        self._import([("HW", "Printer")])
+        printer = IssueType.objects.get()
+        requester = User.objects.create_user("req", password="pw")
+        ticket = Ticket.objects.create(issue_type=printer, requester=requester, title="")
+
+        # แก้ชื่อในระบบแล้วแก้ไฟล์ตาม → ไม่สร้างซ้ำ และชื่อใหม่ไปถึงใบงานเดิม
+        printer.rename("Printer / Scanner")
+        output = self._import([("HW", "Printer / Scanner")], "--deactivate-missing")
+        self.assertIn("Issue created: 0, Issue re-activated: 0, Issue deactivated: 0", output)
+        self.assertEqual(IssueType.objects.get().pk, printer.pk)
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).title, "Printer / Scanner")
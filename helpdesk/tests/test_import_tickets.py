@@ -0,0 +1,98 @@
+# helpdesk/tests/test_import_tickets.py — นำเข้าใบงานย้อนหลัง (manage.py import_tickets)
+
+import datetime as dt
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from helpdesk import reports, search
+from helpdesk.models import Category, IssueType, Ticket, TicketComment, TicketEvent
+
+
+class ImportTicketsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        search.reset_backend_cache()
+        cls.alice = User.objects.create_user("alice", password="pw")
+        cls.it = User.objects.create_user("it", password="pw")
+        category = Category.objects.create(name="HW")
+        IssueType.objects.create(name="Printer", category=category)
+
+    def setUp(self):
+        cache.clear()
+
+    def _import(self, records, *args):
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            for record in records:
+                fh.write((record if isinstance(record, str) else json.dumps(record, ensure_ascii=False)) + "\n")
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_tickets", path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_keeps_history(self):
+        reports.build_year_summary(2023)  # แคชของปีที่จะ import ต้องถูกล้าง
+        out, err = self._import([
+            {
+                "issue_type": "Printer", "requester": "alice", "assignee": "it", "status": "closed",
+                "description": "หมึกเครื่องพิมพ์หมด", "created_at": "2023-03-01T09:00:00",
+                "updated_at": "2023-03-02T10:00:00",
+                "comments": [{"author": "it", "body": "เปลี่ยนหมึกแล้ว", "created_at": "2023-03-01T11:00:00"}],
+            },
+            {"title": "ขอติดตั้งโปรแกรม", "requester": "alice", "created_at": "2023-04-01"},
+            {"issue_type": "Printer", "requester": "nobody"},
+            "{not json",
+        ])
+        self.assertIn("Imported 2 tickets, 1 comments, skipped 2 rows", out)
+        self.assertIn("บรรทัด 3:", err)
+        self.assertIn("บรรทัด 4:", err)
+
+        closed = Ticket.objects.get(status="closed")
+        self.assertEqual(
+            (closed.title, closed.created_at, closed.updated_at),
+            (
+                "Printer",
+                timezone.make_aware(dt.datetime(2023, 3, 1, 9)),
+                timezone.make_aware(dt.datetime(2023, 3, 2, 10)),
+            ),
+        )
+        # SLA โดยประมาณ: ตอบครั้งแรก = คอมเมนต์ของ IT, ปิดงาน = updated_at
+        self.assertEqual(closed.first_response_at, timezone.make_aware(dt.datetime(2023, 3, 1, 11)))
+        self.assertEqual(closed.closed_at, closed.updated_at)
+        comment = TicketComment.objects.get()
+        self.assertEqual((comment.ticket_id, comment.created_at), (closed.pk, closed.first_response_at))
+        self.assertEqual(TicketEvent.objects.filter(kind="created").count(), 2)
+
+        self.assertEqual(sum(reports.build_year_summary(2023)["month_totals"]), 2)
+        found = search.ranked_tickets(Ticket.objects.all(), "เครื่องพิมพ์")
+        self.assertEqual(list(found.values_list("id", flat=True)), [closed.pk])
+
+    def test_queries_per_batch_not_per_row(self):
+        def queries(n):
+            rows = [{"issue_type": "Printer", "requester": "alice", "description": f"#{i}"} for i in range(n)]
+            with CaptureQueriesContext(connection) as ctx:
+                self._import(rows)
+            return len(ctx.captured_queries)
+
+        queries(1)  # ครั้งแรกสร้างแถวยอดนับ + ตรวจว่ามี search index (ครั้งเดียว)
+        self.assertEqual(queries(3), queries(30))
+        self.assertEqual(Ticket.objects.count(), 34)
+
+    def test_dry_run_writes_nothing(self):
+        out, _ = self._import(
+            [{"issue_type": "Printer", "requester": "newbie"}], "--dry-run", "--create-users"
+        )
+        self.assertIn("Validated 1 tickets", out)
+        self.assertFalse(Ticket.objects.exists())
+        self.assertFalse(User.objects.filter(username="newbie").exists())
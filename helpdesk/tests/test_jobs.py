@@ -0,0 +1,75 @@
+# helpdesk/tests/test_jobs.py — คิวงานเบื้องหลัง (helpdesk/jobs.py)
+
+import io
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from helpdesk import exports, jobs
+from helpdesk.models import BackgroundJob
+
+
+class RunJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("req", password="pw")
+
+    def _job(self, handler, attempts):
+        job = BackgroundJob.objects.create(
+            kind=exports.KIND_TICKET_LIST, requested_by=self.user, status="running", attempts=attempts
+        )
+        with mock.patch.dict(jobs._HANDLERS, {exports.KIND_TICKET_LIST: handler}):
+            return jobs.run_job(job)
+
+    def test_unexpected_error_is_logged_not_shown(self):
+        def crash(job):
+            raise RuntimeError("/srv/helpdesk/secret.py: connection string")
+
+        with self.assertLogs("helpdesk.jobs", "ERROR") as logs:
+            job = self._job(crash, attempts=jobs.MAX_ATTEMPTS)
+        self.assertIn("Traceback", logs.output[0])
+        self.assertEqual(job.status, "failed")
+        self.assertIn(f"#{job.pk}", job.error)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("helpdesk:export_status", args=[job.pk]), {"format": "json"})
+        self.assertEqual(response.json()["error"], job.error)
+        self.assertNotIn("secret", response.content.decode())
+
+    def test_job_error_message_is_shown(self):
+        def refuse(job):
+            raise jobs.JobError("ไม่มีใบงานในช่วงที่เลือก")
+
+        job = self._job(refuse, attempts=1)
+        self.assertEqual((job.status, job.error), ("failed", "ไม่มีใบงานในช่วงที่เลือก"))
+
+
+class RunWorkerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("req", password="pw")
+
+    def test_each_pass_requeues_stale_jobs(self):
+        first = BackgroundJob.objects.create(kind="test", requested_by=self.user)
+        # ยังไม่อยู่ในคิวตอนเริ่ม (ไม่ให้ถูกหยิบก่อน) — handler ของงานแรกทำให้ค้างเป็น running
+        peer = BackgroundJob.objects.create(kind="test", requested_by=self.user, status="done")
+
+        def handler(job):
+            if job.pk == first.pk:
+                # worker อื่นหยิบงานไปแล้วตายกลางทาง ระหว่างที่ worker นี้ทำงานแรกอยู่
+                BackgroundJob.objects.filter(pk=peer.pk).update(
+                    status="running", started_at=timezone.now() - jobs.STALE_AFTER * 2, attempts=1
+                )
+            return None
+
+        out = io.StringIO()
+        with mock.patch.dict(jobs._HANDLERS, {"test": handler}):
+            call_command("run_worker", "--once", stdout=out)
+
+        peer.refresh_from_db()
+        self.assertEqual(peer.status, "done")
+        self.assertIn("Processed 2 jobs", out.getvalue())
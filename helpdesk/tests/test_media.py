@@ -0,0 +1,96 @@
+# helpdesk/tests/test_media.py — ดาวน์โหลดไฟล์แนบผ่าน view ที่ตรวจสิทธิ์ (helpdesk/media.py)
+
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from helpdesk import storage
+from helpdesk.models import Category, IssueType, Ticket, TicketAttachment
+
+DATA = b"<script>alert(1)</script>" * 4
+
+
+class AttachmentDownloadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.requester = User.objects.create_user("req", password="pw")
+        cls.other = User.objects.create_user("other", password="pw")
+        category = Category.objects.create(name="HW")
+        issue = IssueType.objects.create(name="Printer", category=category)
+        cls.ticket = Ticket.objects.create(issue_type=issue, requester=cls.requester, title="")
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        storage.reset_storage()
+        self.addCleanup(storage.reset_storage)
+
+        name, sha, size = storage.media_storage().save_content(DATA, "ticket_attachments", ".html")
+        self.attachment = TicketAttachment.objects.create(
+            ticket=self.ticket, file=name, original_name="page.html", size=size, sha256=sha
+        )
+        self.url = reverse("helpdesk:ticket_file", args=[self.ticket.pk, self.attachment.pk])
+
+    def test_permissions(self):
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.force_login(self.requester)
+        other_ticket = Ticket.objects.create(issue_type=self.ticket.issue_type, requester=self.requester, title="")
+        wrong = reverse("helpdesk:ticket_file", args=[other_ticket.pk, self.attachment.pk])
+        self.assertEqual(self.client.get(wrong).status_code, 404)
+
+    def test_served_by_django(self):
+        self.client.force_login(self.requester)
+        response = self.client.get(self.url)
+        self.assertEqual(b"".join(response.streaming_content), DATA)
+        # HTML ที่แนบมาต้องดาวน์โหลด ไม่เปิดในโดเมนเรา
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="page.html"')
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+        self.assertEqual(response["ETag"], f'"{self.attachment.sha256}"')
+        self.assertIn("immutable", response["Cache-Control"])
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        partial = self.client.get(self.url, HTTP_RANGE="bytes=-4")
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(b"".join(partial.streaming_content), DATA[-4:])
+
+    def test_offloaded_to_proxy(self):
+        self.client.force_login(self.requester)
+        name = self.attachment.file.name
+
+        with self.settings(HELPDESK_MEDIA_SENDFILE="x-accel-redirect", HELPDESK_MEDIA_ACCEL_PREFIX="/internal/"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], f"/internal/{name}")
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="page.html"')
+
+        with self.settings(HELPDESK_MEDIA_SENDFILE="x-sendfile"):
+            response = self.client.get(self.url)
+        self.assertEqual(response["X-Sendfile"], storage.media_storage().path(name))
+        self.assertEqual(response.content, b"")
+
+        # ไม่มีสิทธิ์ → ไม่ส่ง header ให้ proxy
+        self.client.force_login(self.other)
+        with self.settings(HELPDESK_MEDIA_SENDFILE="x-sendfile"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn("X-Sendfile", response)
+
+    def test_unknown_sendfile_mode(self):
+        self.client.force_login(self.requester)
+        with self.settings(HELPDESK_MEDIA_SENDFILE="nginx"), self.assertLogs("django.request", "ERROR"):
+            with self.assertRaises(ImproperlyConfigured):
+                self.client.get(self.url)
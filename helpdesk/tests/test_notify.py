@@ -0,0 +1,123 @@
+# helpdesk/tests/test_notify.py — outbox แจ้งผู้แจ้งงาน (helpdesk/notify.py) ด้วย LocMemTransport
+
+import datetime as dt
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from helpdesk import notify
+from helpdesk.models import Category, IssueType, OutboxMessage, Ticket
+
+TRANSPORTS = {"test": {"BACKEND": "helpdesk.notify.LocMemTransport"}}
+
+
+@override_settings(HELPDESK_NOTIFY_TRANSPORTS=TRANSPORTS, HELPDESK_NOTIFY_DELAY_SECONDS=60)
+class NotifyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.it = User.objects.create_user("it", email="it@example.com", password="pw")
+        cls.it.user_permissions.add(Permission.objects.get(codename="change_ticket"))
+        cls.alice = User.objects.create_user("alice", email="alice@example.com", password="pw")
+        cls.bob = User.objects.create_user("bob", email="bob@example.com", password="pw")
+        category = Category.objects.create(name="HW")
+        cls.issue = IssueType.objects.create(name="Printer", category=category)
+
+    def setUp(self):
+        notify.reset_transports()
+        self.addCleanup(notify.reset_transports)
+        notify.LocMemTransport.sent = []
+        self.later = timezone.now() + dt.timedelta(minutes=2)
+
+    def _ticket(self, requester):
+        return Ticket.objects.create(issue_type=self.issue, requester=requester, title="")
+
+    def _use_transport(self, **options):
+        config = {"test": {"BACKEND": "helpdesk.notify.LocMemTransport", "OPTIONS": options}}
+        override = override_settings(HELPDESK_NOTIFY_TRANSPORTS=config)
+        override.enable()
+        self.addCleanup(override.disable)
+        notify.reset_transports()
+
+    def test_views_enqueue_and_deliver_one_digest(self):
+        ticket = self._ticket(self.alice)
+        self.client.force_login(self.it)
+        self.client.post(reverse("helpdesk:ticket_claim", args=[ticket.pk]))
+        self.client.post(reverse("helpdesk:add_comment", args=[ticket.pk]), {"body": "กำลังตรวจสอบ"})
+        self.assertEqual(OutboxMessage.objects.filter(recipient=self.alice).count(), 2)
+
+        # ยังไม่ถึงเวลา (รอรวมข้อความ)
+        self.assertEqual(notify.deliver(), (0, 0, 0, 0))
+        self.assertEqual(notify.deliver(now=self.later), (1, 2, 0, 0))
+        [(address, subject, body)] = notify.LocMemTransport.sent
+        self.assertEqual(address, "alice@example.com")
+        self.assertIn("2 รายการ", subject)
+        self.assertIn("กำลังตรวจสอบ", body)
+        self.assertFalse(OutboxMessage.objects.exclude(status="sent").exists())
+
+    def test_comment_from_edit_form_and_api_patch_is_notified(self):
+        ticket = Ticket.objects.create(
+            issue_type=self.issue, requester=self.alice, assignee=self.it, status="in_progress", title=""
+        )
+        self.client.force_login(self.it)
+        self.client.post(reverse("helpdesk:ticket_update", args=[ticket.pk]), {
+            "issue_type": self.issue.pk, "contact": "", "description": "x",
+            "status": "in_progress", "assignee": self.it.pk, "comment": "เปลี่ยนตลับหมึกแล้ว",
+        })
+        self.client.patch(
+            reverse("helpdesk:api:ticket", args=[ticket.pk]), {"comment": "รอทดสอบ"},
+            content_type="application/json",
+        )
+        self.assertEqual(
+            list(OutboxMessage.objects.filter(recipient=self.alice, kind="commented").order_by("id").values_list("body", flat=True)),
+            [notify._body("เปลี่ยนตลับหมึกแล้ว", ticket.pk), notify._body("รอทดสอบ", ticket.pk)],
+        )
+
+    def test_actor_is_not_notified(self):
+        ticket = self._ticket(self.alice)
+        self.assertEqual(notify.enqueue("commented", [ticket], actor=self.alice, text="x"), 0)
+
+    def test_limit_counts_recipients_not_messages(self):
+        first, second = self._ticket(self.alice), self._ticket(self.bob)
+        for _ in range(3):
+            notify.enqueue("commented", [first], actor=self.it)
+        notify.enqueue("commented", [second], actor=self.it)
+
+        result = notify.deliver(now=self.later, limit=2)
+        self.assertEqual((result.digests, result.sent), (2, 4))
+        self.assertEqual(
+            sorted(address for address, _, _ in notify.LocMemTransport.sent),
+            ["alice@example.com", "bob@example.com"],
+        )
+
+    def test_failure_backs_off_then_gives_up(self):
+        self._use_transport(fail_with=ConnectionError("down"))
+        notify.enqueue("closed", [self._ticket(self.alice)], actor=self.it)
+
+        with self.assertLogs("helpdesk.notify", "WARNING"):
+            self.assertEqual(notify.deliver(now=self.later), (0, 0, 1, 0))
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), ("pending", 1))
+        self.assertIn("ConnectionError", message.last_error)
+
+        # ก่อนถึงเวลาลองใหม่ (backoff นับจากเวลาที่ส่งจริง) ไม่หยิบ
+        retry_at = message.next_attempt_at
+        self.assertGreater(retry_at, timezone.now() + dt.timedelta(seconds=20))
+        self.assertEqual(notify.deliver(now=retry_at - dt.timedelta(seconds=1)), (0, 0, 0, 0))
+
+        self._use_transport(fail_with=notify.UndeliverableError("bad address"))
+        with self.assertLogs("helpdesk.notify", "WARNING"):
+            self.assertEqual(notify.deliver(now=retry_at), (0, 0, 0, 1))
+        self.assertEqual(OutboxMessage.objects.get().status, "failed")
+
+    def test_each_pass_requeues_stale_claims(self):
+        notify.enqueue("closed", [self._ticket(self.alice)], actor=self.it)
+        # worker อื่นหยิบไปแล้วตายกลางทาง
+        OutboxMessage.objects.update(
+            status="sending", claimed_by="dead", claimed_at=self.later - notify.STALE_AFTER * 2
+        )
+        self.assertEqual(notify.deliver(now=self.later), (1, 1, 0, 0))
+        self.assertEqual(OutboxMessage.objects.get().status, "sent")
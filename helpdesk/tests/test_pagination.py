@@ -0,0 +1,63 @@
+# helpdesk/tests/test_pagination.py — แบ่งหน้าแบบงานเปิดก่อน (PartitionedKeysetPaginator)
+
+import datetime as dt
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from helpdesk.models import Category, IssueType, Ticket
+from helpdesk.pagination import PartitionedKeysetPaginator
+from helpdesk.queries import OPEN_FIRST_ORDERING, OPEN_FIRST_PARTITIONS, order_open_first
+
+
+class OpenFirstPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        requester = User.objects.create_user("req", password="pw")
+        category = Category.objects.create(name="HW")
+        issue = IssueType.objects.create(name="Printer", category=category)
+        now = timezone.now()
+        for i in range(8):
+            ticket = Ticket.objects.create(
+                issue_type=issue, requester=requester, status="closed" if i % 3 == 0 else "open"
+            )
+            # updated_at ซ้ำกันเป็นคู่ → ต้องตัดสินด้วย id
+            Ticket.objects.filter(pk=ticket.pk).update(updated_at=now - dt.timedelta(minutes=i // 2))
+
+    def setUp(self):
+        self.paginator = PartitionedKeysetPaginator(OPEN_FIRST_ORDERING, OPEN_FIRST_PARTITIONS, page_size=3)
+        self.qs = order_open_first(Ticket.objects.all())
+
+    def test_pages_follow_open_first_ordering(self):
+        expected = list(self.qs.values_list("id", flat=True))
+
+        pages, token = [], None
+        while True:
+            page = self.paginator.page(self.qs, token)
+            pages.append([t.pk for t in page])
+            if not page.has_next:
+                break
+            token = page.next_cursor
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual([len(p) for p in pages], [3, 3, 2])
+
+        # ย้อนกลับจากหน้าสุดท้ายได้หน้าเดิมทุกหน้า
+        back = []
+        while page.has_previous:
+            page = self.paginator.page(self.qs, page.prev_cursor)
+            back.insert(0, [t.pk for t in page])
+        self.assertEqual(back, pages[:-1])
+
+    def test_page_within_one_group_uses_one_query(self):
+        with self.assertNumQueries(1):
+            page = self.paginator.page(self.qs)
+        self.assertEqual({t.is_closed for t in page}, {0})
+
+    def test_tampered_group_returns_empty_page(self):
+        row = Ticket(id=1, updated_at=timezone.now())
+        row.is_closed = 7
+        token = self.paginator.encode_cursor(row, "next")
+        self.assertEqual(len(self.paginator.page(self.qs, token)), 0)
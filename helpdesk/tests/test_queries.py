@@ -0,0 +1,71 @@
+# helpdesk/tests/test_queries.py — จำนวน query ต่อหน้าต้องคงที่ ไม่ขึ้นกับจำนวนใบงาน
+
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.test import TestCase
+from django.urls import reverse
+
+from helpdesk.models import Category, IssueType, Ticket, TicketComment, UserProfile
+
+
+def _render_html(template_name, context):
+    # xhtml2pdf อาจไม่ได้ติดตั้ง: render template (ดึงข้อมูลครบเหมือนสร้าง PDF จริง) แต่ไม่แปลงเป็น PDF
+    return get_template(template_name).render(context).encode("utf-8")
+
+
+@mock.patch("helpdesk.views.PDF_AVAILABLE", True)
+@mock.patch("helpdesk.exports.render_pdf", _render_html)
+class QueryCountTests(TestCase):
+    # (ผู้ใช้, หน้า) → จำนวน query ทั้งคำขอ (session + ผู้ใช้ + ข้อมูลหน้า) ตอนแคชว่าง
+    # รายการ/dashboard: หน้าที่คร่อมงานเปิดและงานปิดอ่าน 2 query (PartitionedKeysetPaginator)
+    EXPECTED = {
+        ("it", "helpdesk:ticket_list"): 10,
+        ("it", "helpdesk:dashboard"): 9,
+        ("it", "helpdesk:ticket_list_pdf"): 4,
+        ("req", "helpdesk:ticket_list"): 9,
+        ("req", "helpdesk:dashboard"): 9,
+        ("req", "helpdesk:ticket_list_pdf"): 4,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            "req": User.objects.create_user("req", password="pw", first_name="Req"),
+            "it": User.objects.create_user("it", password="pw", first_name="It"),
+        }
+        cls.users["it"].user_permissions.add(Permission.objects.get(codename="change_ticket"))
+        # context processor สร้างโปรไฟล์ของ IT ครั้งแรกที่เปิดหน้า → สร้างไว้ก่อนให้ทุกคำขอเท่ากัน
+        UserProfile.objects.create(user=cls.users["it"])
+        category = Category.objects.create(name="HW")
+        cls.issues = [IssueType.objects.create(name=f"Issue {i}", category=category) for i in range(3)]
+
+    def setUp(self):
+        # snapshot ของ catalog จากเทสต์ก่อน (id ถูกใช้ซ้ำหลัง rollback) → เริ่มใหม่
+        cache.clear()
+
+    def _add_tickets(self, n):
+        for i in range(n):
+            ticket = Ticket.objects.create(
+                issue_type=self.issues[i % 3],
+                requester=self.users["req"],
+                assignee=self.users["it"] if i % 2 else None,
+                # งานเปิดน้อยกว่าหนึ่งหน้า dashboard → ทุกหน้าที่วัดคร่อมงานเปิดและงานปิดเสมอ
+                status=("open", "in_progress", *["closed"] * 6)[i % 8],
+            )
+            TicketComment.objects.create(ticket=ticket, author=self.users["it"], body="ok")
+
+    def test_query_count_does_not_grow_with_rows(self):
+        # 2 ใบ (หน้าเดียว) แล้ว 60 ใบ (เกินหนึ่งหน้า) — จำนวน query ต้องเท่าเดิม
+        for total, extra in ((2, 2), (60, 58)):
+            self._add_tickets(extra)
+            self.assertEqual(Ticket.objects.count(), total)
+            for (username, name), expected in self.EXPECTED.items():
+                self.client.force_login(self.users[username])
+                cache.clear()
+                with self.subTest(rows=total, user=username, page=name):
+                    with self.assertNumQueries(expected):
+                        response = self.client.get(reverse(name))
+                    self.assertEqual(response.status_code, 200)
@@ -0,0 +1,74 @@
+# helpdesk/tests/test_reports.py — สรุปใบงานรายปี (helpdesk/reports.py)
+
+import datetime as dt
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from helpdesk import catalog, reports
+from helpdesk.models import Category, IssueType, Ticket
+
+YEAR = 2024
+
+
+class YearSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.alice = User.objects.create_user("alice", password="pw")
+        cls.bob = User.objects.create_user("bob", password="pw")
+        cls.hardware = Category.objects.create(name="HW")
+        cls.software = Category.objects.create(name="SW")
+        printer = IssueType.objects.create(name="Printer", category=cls.hardware)
+        email = IssueType.objects.create(name="Email", category=cls.software)
+
+        def ticket(issue, requester, month):
+            t = Ticket.objects.create(issue_type=issue, requester=requester, title="")
+            created = timezone.make_aware(dt.datetime(YEAR, month, 15, 9))
+            Ticket.objects.filter(pk=t.pk).update(created_at=created)
+            return t
+
+        cls.tickets = [
+            ticket(printer, cls.alice, 1),
+            ticket(printer, cls.bob, 1),
+            ticket(printer, cls.alice, 3),
+            ticket(email, cls.bob, 12),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_one_grouped_query_then_cached(self):
+        catalog.categories()  # หัวแถวมาจาก snapshot ของ catalog (ไม่นับ)
+        # GROUP BY (เดือน, หมวด) 1 query + ค่าเฉลี่ยเวลา SLA 2 query — ไม่ขึ้นกับจำนวนใบงาน/หมวด
+        with self.assertNumQueries(3):
+            summary = reports.build_year_summary(YEAR)
+        self.assertEqual(
+            [(row["category"].name, row["monthly"], row["row_total"]) for row in summary["rows"]],
+            [("HW", [2, 0, 1] + [0] * 9, 3), ("SW", [0] * 11 + [1], 1)],
+        )
+        self.assertEqual(summary["month_totals"], [2, 0, 1] + [0] * 8 + [1])
+        self.assertEqual(summary["grand_total"], 4)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(reports.build_year_summary(YEAR), summary)
+
+    def test_scope_and_invalidation(self):
+        scope = reports.summary_scope(self.alice, is_it_staff=False)
+        self.assertEqual(reports.build_year_summary(YEAR, scope)["grand_total"], 2)
+        self.assertEqual(reports.build_year_summary(YEAR)["grand_total"], 4)
+
+        # ลบใบงานของปีนั้น → signal ล้างแคชทุก scope ของปี
+        Ticket.objects.get(pk=self.tickets[0].pk).delete()
+        self.assertEqual(reports.build_year_summary(YEAR, scope)["grand_total"], 1)
+        self.assertEqual(reports.build_year_summary(YEAR)["grand_total"], 3)
+
+        # หมวดเปลี่ยนชื่อ → หัวแถวของทุกปีเปลี่ยนตาม
+        software = Category.objects.get(pk=self.software.pk)
+        software.name = "Software"
+        with self.captureOnCommitCallbacks(execute=True):
+            software.save()
+        names = [row["category"].name for row in reports.build_year_summary(YEAR)["rows"]]
+        self.assertEqual(names, ["HW", "Software"])
@@ -0,0 +1,39 @@
+# helpdesk/tests/test_roles.py — แคชรายชื่อเจ้าหน้าที่ IT (helpdesk/roles.py)
+
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from helpdesk import roles
+
+
+class ItStaffCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("it", password="pw")
+        self.perm = Permission.objects.get(codename="change_ticket")
+        self.user.user_permissions.add(self.perm)
+
+    def _revoke_elsewhere(self):
+        """ถอนสิทธิ์แบบที่ process อื่นทำ: signal ไม่ล้างแคชของ process นี้"""
+        with mock.patch.object(roles, "invalidate"):
+            self.user.user_permissions.remove(self.perm)
+
+    def test_entries_expire(self):
+        with mock.patch.object(roles.cache, "set", wraps=roles.cache.set) as cache_set:
+            roles.it_staff_ids()
+            roles.it_contact()
+        self.assertEqual({c.kwargs["timeout"] for c in cache_set.call_args_list}, {60})
+
+    @override_settings(HELPDESK_ROLES_CACHE_TIMEOUT=0)
+    def test_revocation_in_other_process_is_seen_after_timeout(self):
+        self.assertIn(self.user.pk, roles.it_staff_ids())
+        self._revoke_elsewhere()
+        self.assertNotIn(self.user.pk, roles.it_staff_ids())
+
+    def test_local_revocation_invalidates_immediately(self):
+        self.assertIn(self.user.pk, roles.it_staff_ids())
+        self.user.user_permissions.remove(self.perm)
+        self.assertNotIn(self.user.pk, roles.it_staff_ids())
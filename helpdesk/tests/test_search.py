@@ -0,0 +1,71 @@
+# helpdesk/tests/test_search.py — จัดอันดับผลค้นหาจากแถวที่ตรงทั้งหมด ไม่ใช่แค่ใบล่าสุด
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from helpdesk import search
+from helpdesk.models import Category, IssueType, Ticket
+from helpdesk.pagination import KeysetPaginator
+
+
+@override_settings(HELPDESK_SEARCH_RANK_WINDOW=2)
+class RankTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        search.reset_backend_cache()
+        cls.alice = User.objects.create_user("alice", password="pw")
+        cls.bob = User.objects.create_user("bob", password="pw")
+        category = Category.objects.create(name="HW")
+        issue = IssueType.objects.create(name="Other", category=category)
+
+        def ticket(requester, title, description):
+            # title ถูกคำนวณจาก issue type ตอนสร้าง → ตั้งภายหลัง
+            t = Ticket.objects.create(issue_type=issue, requester=requester, description=description)
+            t.title = title
+            t.save()
+            return t
+
+        # ใบเก่าสุดเกี่ยวข้องที่สุด (คำค้นอยู่ในชื่อเรื่องและซ้ำหลายครั้ง)
+        cls.best = ticket(cls.alice, "เครื่องพิมพ์เสีย", "เครื่องพิมพ์ชั้น 2 เครื่องพิมพ์ไม่ออก เครื่องพิมพ์ค้าง")
+        cls.newer = [
+            ticket(cls.alice, f"เรื่องที่ {i}", f"ขอหมึกเครื่องพิมพ์ {i}") for i in range(4)
+        ]
+        # ของคนอื่น (ผู้ใช้ทั่วไปไม่เห็น) เกี่ยวข้องมากแต่ต้องไม่กินที่ในผลลัพธ์
+        cls.hidden = ticket(cls.bob, "เครื่องพิมพ์ เครื่องพิมพ์", "เครื่องพิมพ์ เครื่องพิมพ์ เครื่องพิมพ์")
+
+    def test_uses_full_text_index(self):
+        self.assertIsInstance(search.get_backend(), search.SQLiteFTSBackend)
+
+    def test_most_relevant_ticket_survives_the_window(self):
+        qs = search.ranked_tickets(Ticket.objects.filter(requester=self.alice), "เครื่องพิมพ์")
+        rows = list(qs.values_list("id", "search_rank"))
+        self.assertEqual(rows[0][0], self.best.pk)
+        self.assertNotIn(self.hidden.pk, [pk for pk, _ in rows])
+
+        # window จำกัดแค่การจัดอันดับ: ใบที่เหลือยังอยู่ครบ ต่อท้ายเรียงตาม -updated_at
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(all(rank <= 0 for _, rank in rows[:2]))
+        rest = [pk for pk, rank in rows[2:] if rank == search.UNRANKED]
+        self.assertEqual(len(rest), 3)
+        by_updated = Ticket.objects.filter(id__in=rest).order_by("-updated_at", "-id")
+        self.assertEqual(rest, list(by_updated.values_list("id", flat=True)))
+
+    def test_pages_reach_matches_beyond_the_window(self):
+        qs = search.ranked_tickets(Ticket.objects.filter(requester=self.alice), "เครื่องพิมพ์")
+        paginator = KeysetPaginator(search.SEARCH_ORDERING, page_size=2)
+        seen, token = [], None
+        while True:
+            page = paginator.page(qs, token)
+            seen += [t.pk for t in page]
+            if not page.has_next:
+                break
+            token = page.next_cursor
+        self.assertEqual(seen, list(qs.values_list("id", flat=True)))
+        self.assertEqual(sorted(seen), sorted([self.best.pk, *(t.pk for t in self.newer)]))
+
+    def test_window_zero_ranks_everything(self):
+        with self.settings(HELPDESK_SEARCH_RANK_WINDOW=0):
+            qs = search.ranked_tickets(Ticket.objects.filter(requester=self.alice), "เครื่องพิมพ์")
+            self.assertEqual(qs.count(), 5)
@@ -0,0 +1,73 @@
+# helpdesk/tests/test_sla.py — sla.scan แจ้งเจ้าหน้าที่ผ่าน outbox (ไม่ใช่แค่แถว Notification)
+
+import datetime as dt
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from helpdesk import notify, sla
+from helpdesk.models import Category, IssueType, Notification, OutboxMessage, Ticket
+
+TRANSPORTS = {"test": {"BACKEND": "helpdesk.notify.LocMemTransport"}}
+
+
+@override_settings(HELPDESK_NOTIFY_TRANSPORTS=TRANSPORTS, HELPDESK_SLA_ESCALATE_TO=["boss"])
+class ScanNotifyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.requester = User.objects.create_user("req", email="req@example.com", password="pw")
+        cls.it = User.objects.create_user("it", email="it@example.com", password="pw")
+        cls.it.user_permissions.add(Permission.objects.get(codename="change_ticket"))
+        cls.boss = User.objects.create_user("boss", email="boss@example.com", password="pw")
+        category = Category.objects.create(name="HW")
+        cls.issue = IssueType.objects.create(name="Printer", category=category)
+
+    def setUp(self):
+        notify.reset_transports()
+        self.addCleanup(notify.reset_transports)
+        notify.LocMemTransport.sent = []
+        self.now = timezone.now()
+
+    def _ticket(self, due_in, assignee=None):
+        return Ticket.objects.create(
+            issue_type=self.issue, requester=self.requester, assignee=assignee, title="",
+            due_at=self.now + due_in,
+        )
+
+    def _outbox(self):
+        return sorted(OutboxMessage.objects.values_list("kind", "address"))
+
+    def test_breach_is_sent_to_assignee_and_escalation(self):
+        ticket = self._ticket(-dt.timedelta(minutes=5), assignee=self.it)
+
+        result = sla.scan(now=self.now)
+        self.assertEqual((result.breached, result.notified), (1, 2))
+        self.assertEqual(
+            self._outbox(), [("sla_breach", "boss@example.com"), ("sla_breach", "it@example.com")]
+        )
+        # ผู้แจ้งไม่ได้รับข้อความ SLA
+        self.assertFalse(OutboxMessage.objects.filter(recipient=self.requester).exists())
+
+        notify.deliver(now=self.now + dt.timedelta(minutes=2))
+        sent = {address: subject for address, subject, _ in notify.LocMemTransport.sent}
+        self.assertEqual(set(sent), {"boss@example.com", "it@example.com"})
+        self.assertIn(f"#{ticket.pk}", sent["it@example.com"])
+
+    def test_unassigned_warning_goes_to_it_staff(self):
+        self._ticket(dt.timedelta(minutes=10))
+        sla.scan(now=self.now)
+        self.assertEqual(self._outbox(), [("sla_warning", "it@example.com")])
+
+    def test_repeated_notification_is_not_sent_twice(self):
+        ticket = self._ticket(-dt.timedelta(minutes=5), assignee=self.it)
+        sla.scan(now=self.now)
+        # scanner อีกตัวอ่านใบเดิมไปก่อนที่ sla_level จะถูกบันทึก → Notification เดิม (dedupe_key ซ้ำ)
+        Ticket.objects.filter(pk=ticket.pk).update(sla_level=Ticket.SLA_WARNING)
+
+        result = sla.scan(now=self.now)
+        self.assertEqual((result.breached, result.notified), (1, 0))
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
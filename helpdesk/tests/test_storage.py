@@ -0,0 +1,142 @@
+# helpdesk/tests/test_storage.py — S3MediaStorage กับ client ตัวแทนแบบ MinIO ในหน่วยความจำ (ไม่ต้องมี boto3)
+
+import hashlib
+import io
+import re
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from helpdesk import storage
+from helpdesk.models import Category, IssueType, Ticket, TicketAttachment
+
+
+class FakeClientError(Exception):
+    """รูปแบบเดียวกับ botocore ClientError (มี .response["Error"]["Code"])"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class FakeMinio:
+    """client ตัวแทน: เก็บ object ใน dict ตอบเฉพาะเมธอดของ boto3 ที่ S3MediaStorage ใช้"""
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = []
+
+    def _get(self, Bucket, Key):
+        try:
+            return self.objects[(Bucket, Key)]
+        except KeyError:
+            raise FakeClientError("404") from None
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None):
+        self.calls.append(("upload", key))
+        self.objects[(bucket, key)] = (fileobj.read(), (ExtraArgs or {}).get("ContentType"))
+
+    def head_object(self, Bucket, Key):
+        data, content_type = self._get(Bucket, Key)
+        return {"ContentLength": len(data), "ContentType": content_type}
+
+    def get_object(self, Bucket, Key, Range=None):
+        data, _ = self._get(Bucket, Key)
+        if Range:
+            start, end = map(int, re.match(r"bytes=(\d+)-(\d+)$", Range).groups())
+            self.calls.append(("range", Key, start, end))
+            data = data[start:end + 1]
+        return {"Body": io.BytesIO(data)}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def generate_presigned_url(self, method, Params, ExpiresIn):
+        return f"http://minio:9000/{Params['Bucket']}/{Params['Key']}?expires={ExpiresIn}"
+
+
+class S3MediaStorageTests(TestCase):
+    def setUp(self):
+        self.client_s3 = FakeMinio()
+        self.storage = storage.S3MediaStorage(bucket="media", prefix="hd", client=self.client_s3)
+
+    def test_save_content_is_content_addressed(self):
+        data = b"printer log\n" * 100
+        sha = hashlib.sha256(data).hexdigest()
+
+        name, digest, size = self.storage.save_content(data, "ticket_attachments", ".TXT")
+        again, _, _ = self.storage.save_content(io.BytesIO(data), "ticket_attachments", ".txt")
+
+        self.assertEqual(name, f"ticket_attachments/{sha[:2]}/{sha}.txt")
+        self.assertEqual((again, digest, size), (name, sha, len(data)))
+        # เนื้อหาเดิม → อัปโหลดครั้งเดียว
+        self.assertEqual([c for c in self.client_s3.calls if c[0] == "upload"], [("upload", f"hd/{name}")])
+        self.assertEqual(self.client_s3.objects[("media", f"hd/{name}")][1], "text/plain")
+
+    def test_exists_size_open_delete(self):
+        name, _, _ = self.storage.save_content(b"hello", "x", ".txt")
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.size(name), 5)
+        with self.storage.open(name) as fh:
+            self.assertEqual(fh.read(), b"hello")
+        self.assertIn("/media/hd/x/", self.storage.url(name))
+
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+
+    def test_other_errors_are_not_swallowed(self):
+        def denied(**kwargs):
+            raise FakeClientError("403")
+
+        self.client_s3.head_object = denied
+        with self.assertRaises(FakeClientError):
+            self.storage.exists("x/y.txt")
+
+    def test_open_range_fetches_only_the_range(self):
+        name, _, _ = self.storage.save_content(bytes(range(256)), "x", ".bin")
+        self.assertEqual(self.storage.open_range(name, 10, 4).read(), bytes([10, 11, 12, 13]))
+        self.assertIn(("range", f"hd/{name}", 10, 13), self.client_s3.calls)
+
+
+class S3DownloadTests(TestCase):
+    """ไฟล์แนบของใบงานที่เก็บใน S3 — ดาวน์โหลดผ่าน view เดิม (ตรวจสิทธิ์ + Range)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.requester = User.objects.create_user("req", password="pw")
+        category = Category.objects.create(name="HW")
+        issue = IssueType.objects.create(name="Printer", category=category)
+        cls.ticket = Ticket.objects.create(issue_type=issue, requester=cls.requester, title="")
+
+    def setUp(self):
+        self.client_s3 = FakeMinio()
+        config = {
+            "BACKEND": "helpdesk.storage.S3MediaStorage",
+            "OPTIONS": {"bucket": "media", "client": self.client_s3},
+        }
+        override = override_settings(HELPDESK_MEDIA_STORAGE=config)
+        override.enable()
+        self.addCleanup(override.disable)
+        storage.reset_storage()
+        self.addCleanup(storage.reset_storage)
+
+    def test_download_with_range(self):
+        data = b"0123456789" * 10
+        name, sha, size = storage.media_storage().save_content(data, "ticket_attachments", ".log")
+        attachment = TicketAttachment.objects.create(
+            ticket=self.ticket, file=name, original_name="printer.log", size=size, sha256=sha
+        )
+        self.assertIn(("media", name), self.client_s3.objects)
+
+        self.client.force_login(self.requester)
+        url = reverse("helpdesk:ticket_file", args=[self.ticket.pk, attachment.pk])
+        response = self.client.get(url, HTTP_RANGE="bytes=5-14")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 5-14/{len(data)}")
+        self.assertEqual(b"".join(response.streaming_content), data[5:15])
+
+        response = self.client.get(url)
+        self.assertEqual(b"".join(response.streaming_content), data)
@@ -0,0 +1,98 @@
+# helpdesk/tests/test_uploads.py — อัปโหลดไฟล์แนบแบบแบ่ง chunk (helpdesk/uploads.py + view)
+
+import datetime as dt
+import hashlib
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from helpdesk import storage, uploads
+from helpdesk.models import Category, IssueType, Ticket, UploadSession
+
+DATA = b"0123456789" * 10
+SHA = hashlib.sha256(DATA).hexdigest()
+
+
+class UploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.requester = User.objects.create_user("req", password="pw")
+        cls.other = User.objects.create_user("other", password="pw")
+        category = Category.objects.create(name="HW")
+        cls.issue = IssueType.objects.create(name="Printer", category=category)
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media, HELPDESK_UPLOAD_MAX_TICKET_BYTES=150)
+        override.enable()
+        self.addCleanup(override.disable)
+        storage.reset_storage()
+        self.addCleanup(storage.reset_storage)
+        self.ticket = Ticket.objects.create(issue_type=self.issue, requester=self.requester, title="")
+
+    def _start(self, size=len(DATA), sha256=SHA):
+        return uploads.start_session(self.ticket, self.requester, "log.txt", size, sha256=sha256)
+
+    def test_sha256_is_required(self):
+        with self.assertRaisesMessage(uploads.UploadError, "sha256"):
+            self._start(sha256="")
+
+    def test_quota_counts_open_sessions(self):
+        self._start()
+        with self.assertRaises(uploads.UploadError) as ctx:
+            self._start()
+        self.assertEqual(ctx.exception.status, 413)
+
+    def test_chunks_complete_and_verify(self):
+        session = self._start()
+        uploads.write_chunk(session, io.BytesIO(DATA[:60]), 0, 60)
+        uploads.write_chunk(session, io.BytesIO(DATA[60:]), 60, 40)
+        session.refresh_from_db()
+        self.assertEqual((session.status, session.writer), ("complete", ""))
+        self.assertEqual(session.attachment.sha256, SHA)
+
+    def test_chunk_in_progress_is_not_overwritten(self):
+        session = self._start()
+        # request อื่นจอง offset 0 ไว้และกำลังเขียนอยู่
+        UploadSession.objects.filter(pk=session.pk).update(writer="other", updated_at=timezone.now())
+        with self.assertRaises(uploads.UploadError) as ctx:
+            uploads.write_chunk(session, io.BytesIO(DATA[:60]), 0, 60)
+        self.assertEqual(ctx.exception.status, 409)
+
+        # ผู้จองตายกลางทาง → หลัง lease หมดเขียนต่อได้
+        UploadSession.objects.filter(pk=session.pk).update(
+            updated_at=timezone.now() - uploads.write_lease() - dt.timedelta(seconds=1)
+        )
+        uploads.write_chunk(session, io.BytesIO(DATA[:60]), 0, 60)
+        session.refresh_from_db()
+        self.assertEqual((session.received, session.writer), (60, ""))
+
+    def test_bad_chunk_releases_claim(self):
+        session = self._start()
+        with self.assertRaises(uploads.UploadError):
+            uploads.write_chunk(session, io.BytesIO(DATA[:10]), 0, 60)
+        session.refresh_from_db()
+        self.assertEqual((session.received, session.writer), (0, ""))
+
+    def test_chunk_view_rechecks_ticket(self):
+        session = self._start()
+        url = reverse("helpdesk:upload_chunk", args=[session.pk])
+        put = {"content_type": "application/octet-stream", "HTTP_CONTENT_RANGE": "bytes 0-59/100"}
+
+        # ใบงานเปลี่ยนผู้แจ้ง → ไม่มีสิทธิ์ดูใบงานแล้ว
+        Ticket.objects.filter(pk=self.ticket.pk).update(requester=self.other)
+        self.client.force_login(self.requester)
+        self.assertEqual(self.client.put(url, DATA[:60], **put).status_code, 403)
+
+        Ticket.objects.filter(pk=self.ticket.pk).update(requester=self.requester, status="closed")
+        response = self.client.put(url, DATA[:60], **put)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["status"], "aborted")
@@ -0,0 +1,265 @@
+# helpdesk/uploads.py — อัปโหลดไฟล์แนบแบบแบ่ง chunk (UploadSession → TicketAttachment)
+#
+#   1) start_session(): ตรวจชนิดไฟล์/ขนาด/sha256/โควตาของใบงาน (ล็อกแถวใบงาน) แล้วสร้าง session
+#   2) write_chunk(): จอง offset ด้วย UPDATE แบบมีเงื่อนไขก่อน แล้วอ่าน body ของ request
+#      ทีละ STREAM_BLOCK ไบต์เขียนต่อท้ายไฟล์ชั่วคราว (ไม่โหลดทั้ง chunk เข้าหน่วยความจำ)
+#      — offset ต้องตรงกับที่รับแล้ว ส่งซ้ำ/ต่อจากที่หลุดได้ แต่เขียน chunk เดียวกันพร้อมกันไม่ได้
+#   3) ครบ size แล้ว finish(): ตรวจ sha256 แล้วย้ายเข้า storage (content-addressed) เป็น TicketAttachment
+#
+# ค่าที่ปรับได้ใน settings (ดู _setting): HELPDESK_UPLOAD_*
+
+import datetime as dt
+import hashlib
+import os
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import Ticket, TicketAttachment, UploadSession
+from .storage import media_storage
+
+STREAM_BLOCK = 64 * 1024
+
+DEFAULT_EXTENSIONS = {
+    # รูป / เอกสาร
+    "jpg", "jpeg", "png", "gif", "webp", "heic", "bmp",
+    "pdf", "txt", "log", "csv", "json", "xml",
+    "doc", "docx", "xls", "xlsx", "ppt", "pptx", "odt", "ods",
+    # ไฟล์บีบอัด (log bundle)
+    "zip", "gz", "tgz", "7z", "rar",
+}
+
+
+def _setting(name, default):
+    return getattr(settings, f"HELPDESK_UPLOAD_{name}", default)
+
+
+def max_file_size():
+    return _setting("MAX_FILE_SIZE", 200 * 1024 * 1024)
+
+
+def max_ticket_bytes():
+    return _setting("MAX_TICKET_BYTES", 1024 * 1024 * 1024)
+
+
+def chunk_size():
+    """ขนาด chunk ที่แนะนำให้ client ส่ง (และขนาดสูงสุดที่รับต่อ request)"""
+    return _setting("CHUNK_SIZE", 4 * 1024 * 1024)
+
+
+def write_lease():
+    """เวลาที่ request หนึ่งจอง offset ไว้เขียน (ตายกลางทาง → request อื่นจองต่อได้หลังจากนี้)"""
+    return dt.timedelta(seconds=_setting("WRITE_LEASE_SECONDS", 300))
+
+
+def _temp_dir():
+    path = _setting("TEMP_DIR", os.path.join(settings.MEDIA_ROOT, "uploads_tmp"))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def temp_path(session):
+    return os.path.join(_temp_dir(), f"{session.pk}.part")
+
+
+class UploadError(Exception):
+    """คำขอไม่ถูกต้อง (status = HTTP status ที่ควรตอบ)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------- เริ่ม ----------
+def ticket_usage(ticket):
+    """ไบต์ที่ใบงานใช้ไปแล้ว: ไฟล์แนบ + session ที่ยังอัปโหลดอยู่ (จองพื้นที่ไว้)"""
+    attached = TicketAttachment.objects.filter(ticket=ticket).aggregate(n=Sum("size"))["n"] or 0
+    reserved = (
+        UploadSession.objects.filter(ticket=ticket, status="open").aggregate(n=Sum("size"))["n"] or 0
+    )
+    return attached + reserved
+
+
+def start_session(ticket, user, filename, size, content_type="", sha256=""):
+    filename = os.path.basename((filename or "").replace("\\", "/")).strip()
+    if not filename:
+        raise UploadError("ต้องระบุชื่อไฟล์")
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if ext not in _setting("ALLOWED_EXTENSIONS", DEFAULT_EXTENSIONS):
+        raise UploadError(f"ไม่อนุญาตไฟล์ชนิด .{ext or '?'}", status=415)
+
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("size ไม่ถูกต้อง")
+    if size <= 0:
+        raise UploadError("size ต้องมากกว่า 0")
+    if size > max_file_size():
+        raise UploadError("ไฟล์ใหญ่เกินกำหนด", status=413)
+
+    sha256 = (sha256 or "").strip().lower()
+    if not sha256:
+        raise UploadError("ต้องระบุ sha256 ของไฟล์")
+    if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+        raise UploadError("sha256 ไม่ถูกต้อง")
+
+    with transaction.atomic():
+        # ล็อกแถวใบงาน → session ของใบงานเดียวกันตรวจโควตาทีละราย (ไม่จองพื้นที่เกินพร้อมกัน)
+        list(Ticket.objects.select_for_update().filter(pk=ticket.pk).values_list("pk"))
+        if ticket_usage(ticket) + size > max_ticket_bytes():
+            raise UploadError("พื้นที่ไฟล์แนบของใบงานนี้เต็มแล้ว", status=413)
+        session = UploadSession.objects.create(
+            ticket=ticket,
+            user=user,
+            filename=filename[:255],
+            content_type=(content_type or "")[:100],
+            size=size,
+            sha256=sha256,
+        )
+    # ไฟล์ชั่วคราวว่าง ๆ (chunk แรกเขียนต่อท้ายได้เลย)
+    open(temp_path(session), "wb").close()
+    return session
+
+
+# ---------- รับ chunk ----------
+def write_chunk(session, stream, offset, length, chunk_sha256=""):
+    """
+    เขียน length ไบต์จาก stream ที่ตำแหน่ง offset คืน session ที่อัปเดตแล้ว
+
+    - offset ต้องเท่ากับ session.received (ไม่งั้น 409 พร้อม received ปัจจุบันให้ client ต่อให้ถูก)
+    - จอง offset ก่อนเขียน: request อื่นที่ส่ง chunk เดียวกันระหว่างนี้ได้ 409 (ไม่เขียนทับกันในไฟล์)
+    - chunk_sha256 (ถ้ามี) ไม่ตรง → ตัดไฟล์กลับที่ offset เดิม แล้วตอบ 400
+    """
+    if session.status != "open":
+        raise UploadError("การอัปโหลดนี้ปิดแล้ว", status=409)
+    if offset != session.received:
+        raise UploadError("offset ไม่ตรงกับข้อมูลที่ได้รับแล้ว", status=409)
+    if length <= 0 or length > chunk_size():
+        raise UploadError("ขนาด chunk ไม่ถูกต้อง", status=413)
+    if offset + length > session.size:
+        raise UploadError("ข้อมูลเกินขนาดไฟล์ที่แจ้งไว้", status=413)
+
+    # UPDATE แบบมีเงื่อนไข (เหมือน jobs.claim_next): ได้ writer = token เฉพาะ request เดียว
+    # writer ค้างจาก request ที่ตายกลางทาง → จองทับได้เมื่อเกิน write_lease()
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    claimed = (
+        UploadSession.objects.filter(pk=session.pk, status="open", received=offset)
+        .filter(Q(writer="") | Q(updated_at__lt=now - write_lease()))
+        .update(writer=token, updated_at=now)
+    )
+    if not claimed:
+        raise UploadError("มีการส่ง chunk นี้ซ้ำพร้อมกัน", status=409)
+    try:
+        _write(temp_path(session), stream, offset, length, chunk_sha256)
+    except BaseException:
+        UploadSession.objects.filter(pk=session.pk, writer=token).update(writer="")
+        raise
+
+    advanced = UploadSession.objects.filter(pk=session.pk, writer=token, received=offset).update(
+        received=offset + length, writer="", updated_at=timezone.now()
+    )
+    if not advanced:
+        # เขียนนานเกิน lease แล้วมี request อื่นจองต่อไป → ให้ client ส่งใหม่จาก received ปัจจุบัน
+        raise UploadError("หมดเวลาเขียน chunk นี้ กรุณาส่งใหม่", status=409)
+    session.received = offset + length
+
+    if session.received == session.size:
+        finish(session)
+    return session
+
+
+def _write(path, stream, offset, length, chunk_sha256):
+    """เขียน length ไบต์จาก stream ที่ offset (ผิดพลาด → ตัดไฟล์กลับที่ offset แล้ว raise UploadError)"""
+    digest = hashlib.sha256()
+    written = 0
+    with open(path, "r+b") as fh:
+        fh.seek(offset)
+        while written < length:
+            block = stream.read(min(STREAM_BLOCK, length - written))
+            if not block:
+                break
+            fh.write(block)
+            digest.update(block)
+            written += len(block)
+        if written != length or (chunk_sha256 and digest.hexdigest() != chunk_sha256.lower()):
+            # chunk ไม่ครบ/เสีย → ทิ้งส่วนที่เพิ่งเขียน
+            fh.truncate(offset)
+            raise UploadError(
+                "ข้อมูลไม่ครบตามที่แจ้ง" if written != length else "sha256 ของ chunk ไม่ตรง"
+            )
+        fh.truncate(offset + length)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finish(session):
+    """ตรวจ sha256 ทั้งไฟล์ แล้วสร้าง TicketAttachment"""
+    path = temp_path(session)
+    actual = _file_sha256(path)
+    if actual != session.sha256:
+        _close(session, "failed", "sha256 ของไฟล์ไม่ตรง")
+        raise UploadError("sha256 ของไฟล์ไม่ตรง — กรุณาอัปโหลดใหม่")
+
+    # ไฟล์เนื้อหาเดียวกัน (แนบซ้ำ/คนละใบงาน) เก็บครั้งเดียว ชื่อจริงอยู่ใน original_name
+    ext = os.path.splitext(session.filename)[1][:16]
+    with open(path, "rb") as fh:
+        name, _, _ = media_storage().save_content(fh, "ticket_attachments", ext, sha256=actual)
+
+    with transaction.atomic():
+        attachment = TicketAttachment.objects.create(
+            ticket_id=session.ticket_id,
+            file=name,
+            uploaded_by_id=session.user_id,
+            original_name=session.filename,
+            content_type=session.content_type,
+            size=session.size,
+            sha256=actual,
+        )
+        session.attachment = attachment
+        session.status = "complete"
+        session.save(update_fields=["attachment", "status", "updated_at"])
+    _remove_temp(session)
+    return attachment
+
+
+# ---------- ยกเลิก / ล้าง ----------
+def _remove_temp(session):
+    try:
+        os.remove(temp_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def _close(session, status, error=""):
+    session.status = status
+    session.error = error
+    session.save(update_fields=["status", "error", "updated_at"])
+    _remove_temp(session)
+
+
+def abort(session):
+    if session.status == "open":
+        _close(session, "aborted")
+    return session
+
+
+def expire_stale(older_than=None):
+    """session ที่ไม่มี chunk ใหม่เกิน HELPDESK_UPLOAD_SESSION_TTL_HOURS → ยกเลิกและลบไฟล์ชั่วคราว"""
+    older_than = older_than or dt.timedelta(hours=_setting("SESSION_TTL_HOURS", 24))
+    cutoff = timezone.now() - older_than
+    stale = UploadSession.objects.filter(status="open", updated_at__lt=cutoff)
+    count = 0
+    for session in stale.iterator():
+        abort(session)
+        count += 1
+    return count
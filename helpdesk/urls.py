@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import include, path
 from django.views.generic import RedirectView
 from . import views
 
@@ -11,15 +11,33 @@ urlpatterns = [
     # Tickets
     path('tickets/', views.ticket_list, name='ticket_list'),
     path('tickets/create/', views.ticket_create, name='ticket_create'),
+    path("tickets/bulk/", views.ticket_bulk, name="ticket_bulk"),
     path('tickets/<int:pk>/', views.ticket_detail, name='ticket_detail'),
     path('tickets/<int:pk>/edit/', views.ticket_update, name='ticket_update'),
     path('tickets/<int:pk>/close/', views.ticket_close, name='ticket_close'),
     path('tickets/<int:pk>/comment/', views.add_comment, name='add_comment'),
     path("tickets/", views.ticket_list, name="ticket_list"),
     path("tickets/export/pdf/", views.ticket_list_pdf, name="ticket_list_pdf"),
+    path("tickets/export/csv/", views.ticket_list_csv, name="ticket_list_csv"),
+    path("tickets/export/xlsx/", views.ticket_list_xlsx, name="ticket_list_xlsx"),
     path("tickets/<int:pk>/claim/", views.ticket_claim, name="ticket_claim"),
     path("tickets/<int:pk>/accept/", views.ticket_accept, name="ticket_accept"),
+
+    # รูป/ไฟล์แนบของใบงาน (ตรวจสิทธิ์ก่อนส่งไฟล์)
+    path("tickets/<int:pk>/files/<int:file_id>/", views.ticket_file, name="ticket_file"),
+    path("tickets/<int:pk>/images/<int:image_id>/", views.ticket_image, name="ticket_image"),
+    path("tickets/<int:pk>/images/<int:image_id>/thumb/", views.ticket_image_thumb, name="ticket_image_thumb"),
+
+    # ไฟล์แนบ: อัปโหลดแบบแบ่ง chunk
+    path("tickets/<int:pk>/uploads/", views.upload_start, name="upload_start"),
+    path("uploads/<uuid:upload_id>/", views.upload_chunk, name="upload_chunk"),
     
+    # เหตุการณ์ real-time (Server-Sent Events)
+    path("events/", views.event_stream, name="event_stream"),
+
+    # JSON API (helpdesk/api/)
+    path("api/", include("helpdesk.api.urls")),
+
     # Users
     path("users/", views.users_list, name="users_list"),
     path("users/new/", views.user_create, name="user_create"),
@@ -32,4 +50,10 @@ urlpatterns = [
 
     # หน้าเว็บสรุปทั้งปี (สำคัญ!)
     path("reports/year/<int:year>/", views.ticket_year_summary_page, name="ticket_year_summary_page"),
+
+    # Export ผ่านคิว (สร้างไฟล์เบื้องหลัง)
+    path("exports/tickets/", views.export_ticket_list, name="export_ticket_list"),
+    path("exports/year/<int:year>/", views.export_year_summary, name="export_year_summary"),
+    path("exports/<int:pk>/", views.export_status, name="export_status"),
+    path("exports/<int:pk>/download/", views.export_download, name="export_download"),
 ]
@@ -1,40 +1,46 @@
 # helpdesk/views.py — full drop-in
 
+import json
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.core.exceptions import PermissionDenied
-from django.db.models import Q, Count, Case, When, IntegerField
-from django.http import HttpResponse, HttpResponseForbidden
+from django.db import transaction
+from django.db.models import Q, Count
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotAllowed, JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, render, redirect
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.views.decorators.http import require_POST
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.utils.timezone import make_aware
-from django.template.loader import get_template
-from django.conf import settings
-# PDF dependencies are optional - only needed for PDF export features
-try:
-    from xhtml2pdf import pisa
-    from xhtml2pdf.default import DEFAULT_FONT
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-    pisa = None
-    DEFAULT_FONT = None
-    pdfmetrics = None
-    TTFont = None
-from .models import Ticket, TicketComment, Category, TicketImage, TicketAttachment
-
-import os
-
-from io import BytesIO  # เผื่อใช้ภายหลัง
-import datetime as dt
 from django.conf import settings
+from asgiref.sync import sync_to_async
+from .models import (
+    BackgroundJob, Ticket, TicketAttachment, TicketComment, TicketImage, UploadSession, UserProfile,
+)
+
 from django.contrib.staticfiles import finders
-from .models import Ticket, TicketComment, Category, UserProfile
 from .forms import TicketForm, TicketUpdateForm, TicketCommentForm
+from .reports import build_year_summary, summary_scope
+from .pagination import KeysetPaginator, PartitionedKeysetPaginator, approximate_count, page_links
+from .queries import (
+    CLOSED_CODES,
+    OPEN_FIRST_ORDERING,
+    OPEN_FIRST_PARTITIONS,
+    can_view_ticket,
+    list_scope,
+    order_open_first,
+    ticket_list_queryset,
+    ticket_listing_queryset,
+)
+from .filters import TicketFilter
+from . import bulk, counters, events, exports, images, media, notify, roles, search, uploads
+from .exports import PDF_AVAILABLE
+from .jobs import JobError
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django import forms
 from django.contrib.auth.models import Group
@@ -42,37 +48,35 @@ from django.contrib.auth.models import Group
 
 User = get_user_model()
 
-# สถานะที่ถือว่า "จบงาน" (ห้ามแก้ไข)
-CLOSED_CODES = ["closed"]
-
 def _order_open_first(qs):
     """
     ให้ Ticket ที่ยังไม่ปิดอยู่บนสุดเสมอ แล้วค่อยเรียงล่าสุดก่อน
     """
-    return qs.annotate(
-        is_closed=Case(
-            When(status__in=CLOSED_CODES, then=1),
-            default=0,
-            output_field=IntegerField(),
-        )
-    ).order_by(
-        "is_closed",     # 0 (ยังไม่ปิด) มาก่อน 1 (ปิดแล้ว)
-        "-updated_at",
-        "-created_at",
-        "-id",
-    )
+    return order_open_first(qs)
+
+# แบ่งหน้าแบบ keyset ตามลำดับเดียวกับ _order_open_first (งานเปิด/งานปิดอ่านแยกกลุ่มตาม index)
+TICKET_LIST_PAGINATOR = PartitionedKeysetPaginator(OPEN_FIRST_ORDERING, OPEN_FIRST_PARTITIONS, page_size=50)
+DASHBOARD_RECENT_PAGINATOR = PartitionedKeysetPaginator(OPEN_FIRST_ORDERING, OPEN_FIRST_PARTITIONS, page_size=20)
+# เมื่อมีคำค้น: เรียงตามความเกี่ยวข้องแทน
+SEARCH_RESULTS_PAGINATOR = KeysetPaginator(search.SEARCH_ORDERING, page_size=50)
 
-# ชื่อเดือนย่อภาษาไทย สำหรับแสดงผลในรายงาน
-MONTH_LABELS_TH = [
-    "ม.ค.", "ก.พ.", "มี.ค.", "เม.ย.",
-    "พ.ค.", "มิ.ย.", "ก.ค.", "ส.ค.",
-    "ก.ย.", "ต.ค.", "พ.ย.", "ธ.ค.",
-]
+# งาน export ที่ผู้ใช้ดูสถานะ/ดาวน์โหลดผ่าน export_status / export_download ได้
+EXPORT_KINDS = (exports.KIND_TICKET_LIST, exports.KIND_YEAR_SUMMARY)
 
 # ===== Helper =====
 def _is_it_staff(user):
-    """เจ้าหน้าที่ IT = superuser หรือมีสิทธิ์ change_ticket"""
-    return user.is_superuser or user.has_perm("helpdesk.change_ticket")
+    """เจ้าหน้าที่ IT = superuser หรือมีสิทธิ์ change_ticket (จำผลไว้ตลอดคำขอ — ดู roles.py)"""
+    return roles.is_it_staff(user)
+
+
+def _can_view_ticket(user, ticket):
+    """สิทธิ์การมองเห็นใบงาน: IT หรือ requester หรือ assignee"""
+    return can_view_ticket(user, ticket)
+
+
+def _list_scope(user):
+    """ขอบเขตข้อมูลของหน้า ticket_list (ใช้เป็นส่วนหนึ่งของกุญแจแคช)"""
+    return list_scope(user)
 
 
 def _display_name(u):
@@ -93,99 +97,57 @@ def dashboard(request):
             Q(requester=user) | Q(assignee=user)
         )
 
-    # KPI ด้านบน (ไม่ตามฟิลเตอร์)
-    my_open_count = (
-        visible_qs.filter(requester=user)
-        .exclude(status__in=CLOSED_CODES)
-        .count()
-    )
-
-    assigned_to_me = (
-        visible_qs.filter(assignee=user)
-        .exclude(status__in=CLOSED_CODES)
-        .count()
-    )
+    # KPI ด้านบน (ไม่ตามฟิลเตอร์) + By Status แบบไม่กรอง: อ่านจากยอดนับที่เก็บไว้ (helpdesk/counters.py)
+    counts = counters.dashboard_counts(user, _is_it_staff(user))
+    my_open_count = counts["my_open"]
+    assigned_to_me = counts["assigned_to_me"]
 
     # ---------- ฟิลเตอร์สำหรับ "รายการล่าสุด" + By Status ----------
-    qs = visible_qs
+    ticket_filter = TicketFilter(request.GET)
+    qs = ticket_filter.apply(visible_qs)
 
-    q = (request.GET.get("q") or "").strip()
-    status = request.GET.get("status") or ""
-    date_from_str = (request.GET.get("date_from") or "").strip()
-    date_to_str = (request.GET.get("date_to") or "").strip()
-
-    # ค้นหาคำใน ชื่อเรื่อง/รายละเอียด
-    if q:
-        qs = qs.filter(
-            Q(title__icontains=q) |
-            Q(description__icontains=q)
-        )
-
-    # ฟิลเตอร์ตามสถานะ
-    if status:
-        qs = qs.filter(status=status)
-
-    # ฟิลเตอร์ช่วงวันที่
-    def _parse_date(s):
-        try:
-            return dt.datetime.strptime(s, "%Y-%m-%d").date()
-        except Exception:
-            return None
-
-    df = _parse_date(date_from_str)
-    dt_ = _parse_date(date_to_str)
-
-    field = (
-        "updated_at"
-        if hasattr(Ticket, "updated_at")
-        else ("created_at" if hasattr(Ticket, "created_at") else None)
+    # รายการล่าสุด (หลังฟิลเตอร์แล้ว) — เปิดงานอยู่บนสุดเสมอ, ทีละหน้า
+    recent = DASHBOARD_RECENT_PAGINATOR.page(
+        ticket_listing_queryset(_order_open_first(qs)), request.GET.get("cursor")
     )
-    if field:
-        if df:
-            start = make_aware(dt.datetime.combine(df, dt.time.min))
-            qs = qs.filter(**{f"{field}__gte": start})
-        if dt_:
-            end = make_aware(dt.datetime.combine(dt_, dt.time.max))
-            qs = qs.filter(**{f"{field}__lte": end})
-
-    # รายการล่าสุด (หลังฟิลเตอร์แล้ว) — เปิดงานอยู่บนสุดเสมอ
-    recent = qs.order_by("-id")
 
     # mapping จาก STATUS_CHOICES (จะเป็นไทย/อังกฤษตามที่คุณตั้งใน models.py)
     STATUS_LABELS = dict(getattr(Ticket, "STATUS_CHOICES", []))
     STATUS_ORDER = ["open", "in_progress", "on_hold", "closed"]
 
-    by_status_qs = qs.values("status").annotate(c=Count("id")).order_by()
+    if ticket_filter.is_filtered:
+        # มีตัวกรอง → นับจริงเฉพาะชุดที่กรอง
+        by_status_counts = dict(qs.values_list("status").annotate(c=Count("id")).order_by())
+    else:
+        by_status_counts = counts["by_status"]
     by_status = [
         {
-            "status": (r["status"] or "unknown"),
-            "label": STATUS_LABELS.get(r["status"], r["status"] or "ไม่ทราบสถานะ"),
-            "c": r["c"],
+            "status": (status or "unknown"),
+            "label": STATUS_LABELS.get(status, status or "ไม่ทราบสถานะ"),
+            "c": c,
         }
-        for r in by_status_qs
+        for status, c in by_status_counts.items()
     ]
 
     order_index = {code: i for i, code in enumerate(STATUS_ORDER)}
     by_status.sort(key=lambda x: order_index.get(x["status"], 999))
 
-    status_choices = getattr(Ticket, "STATUS_CHOICES", [])
-
     ctx = {
         "my_open_count": my_open_count,
         "assigned_to_me": assigned_to_me,
         "recent": recent,
+        "page": recent,
+        **page_links(request, recent),
         "by_status": by_status,
+        "status_labels": STATUS_LABELS,
         "closed_codes": CLOSED_CODES,
 
         # สำหรับฟอร์ม FILTER ใน dashboard.html
-        "q": q,
-        "status": status,
-        "date_from": date_from_str,
-        "date_to": date_to_str,
-        "status_choices": status_choices,
+        **ticket_filter.as_context(),
 
         # 👉 ส่ง flag ว่าคนนี้เป็น IT หรือไม่
         "is_it_staff": _is_it_staff(user),
+        "live_events": events.enabled(),
     }
     return render(request, "helpdesk/dashboard.html", ctx)
 
@@ -197,71 +159,54 @@ def ticket_list(request):
     ผู้ใช้ทั่วไป: เห็นเฉพาะที่ตัวเอง 'ร้องขอ' (requester)
     รองรับตัวกรอง q, status, date_from, date_to
     """
-    if _is_it_staff(request.user):
-        qs = Ticket.objects.all()
+    qs = ticket_list_queryset(request.user)
+
+    # ------- ตัวกรอง q, status, date_from, date_to -------
+    ticket_filter = TicketFilter(request.GET)
+    qs = ticket_filter.apply(qs)
+
+    # เรียง: เปิดงานก่อนเสมอ แล้วล่าสุดก่อน (แบ่งหน้าแบบ cursor)
+    # ถ้ามีคำค้น → เรียงตามความเกี่ยวข้องของผลค้นหา
+    if ticket_filter.q:
+        page = SEARCH_RESULTS_PAGINATOR.page(
+            ticket_listing_queryset(search.rank_tickets(qs, ticket_filter.q)),
+            request.GET.get("cursor"),
+        )
     else:
-        qs = Ticket.objects.filter(requester=request.user)
-
-    # ------- รับพารามิเตอร์ -------
-    q = (request.GET.get("q") or "").strip()
-    status = request.GET.get("status") or ""
-    date_from_str = (request.GET.get("date_from") or "").strip()
-    date_to_str = (request.GET.get("date_to") or "").strip()
-
-    # ------- คีย์เวิร์ด -------
-    if q:
-        qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
-
-    # ------- สถานะ -------
-    if status:
-        qs = qs.filter(status=status)
+        page = TICKET_LIST_PAGINATOR.page(
+            ticket_listing_queryset(_order_open_first(qs)), request.GET.get("cursor")
+        )
 
-    # ------- ช่วงวันที่ (รวมปลายทางทั้งวัน) -------
-    def _parse_date(s):
-        try:
-            return dt.datetime.strptime(s, "%Y-%m-%d").date()
-        except Exception:
-            return None
-
-    df = _parse_date(date_from_str)
-    dt_ = _parse_date(date_to_str)
-
-    # field เวลาอ้างอิง: updated_at > created_at
-    field = (
-        "updated_at"
-        if hasattr(Ticket, "updated_at")
-        else ("created_at" if hasattr(Ticket, "created_at") else None)
+    total = approximate_count(
+        qs, key=ticket_filter.cache_key("ticket_list_count", _list_scope(request.user))
     )
-    if field:
-        if df:
-            start = make_aware(dt.datetime.combine(df, dt.time.min))
-            qs = qs.filter(**{f"{field}__gte": start})
-        if dt_:
-            end = make_aware(dt.datetime.combine(dt_, dt.time.max))
-            qs = qs.filter(**{f"{field}__lte": end})
-
-    # เรียง: เปิดงานก่อนเสมอ แล้วล่าสุดก่อน
-    qs = _order_open_first(qs)  
-
-    status_choices = getattr(Ticket, "STATUS_CHOICES", [])
-    total = qs.count()
 
     ctx = {
-        "tickets": qs,
-        "q": q,
-        "status": status,
-        "status_choices": status_choices,
-        "date_from": date_from_str,
-        "date_to": date_to_str,
+        "tickets": page,
+        "page": page,
+        **page_links(request, page),
+        **ticket_filter.as_context(),
         "total": total,
         "closed_codes": CLOSED_CODES,
+        "is_it_staff": _is_it_staff(request.user),
     }
+    if ctx["is_it_staff"]:
+        # แถบคำสั่งหลายใบงาน (ticket_bulk)
+        ctx.update({
+            "bulk_actions": bulk.ACTIONS,
+            "bulk_statuses": [
+                (code, label) for code, label in Ticket.STATUS_CHOICES
+                if code in bulk.SETTABLE_STATUSES
+            ],
+            "it_staff": roles.it_staff_queryset(),
+        })
     return render(request, "helpdesk/ticket_list.html", ctx)
 
 @login_required
 def ticket_list_pdf(request):
     """
     สร้าง PDF รายการ Ticket ตาม filter เดียวกับหน้า /helpdesk/tickets/
+    (สร้างทันทีใน request — รายการใหญ่ให้ใช้ export_ticket_list ผ่านคิวแทน)
     """
     # Check if PDF libraries are available
     if not PDF_AVAILABLE:
@@ -270,89 +215,46 @@ def ticket_list_pdf(request):
             status=503,
             content_type="text/plain"
         )
-    
-    user = request.user
-
-    # ขอบเขตข้อมูลที่ดูได้เหมือนใน ticket_list
-    if _is_it_staff(user):
-        qs = Ticket.objects.all()
-    else:
-        qs = Ticket.objects.filter(requester=user)
-
-    # ------- รับพารามิเตอร์จาก GET (เหมือน ticket_list) -------
-    q = (request.GET.get("q") or "").strip()
-    status = request.GET.get("status") or ""
-    date_from_str = (request.GET.get("date_from") or "").strip()
-    date_to_str = (request.GET.get("date_to") or "").strip()
-
-    # ------- คีย์เวิร์ด -------
-    if q:
-        qs = qs.filter(
-            Q(title__icontains=q) | Q(description__icontains=q)
-        )
-
-    # ------- สถานะ -------
-    if status:
-        qs = qs.filter(status=status)
-
-    # ------- ช่วงวันที่ (รวมปลายทางทั้งวัน) -------
-    def _parse_date(s):
-        try:
-            return dt.datetime.strptime(s, "%Y-%m-%d").date()
-        except Exception:
-            return None
-
-    df = _parse_date(date_from_str)
-    dt_ = _parse_date(date_to_str)
-
-    field = (
-        "updated_at"
-        if hasattr(Ticket, "updated_at")
-        else ("created_at" if hasattr(Ticket, "created_at") else None)
-    )
-
-    if field:
-        if df:
-            start = make_aware(dt.datetime.combine(df, dt.time.min))
-            qs = qs.filter(**{f"{field}__gte": start})
-        if dt_:
-            end = make_aware(dt.datetime.combine(dt_, dt.time.max))
-            qs = qs.filter(**{f"{field}__lte": end})
-
-        # ✅ เรียงเก่าก่อน → ใหม่ (งานแรก → งานสุดท้าย)
-        qs = qs.order_by("created_at", "id")   # หรือใช้ "id" อย่างเดียวก็ได้
-        # qs = qs.order_by("id")
 
-    tickets = qs
-    total = tickets.count()
-
-    # ===== REGISTER THAI FONT (ใช้ THSarabunNew) =====
-    font_path = os.path.join(settings.BASE_DIR, "static", "fonts", "THSarabunNew.ttf")
-    if os.path.exists(font_path):
-        pdfmetrics.registerFont(TTFont("THSarabun", font_path))
-        DEFAULT_FONT["helvetica"] = "THSarabun"
-
-    context = {
-        "tickets": tickets,
-        "total": total,
-        "q": q,
-        "status": status,
-        "date_from": date_from_str,
-        "date_to": date_to_str,
-    }
-
-    template = get_template("helpdesk/ticket_list_pdf.html")
-    html = template.render(context)
+    try:
+        content = exports.render_ticket_list_pdf(request.user, request.GET)
+    except JobError as exc:
+        return HttpResponse(str(exc), status=500)
 
-    response = HttpResponse(content_type="application/pdf")
+    response = HttpResponse(content, content_type="application/pdf")
     response["Content-Disposition"] = 'inline; filename="tickets_filtered.pdf"'
+    return response
 
-    pisa_status = pisa.CreatePDF(html, dest=response)
+@login_required
+def ticket_list_csv(request):
+    """
+    CSV รายการ Ticket ตาม filter เดียวกับหน้า /helpdesk/tickets/
+    ส่งแบบ streaming: เริ่มส่งทันที หน่วยความจำคงที่ไม่ว่าจะกี่แถว
+    """
+    filename = f"tickets_{timezone.localdate():%Y%m%d}.csv"
+    response = StreamingHttpResponse(
+        exports.iter_csv(request.user, request.GET), content_type="text/csv; charset=utf-8"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
-    if pisa_status.err:
-        return HttpResponse("เกิดข้อผิดพลาดในการสร้างไฟล์ PDF", status=500)
 
-    return response
+@login_required
+def ticket_list_xlsx(request):
+    """XLSX รายการ Ticket (openpyxl write-only → ไฟล์ชั่วคราว → ส่งทีละ block)"""
+    if not exports.XLSX_AVAILABLE:
+        return HttpResponse(
+            "XLSX export is not available. Missing required library (openpyxl).",
+            status=503,
+            content_type="text/plain"
+        )
+    filename = f"tickets_{timezone.localdate():%Y%m%d}.xlsx"
+    return FileResponse(
+        exports.write_xlsx(request.user, request.GET),
+        as_attachment=True,
+        filename=filename,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
 
 # ===== Detail =====
 @login_required
@@ -360,15 +262,15 @@ def ticket_detail(request, pk):
     ticket = get_object_or_404(Ticket, pk=pk)
 
     # สิทธิ์การมองเห็น: IT หรือ requester หรือ assignee
-    if not (
-        _is_it_staff(request.user)
-        or ticket.requester_id == request.user.id
-        or ticket.assignee_id == request.user.id
-    ):
+    if not _can_view_ticket(request.user, ticket):
         return HttpResponseForbidden("คุณไม่มีสิทธิ์เข้าถึงใบงานนี้")
 
     # คอมเมนต์: ถ้ามี internal=True ให้ซ่อนจาก non-staff
-    comments = TicketComment.objects.filter(ticket=ticket).order_by("created_at")
+    comments = (
+        TicketComment.objects.filter(ticket=ticket)
+        .select_related("author")
+        .order_by("created_at")
+    )
     if not request.user.is_staff and hasattr(TicketComment, "internal"):
         comments = comments.filter(internal=False)
 
@@ -382,10 +284,45 @@ def ticket_detail(request, pk):
             "comments": comments,
             "comment_form": comment_form,
             "closed_codes": CLOSED_CODES,
+            "live_events": events.enabled(),
         },
     )
 
 
+# ===== Media (รูป/ไฟล์แนบของใบงาน — ตรวจสิทธิ์ตามใบงานก่อนส่งไฟล์) =====
+def _ticket_image(request, pk, image_id):
+    image = get_object_or_404(TicketImage.objects.select_related("ticket"), pk=image_id, ticket_id=pk)
+    if not _can_view_ticket(request.user, image.ticket):
+        raise PermissionDenied
+    return image
+
+
+@login_required
+def ticket_image(request, pk, image_id):
+    image = _ticket_image(request, pk, image_id)
+    return media.serve_file(request, image.image)
+
+
+@login_required
+def ticket_image_thumb(request, pk, image_id):
+    image = _ticket_image(request, pk, image_id)
+    # ยังประมวลผลไม่เสร็จ → ยังไม่มีรูปย่อ ส่งรูปเต็มไปก่อน
+    return media.serve_file(request, image.thumbnail or image.image)
+
+
+@login_required
+def ticket_file(request, pk, file_id):
+    attachment = get_object_or_404(
+        TicketAttachment.objects.select_related("ticket"), pk=file_id, ticket_id=pk
+    )
+    if not _can_view_ticket(request.user, attachment.ticket):
+        raise PermissionDenied
+    # ชนิดไฟล์เดาจากชื่อ ไม่ใช้ content_type ที่ client แจ้งมา
+    return media.serve_file(
+        request, attachment.file, filename=attachment.original_name or None
+    )
+
+
 # ===== Create =====
 @login_required
 def ticket_create(request):
@@ -402,8 +339,9 @@ def ticket_create(request):
             if not (ticket.contact or "").strip():
                 ticket.contact = (profile.contact or "").strip()
 
-            ticket.save()   # 🔒 title/category ถูกเซ็ตจาก issue_type ใน Ticket.save()
+            ticket.save(actor=request.user)   # 🔒 title/category ถูกเซ็ตจาก issue_type ใน Ticket.save()
             form.save_m2m()
+            events.publish_ticket("created", ticket, actor=request.user)
 
             # จำ contact ใหม่กลับไป profile
             new_contact = (ticket.contact or "").strip()
@@ -411,10 +349,8 @@ def ticket_create(request):
                 profile.contact = new_contact
                 profile.save(update_fields=["contact"])
 
-            # save images (เหมือนที่คุณทำอยู่)
-            files = request.FILES.getlist("images")
-            for f in files:
-                TicketImage.objects.create(ticket=ticket, image=f)
+            # รูปแนบ: ย่อ/ลบ EXIF/บีบอัด + รูปย่อ (ชุดใหญ่ให้ worker ทำต่อ) — helpdesk/images.py
+            images.attach_images(ticket, request.FILES.getlist("images"), user=request.user)
 
             return redirect("helpdesk:ticket_list")
     else:
@@ -445,16 +381,21 @@ def ticket_update(request, pk):
         # 🔸 ต้องใส่ request.FILES ด้วย
         form = TicketUpdateForm(request.POST, request.FILES, instance=ticket)
         if form.is_valid():
-            ticket = form.save()
-
             comment_text = (form.cleaned_data.get("comment") or "").strip()
-            if comment_text:
-                TicketComment.objects.create(
-                    ticket=ticket,
-                    author=request.user,
-                    body=comment_text,
-                )
-
+            with transaction.atomic():
+                ticket = form.save(commit=False)
+                ticket.save(actor=request.user)
+                form.save_m2m()
+
+                if comment_text:
+                    TicketComment.objects.create(
+                        ticket=ticket,
+                        author=request.user,
+                        body=comment_text,
+                    )
+                    # คอมเมนต์จากฟอร์มแก้ไขผู้แจ้งเห็นเหมือน add_comment → แจ้งผู้แจ้งด้วย
+                    notify.enqueue("commented", [ticket], actor=request.user, text=comment_text)
+            events.publish_ticket("updated", ticket, actor=request.user)
 
             messages.success(request, "บันทึกการแก้ไขเรียบร้อย")
             return redirect("helpdesk:ticket_detail", pk=pk)
@@ -483,11 +424,7 @@ def add_comment(request, pk):
         return redirect("helpdesk:ticket_detail", pk=pk)
 
     # ใครคอมเมนต์ได้บ้าง: IT หรือ requester หรือ assignee
-    if not (
-        _is_it_staff(request.user)
-        or ticket.requester_id == request.user.id
-        or ticket.assignee_id == request.user.id
-    ):
+    if not _can_view_ticket(request.user, ticket):
         raise PermissionDenied("คุณไม่มีสิทธิ์คอมเมนต์ใบงานนี้")
 
     form = TicketCommentForm(request.POST)
@@ -497,7 +434,10 @@ def add_comment(request, pk):
         c.author = request.user
         if hasattr(c, "internal"):
             c.internal = False
-        c.save()
+        with transaction.atomic():
+            c.save()
+            notify.enqueue("commented", [ticket], actor=request.user, text=c.body)
+        events.publish_ticket("commented", ticket, actor=request.user)
         messages.success(request, "เพิ่มคอมเมนต์เรียบร้อย")
     else:
         messages.error(request, "ข้อมูลคอมเมนต์ไม่ถูกต้อง")
@@ -507,6 +447,109 @@ def add_comment(request, pk):
         return redirect("helpdesk:ticket_update", pk=pk)
     return redirect("helpdesk:ticket_detail", pk=pk)
 
+
+# ===== Upload API (ไฟล์แนบแบบแบ่ง chunk — helpdesk/uploads.py) =====
+def _upload_json(session, **extra):
+    data = {
+        "id": str(session.pk),
+        "filename": session.filename,
+        "size": session.size,
+        "received": session.received,
+        "status": session.status,
+        "chunk_size": uploads.chunk_size(),
+        "url": reverse("helpdesk:upload_chunk", args=[session.pk]),
+        "error": session.error,
+        "attachment": None,
+    }
+    if session.attachment_id:
+        data["attachment"] = {
+            "id": session.attachment_id,
+            "name": session.filename,
+            "url": reverse("helpdesk:ticket_file", args=[session.ticket_id, session.attachment_id]),
+        }
+    data.update(extra)
+    return data
+
+
+def _chunk_offset(request):
+    """offset จาก Content-Range: bytes START-END/TOTAL หรือ ?offset="""
+    content_range = request.headers.get("Content-Range", "")
+    if content_range.startswith("bytes "):
+        return int(content_range[6:].split("-", 1)[0])
+    return int(request.GET.get("offset", 0))
+
+
+@login_required
+@require_POST
+def upload_start(request, pk):
+    """
+    เริ่มอัปโหลดไฟล์แนบ: JSON {filename, size, sha256, content_type?}
+    ตอบ 201 + url สำหรับส่ง chunk (PUT) และ chunk_size ที่แนะนำ
+    """
+    ticket = get_object_or_404(Ticket, pk=pk)
+    if not _can_view_ticket(request.user, ticket):
+        return JsonResponse({"error": "คุณไม่มีสิทธิ์แนบไฟล์ในใบงานนี้"}, status=403)
+    if ticket.status in CLOSED_CODES:
+        return JsonResponse({"error": "ใบงานปิดแล้ว ไม่สามารถแนบไฟล์ได้"}, status=409)
+
+    try:
+        data = json.loads(request.body or b"{}")
+        session = uploads.start_session(
+            ticket,
+            request.user,
+            data.get("filename"),
+            data.get("size"),
+            content_type=data.get("content_type", ""),
+            sha256=data.get("sha256", ""),
+        )
+    except (ValueError, AttributeError):
+        return JsonResponse({"error": "ข้อมูลไม่ถูกต้อง"}, status=400)
+    except uploads.UploadError as exc:
+        return JsonResponse({"error": str(exc)}, status=exc.status)
+    return JsonResponse(_upload_json(session), status=201)
+
+
+@login_required
+def upload_chunk(request, upload_id):
+    """
+    GET: สถานะ (received = ไบต์ที่ได้รับแล้ว ใช้ต่อจากที่หลุด)
+    PUT: ส่ง chunk ถัดไป (body เป็นไบต์ดิบ, Content-Range หรือ ?offset=, X-Chunk-SHA256 ถ้ามี)
+    DELETE: ยกเลิก
+    สิทธิ์ดูใบงาน/ใบงานปิด ตรวจซ้ำทุกครั้ง (อาจเปลี่ยนไปหลังเริ่ม session)
+    """
+    session = get_object_or_404(
+        UploadSession.objects.select_related("ticket"), pk=upload_id, user=request.user
+    )
+    if not _can_view_ticket(request.user, session.ticket):
+        return JsonResponse({"error": "คุณไม่มีสิทธิ์แนบไฟล์ในใบงานนี้"}, status=403)
+
+    if request.method == "GET":
+        return JsonResponse(_upload_json(session))
+    if request.method == "DELETE":
+        return JsonResponse(_upload_json(uploads.abort(session)))
+    if request.method != "PUT":
+        return HttpResponseNotAllowed(["GET", "PUT", "DELETE"])
+    if session.ticket.status in CLOSED_CODES:
+        # ปิดใบงานระหว่างอัปโหลด → ยกเลิก session คืนโควตา
+        uploads.abort(session)
+        return JsonResponse(_upload_json(session, error="ใบงานปิดแล้ว ไม่สามารถแนบไฟล์ได้"), status=409)
+
+    try:
+        offset = _chunk_offset(request)
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return JsonResponse(_upload_json(session, error="Content-Range ไม่ถูกต้อง"), status=400)
+
+    try:
+        # อ่านจาก request เป็น stream (ไม่แตะ request.body → ไม่บัฟเฟอร์ทั้ง chunk)
+        uploads.write_chunk(
+            session, request, offset, length, request.headers.get("X-Chunk-SHA256", "")
+        )
+    except uploads.UploadError as exc:
+        session.refresh_from_db()
+        return JsonResponse(_upload_json(session, error=str(exc)), status=exc.status)
+    return JsonResponse(_upload_json(session))
+
 @login_required
 @permission_required("helpdesk.change_ticket", raise_exception=True)
 @require_POST
@@ -529,7 +572,10 @@ def ticket_claim(request, pk):
 
     ticket.assignee = request.user
     ticket.status = "in_progress"   # ✅ ต้องตรงกับ STATUS_CHOICES ใน model
-    ticket.save(update_fields=["assignee", "status"])
+    with transaction.atomic():
+        ticket.save(update_fields=["assignee", "status", "updated_at"], actor=request.user)
+        notify.enqueue("claimed", [ticket], actor=request.user)
+    events.publish_ticket("claimed", ticket, actor=request.user)
 
     messages.success(request, "รับงานเรียบร้อย และเปลี่ยนสถานะเป็นกำลังดำเนินการ")
     return redirect("helpdesk:ticket_detail", pk=pk)
@@ -551,22 +597,130 @@ def ticket_close(request, pk):
         messages.info(request, "ใบงานนี้ปิด/ยกเลิกไปแล้ว")
         return redirect("helpdesk:ticket_detail", pk=pk)
 
-    # ✅ 1) บันทึกคอมเมนต์ (ถ้ามี) จากฟอร์มเดียวกัน
     comment_text = (request.POST.get("comment") or "").strip()
-    if comment_text:
-        TicketComment.objects.create(
-            ticket=ticket,
-            author=request.user,
-            body=comment_text,
-        )
-
-    # ✅ 2) ปิดงาน
-    ticket.status = "closed"
-    ticket.save(update_fields=["status"])
+    with transaction.atomic():
+        # ✅ 1) บันทึกคอมเมนต์ (ถ้ามี) จากฟอร์มเดียวกัน
+        if comment_text:
+            TicketComment.objects.create(
+                ticket=ticket,
+                author=request.user,
+                body=comment_text,
+            )
+
+        # ✅ 2) ปิดงาน + แจ้งผู้แจ้ง (ส่งจริงโดย run_notifier)
+        ticket.status = "closed"
+        ticket.save(update_fields=["status", "updated_at"], actor=request.user)
+        notify.enqueue("closed", [ticket], actor=request.user, text=comment_text)
+    events.publish_ticket("closed", ticket, actor=request.user)
 
     messages.success(request, "ปิดงานเรียบร้อย")
     return redirect("helpdesk:ticket_detail", pk=pk)
 
+# ===== Bulk (หลายใบงานในคำขอเดียว — helpdesk/bulk.py) =====
+def _bulk_summary(request, action, results):
+    done = [r.id for r in results if r.ok]
+    skipped = [r for r in results if not r.ok]
+    if done:
+        messages.success(request, f"{bulk.ACTIONS[action]} {len(done)} ใบงานเรียบร้อย")
+    if skipped:
+        shown = ", ".join(f"#{r.id} ({r.error})" for r in skipped[:20])
+        more = f" และอีก {len(skipped) - 20} ใบงาน" if len(skipped) > 20 else ""
+        messages.warning(request, f"ข้าม {len(skipped)} ใบงาน: {shown}{more}")
+
+
+@login_required
+@permission_required("helpdesk.change_ticket", raise_exception=True)
+@require_POST
+def ticket_bulk(request):
+    """
+    คำสั่งเดียวกับหลายใบงาน: ฟอร์มในหน้า ticket_list หรือ JSON
+    {"action": "claim|close|status|assign", "ids": [...], "status": ..., "assignee": <user id>, "comment": ...}
+    JSON ตอบผลรายใบ, ฟอร์มแสดงสรุปแล้วกลับไปหน้ารายการเดิม
+    """
+    wants_json = request.content_type == "application/json"
+    if wants_json:
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "JSON ไม่ถูกต้อง"}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({"error": "ต้องส่งเป็น JSON object"}, status=400)
+        ids = data.get("ids") or []
+        if not isinstance(ids, list):
+            ids = [ids]
+    else:
+        data = request.POST
+        ids = request.POST.getlist("ids")
+
+    next_url = request.POST.get("next") or ""
+    if not url_has_allowed_host_and_scheme(
+        next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+    ):
+        next_url = reverse("helpdesk:ticket_list")
+
+    action = data.get("action")
+    try:
+        assignee = None
+        if data.get("assignee"):
+            try:
+                assignee_id = int(data["assignee"])
+            except (TypeError, ValueError):
+                raise bulk.BulkError("ผู้รับผิดชอบไม่ถูกต้อง")
+            assignee = User.objects.filter(pk=assignee_id, is_active=True).first()
+        results = bulk.apply(
+            request.user, action, ids,
+            status=data.get("status"), assignee=assignee, comment=data.get("comment") or "",
+        )
+    except bulk.BulkError as exc:
+        if wants_json:
+            return JsonResponse({"error": str(exc)}, status=400)
+        messages.error(request, str(exc))
+        return redirect(next_url)
+
+    if wants_json:
+        return JsonResponse({
+            "action": action,
+            "updated": sum(1 for r in results if r.ok),
+            "results": [r._asdict() for r in results],
+        })
+    _bulk_summary(request, action, results)
+    return redirect(next_url)
+
+# ===== Events (Server-Sent Events — helpdesk/events.py) =====
+@login_required
+async def event_stream(request):
+    """
+    สตรีมเหตุการณ์ของใบงานที่ผู้ใช้เห็นได้ (dashboard) หรือของใบงานเดียว (?ticket=<id>)
+
+    async view: การเชื่อมต่อที่รออยู่ไม่ถือ thread (ต้องรันผ่าน ASGI)
+    ปิด real-time อยู่ (HELPDESK_EVENTS_ENABLED) → 204: EventSource หยุด ไม่ต่อใหม่
+    """
+    if not events.enabled():
+        return HttpResponse(status=204)
+    user = await request.auser()
+    is_it_staff = await sync_to_async(_is_it_staff)(user)
+
+    ticket_id = None
+    if request.GET.get("ticket"):
+        try:
+            ticket_id = int(request.GET["ticket"])
+        except ValueError:
+            return HttpResponse("ticket ไม่ถูกต้อง", status=400, content_type="text/plain")
+        ticket = await Ticket.objects.filter(pk=ticket_id).only("requester", "assignee").afirst()
+        if ticket is None:
+            raise Http404("ไม่พบใบงาน")
+        if not is_it_staff and not _can_view_ticket(user, ticket):
+            raise PermissionDenied
+
+    response = StreamingHttpResponse(
+        events.stream(user.pk, is_it_staff, ticket_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # nginx: ส่งทันที ไม่บัฟเฟอร์
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 # ===== Users Management =====
 @login_required
 @permission_required("auth.view_user", raise_exception=True)
@@ -751,43 +905,10 @@ def user_deactivate(request, pk):
 
 
 # ===== Helper สำหรับรายงานปี (ใช้ร่วม PDF/HTML) =====
-def _build_year_summary(year):
-    """คืนข้อมูลที่ใช้แสดงตารางสรุปใบงานทั้งปี"""
-    qs = Ticket.objects.filter(created_at__year=year)
-
-    month_numbers = list(range(1, 13))   # ใช้สำหรับ filter ใน DB
-    categories = list(Category.objects.all().order_by("name"))
-
-    rows = []
-    grand_total = 0
-
-    for cat in categories:
-        monthly = []
-        row_total = 0
-        for m in month_numbers:
-            c = qs.filter(category=cat, created_at__month=m).count()
-            monthly.append(c)
-            row_total += c
-        grand_total += row_total
-
-        rows.append({
-            "category": cat,
-            "monthly": monthly,
-            "row_total": row_total,
-        })
-
-    # รวมแต่ละเดือน (แนวตั้ง)
-    month_totals = []
-    for m in month_numbers:
-        c = qs.filter(created_at__month=m).count()
-        month_totals.append(c)
-
-    return {
-        "months": MONTH_LABELS_TH,  # <== ส่งชื่อเดือนย่อออกไป
-        "rows": rows,
-        "month_totals": month_totals,
-        "grand_total": grand_total,
-    }
+def _build_year_summary(request, year):
+    """คืนข้อมูลที่ใช้แสดงตารางสรุปใบงานทั้งปี (ดู helpdesk/reports.py)"""
+    scope = summary_scope(request.user, _is_it_staff(request.user))
+    return build_year_summary(year, scope)
 
 def link_callback(uri, rel):
     """
@@ -807,20 +928,6 @@ def link_callback(uri, rel):
     return uri
 
 
-    # รวมแต่ละเดือน (แนวตั้ง)
-    month_totals = []
-    for m in months:
-        c = qs.filter(created_at__month=m).count()
-        month_totals.append(c)
-
-    return {
-        "months": months,
-        "rows": rows,
-        "month_totals": month_totals,
-        "grand_total": grand_total,
-    }
-
-
 # ===== HTML Report : หน้าเว็บสรุปงานรายปี =====
 @login_required
 def ticket_year_summary_page(request, year):
@@ -837,40 +944,11 @@ def ticket_year_summary_page(request, year):
         year_param = year
     year = year_param  # ใช้ตัวแปร year ต่อจากนี้
 
-    qs = Ticket.objects.filter(created_at__year=year)
-
-    month_numbers = list(range(1, 13))
-    categories = list(Category.objects.all().order_by("name"))
-
-    rows = []
-    grand_total = 0
-
-    for cat in categories:
-        monthly = []
-        row_total = 0
-        for m in month_numbers:
-            count = qs.filter(category=cat, created_at__month=m).count()
-            monthly.append(count)
-            row_total += count
-        grand_total += row_total
-
-        rows.append({
-            "category": cat,
-            "monthly": monthly,
-            "row_total": row_total
-        })
-
-    month_totals = []
-    for m in month_numbers:
-        count = qs.filter(created_at__month=m).count()
-        month_totals.append(count)
+    summary = _build_year_summary(request, year)
 
     context = {
         "year": year,
-        "months": MONTH_LABELS_TH,   # ถ้าพี่ประกาศ MONTH_LABELS_TH ไว้ด้านบนแล้ว
-        "rows": rows,
-        "month_totals": month_totals,
-        "grand_total": grand_total,
+        **summary,
     }
 
     return render(request, "helpdesk/ticket_year_summary.html", context)
@@ -885,64 +963,108 @@ def ticket_summary_pdf(request):
     except ValueError:
         year = timezone.now().year
 
-    summary = _build_year_summary(year)
+    return _year_summary_pdf_response(request, year, f"ticket_summary_{year}.pdf")
 
-    # ==== REGISTER THAI FONT ====
-    font_path = os.path.join(settings.BASE_DIR, "static", "fonts", "THSarabunNew.ttf")
-    pdfmetrics.registerFont(TTFont("THSarabun", font_path))
-    DEFAULT_FONT["helvetica"] = "THSarabun"
+# ===== PDF Report : สรุปจำนวนใบงานรายปี (ใช้ year จาก URL) =====
+@login_required
+def ticket_year_summary_pdf(request, year):
+    if not _is_it_staff(request.user):
+        return HttpResponseForbidden("อนุญาตเฉพาะเจ้าหน้าที่ IT เท่านั้น")
 
-    context = {
-        "year": year,
-        **summary,
-    }
+    return _year_summary_pdf_response(request, year, f"ticket_year_summary_{year}.pdf")
 
-    template = get_template("helpdesk/ticket_report_pdf.html")
-    html = template.render(context)
 
-    response = HttpResponse(content_type="application/pdf")
-    filename = f"ticket_summary_{year}.pdf"
+def _year_summary_pdf_response(request, year, filename):
+    if not PDF_AVAILABLE:
+        return HttpResponse(
+            "PDF export is not available. Missing required libraries (xhtml2pdf).",
+            status=503,
+            content_type="text/plain"
+        )
+    try:
+        content = exports.render_year_summary_pdf(request.user, year)
+    except JobError:
+        return HttpResponse("เกิดข้อผิดพลาดในการสร้างไฟล์ PDF", status=500)
+
+    response = HttpResponse(content, content_type="application/pdf")
     response["Content-Disposition"] = f'inline; filename="{filename}"'
+    return response
 
-    pisa_status = pisa.CreatePDF(
-        html,
-        dest=response,
-    )
 
-    if pisa_status.err:
-        return HttpResponse("เกิดข้อผิดพลาดในการสร้างไฟล์ PDF", status=500)
-    return response
+# ===== Export ผ่านคิว (สร้างไฟล์เบื้องหลังด้วย manage.py run_worker) =====
+@login_required
+@require_POST
+def export_ticket_list(request):
+    """เข้าคิว PDF รายการใบงาน (ตัวกรองเดียวกับ ticket_list ส่งมาใน POST)"""
+    if not PDF_AVAILABLE:
+        return HttpResponse(
+            "PDF export is not available. Missing required libraries (xhtml2pdf).",
+            status=503,
+            content_type="text/plain"
+        )
+    job = exports.enqueue_ticket_list_pdf(request.user, request.POST)
+    return redirect("helpdesk:export_status", pk=job.pk)
+
 
-# ===== PDF Report : สรุปจำนวนใบงานรายปี (ใช้ year จาก URL) =====
 @login_required
-def ticket_year_summary_pdf(request, year):
+@require_POST
+def export_year_summary(request, year):
     if not _is_it_staff(request.user):
         return HttpResponseForbidden("อนุญาตเฉพาะเจ้าหน้าที่ IT เท่านั้น")
+    if not PDF_AVAILABLE:
+        return HttpResponse(
+            "PDF export is not available. Missing required libraries (xhtml2pdf).",
+            status=503,
+            content_type="text/plain"
+        )
+    job = exports.enqueue_year_summary_pdf(request.user, year)
+    return redirect("helpdesk:export_status", pk=job.pk)
 
-    summary = _build_year_summary(year)
 
-    font_path = (
-        settings.BASE_DIR / "static" / "fonts" / "THSarabunNew.ttf"
-    ).as_posix()
+def _get_export_job(request, pk):
+    job = get_object_or_404(BackgroundJob, pk=pk, kind__in=EXPORT_KINDS)
+    if not exports.can_access(request.user, job):
+        raise PermissionDenied
+    return job
 
-    context = {
-        "year": year,
-        "th_sarabun_path": font_path,  # ★ ส่งเข้า template
-        **summary,
-    }
 
-    template = get_template("helpdesk/ticket_report_pdf.html")
-    html = template.render(context)
+@login_required
+def export_status(request, pk):
+    """
+    สถานะงาน export — JSON เมื่อขอด้วย ?format=json (ให้ JS poll)
+    ไม่เช่นนั้นเป็นหน้าเว็บที่รีเฟรชตัวเองจนกว่าไฟล์จะพร้อม
+    """
+    job = _get_export_job(request, pk)
+    download_url = (
+        reverse("helpdesk:export_download", args=[job.pk]) if job.status == "done" else None
+    )
 
-    response = HttpResponse(content_type="application/pdf")
-    filename = f"ticket_year_summary_{year}.pdf"
-    response["Content-Disposition"] = f'inline; filename="{filename}"'
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "id": job.pk,
+            "kind": job.kind,
+            "status": job.status,
+            "progress": job.progress,
+            "error": job.error if job.status == "failed" else "",
+            "download_url": download_url,
+        })
 
-    pisa_status = pisa.CreatePDF(html, dest=response)
-    if pisa_status.err:
-        return HttpResponse("เกิดข้อผิดพลาดในการสร้างไฟล์ PDF", status=500)
+    return render(request, "helpdesk/export_status.html", {
+        "job": job,
+        "download_url": download_url,
+    })
 
-    return response
+
+@login_required
+def export_download(request, pk):
+    job = _get_export_job(request, pk)
+    if job.status != "done" or not job.result_file:
+        raise Http404("ไฟล์ยังไม่พร้อม")
+    try:
+        fh = job.result_file.open("rb")
+    except FileNotFoundError:
+        raise Http404("ไม่พบไฟล์")
+    return FileResponse(fh, content_type="application/pdf", filename=job.result_name)
 
 # views.py
 @login_required
@@ -962,7 +1084,10 @@ def ticket_accept(request, pk):
 
     ticket.assignee = request.user
     ticket.status = "in_progress"  # หรือโค้ดสถานะที่พี่ใช้จริง
-    ticket.save(update_fields=["assignee", "status"])
+    with transaction.atomic():
+        ticket.save(update_fields=["assignee", "status", "updated_at"], actor=request.user)
+        notify.enqueue("claimed", [ticket], actor=request.user)
+    events.publish_ticket("claimed", ticket, actor=request.user)
 
     messages.success(request, "รับงานเรียบร้อย")
     return redirect("helpdesk:ticket_update", pk=pk)  # ✅ เด้งไปหน้า 🛠 ตรวจสอบงาน
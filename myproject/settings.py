@@ -73,6 +73,18 @@ DATABASES = {
 }
 
 
+# Cache (ใช้กับแคชรายงาน/นับจำนวน ฯลฯ)
+# ถ้ารันหลาย process ควรเปลี่ยนเป็น backend ที่แชร์กันได้ (เช่น Redis หรือ DatabaseCache)
+# เพื่อให้การล้างแคชผ่าน signal มีผลทุก worker
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'helpdesk',
+    }
+}
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [